@@ -54,8 +54,11 @@ import carla
 from carla import TrafficLightState as tls
 
 import argparse
+import collections
 import logging
 import datetime
+import hashlib
+import json
 import weakref
 import math
 import random
@@ -149,6 +152,10 @@ HERO_DEFAULT_SCALE = 1.0
 
 PIXELS_AHEAD_VEHICLE = 150
 
+MAP_TILE_SIZE = 512
+MAP_TILE_LEVELS = 4
+MAP_TILE_CACHE_SIZE = 128
+
 # ==============================================================================
 # -- Util -----------------------------------------------------------
 # ==============================================================================
@@ -431,14 +438,121 @@ class TrafficLightSurfaces(object):
 # ==============================================================================
 
 
+class MapCanvas(object):
+    """Records the draw calls of the road map, in pixels at scale 1.0, so that they can
+    be replayed into map tiles of any position and zoom level"""
+
+    def __init__(self):
+        self.background = COLOR_BLACK
+        self.primitives = []
+
+    def fill(self, color):
+        self.background = color
+
+    def _add(self, kind, color, points, width, closed=False):
+        xs = [p[0] for p in points]
+        ys = [p[1] for p in points]
+        bbox = (min(xs) - width, min(ys) - width, max(xs) + width, max(ys) + width)
+        self.primitives.append((kind, color, points, width, closed, bbox))
+
+    def polygon(self, color, points, width=0):
+        self._add('polygon', color, points, width)
+
+    def lines(self, color, closed, points, width=1):
+        if len(points) >= 2:
+            self._add('lines', color, points, width, closed)
+
+    def line(self, color, start_pos, end_pos, width=1):
+        self._add('lines', color, [start_pos, end_pos], width)
+
+    def blit(self, source, dest):
+        rect = source.get_rect(topleft=(dest[0], dest[1]))
+        self.primitives.append(('blit', None, source, 0, False, (rect.left, rect.top, rect.right, rect.bottom)))
+
+    def bucket(self, tile_size, scale):
+        """Returns a dictionary mapping each (i, j) tile of the given scale to the indexes
+        of the primitives that overlap it, kept in drawing order"""
+        buckets = {}
+        span = tile_size / scale
+        for index, primitive in enumerate(self.primitives):
+            min_x, min_y, max_x, max_y = primitive[5]
+            for i in range(max(0, int(min_x // span)), int(max_x // span) + 1):
+                for j in range(max(0, int(min_y // span)), int(max_y // span) + 1):
+                    buckets.setdefault((i, j), []).append(index)
+        return buckets
+
+    def draw(self, surface, indexes, scale, origin):
+        """Replays the given primitives into the surface, whose top left corner is at
+        'origin', in pixels at the given scale"""
+        def transform(points):
+            return [(p[0] * scale - origin[0], p[1] * scale - origin[1]) for p in points]
+
+        scaled_sources = {}
+        for index in indexes:
+            kind, color, points, width, closed, bbox = self.primitives[index]
+            width = max(1, int(round(width * scale))) if width > 0 else 0
+            if kind == 'polygon':
+                pygame.draw.polygon(surface, color, transform(points), width)
+            elif kind == 'lines':
+                pygame.draw.lines(surface, color, closed, transform(points), width)
+            else:
+                source = points
+                if scale != 1.0:
+                    if id(source) not in scaled_sources:
+                        scaled_sources[id(source)] = pygame.transform.rotozoom(source, 0, scale)
+                    source = scaled_sources[id(source)]
+                surface.blit(source, (bbox[0] * scale - origin[0], bbox[1] * scale - origin[1]))
+
+
 class MapImage(object):
-    def __init__(self, carla_world, carla_map, pixels_per_meter, show_triggers, show_connections, show_spawn_points):
+    """Road map split into square tiles at several zoom levels. The tiles are rendered once
+    per map and stored in 'cache_dir' (if any), keyed by the map name and the hash of its
+    OpenDRIVE, and only those visible in the viewport are kept in memory."""
+
+    CACHE_VERSION = 1
+
+    def __init__(self, carla_world, carla_map, pixels_per_meter, show_triggers, show_connections, show_spawn_points,
+                 cache_dir=None):
         self._pixels_per_meter = pixels_per_meter
         self.scale = 1.0
         self.show_triggers = show_triggers
         self.show_connections = show_connections
         self.show_spawn_points = show_spawn_points
 
+        self._canvas = None
+        self._tiles = collections.OrderedDict()
+        self._background_tiles = {}
+
+        key = hashlib.sha1(carla_map.to_opendrive().encode('utf-8'))
+        key.update(str((self.CACHE_VERSION, pixels_per_meter, MAP_TILE_SIZE, MAP_TILE_LEVELS,
+                        show_triggers, show_connections, show_spawn_points)).encode('utf-8'))
+        self._cache_path = None
+        if cache_dir:
+            map_name = os.path.basename(carla_map.name)
+            self._cache_path = os.path.join(cache_dir, '{}_{}'.format(map_name, key.hexdigest()[:16]))
+
+        if not self._load_cache_info():
+            self._render_tiles(carla_world, carla_map)
+
+        self.width_in_pixels = int(self._pixels_per_meter * self.width)
+
+    def _load_cache_info(self):
+        """Reads the map bounds and the list of non empty tiles from the disk cache"""
+        if self._cache_path is None:
+            return False
+        try:
+            with open(os.path.join(self._cache_path, 'map.json'), 'r') as fd:
+                info = json.load(fd)
+        except (IOError, OSError, ValueError):
+            return False
+
+        self.width = info['width']
+        self._world_offset = tuple(info['world_offset'])
+        self._tile_keys = set((level, i, j) for level, i, j in info['tiles'])
+        return True
+
+    def _render_tiles(self, carla_world, carla_map):
+        """Draws the road map and, if the disk cache is enabled, stores all of its tiles"""
         waypoints = carla_map.generate_waypoints(2)
         margin = 50
         max_x = max(waypoints, key=lambda x: x.transform.location.x).transform.location.x + margin
@@ -449,14 +563,100 @@ class MapImage(object):
         self.width = max(max_x - min_x, max_y - min_y)
         self._world_offset = (min_x, min_y)
 
-        width_in_pixels = int(self._pixels_per_meter * self.width)
+        canvas = MapCanvas()
+        self.draw_road_map(canvas, carla_world, carla_map, self.world_to_pixel, self.world_to_pixel_width)
 
-        self.big_map_surface = pygame.Surface((width_in_pixels, width_in_pixels)).convert()
-        self.draw_road_map(self.big_map_surface, carla_world, carla_map, self.world_to_pixel, self.world_to_pixel_width)
-        self.surface = self.big_map_surface
+        self._tile_keys = set()
+        self._buckets = {}
+        for level in range(MAP_TILE_LEVELS):
+            for (i, j), indexes in canvas.bucket(MAP_TILE_SIZE, self._level_scale(level)).items():
+                self._tile_keys.add((level, i, j))
+                self._buckets[(level, i, j)] = indexes
 
-    def draw_road_map(self, map_surface, carla_world, carla_map, world_to_pixel, world_to_pixel_width):
-        map_surface.fill(COLOR_ALUMINIUM_4)
+        if self._cache_path is None:
+            # Without disk cache, the tiles are drawn when they first become visible
+            self._canvas = canvas
+            return
+
+        try:
+            for level, i, j in self._tile_keys:
+                tile = self._draw_tile(canvas, level, i, j)
+                tile_path = os.path.join(self._cache_path, str(level), '{}_{}.png'.format(i, j))
+                if not os.path.exists(os.path.dirname(tile_path)):
+                    os.makedirs(os.path.dirname(tile_path))
+                pygame.image.save(tile, tile_path)
+
+            # Written last, so that an interrupted render is never taken as a valid cache
+            info = {'width': self.width,
+                    'world_offset': self._world_offset,
+                    'tiles': sorted(self._tile_keys)}
+            with open(os.path.join(self._cache_path, 'map.json'), 'w') as fd:
+                json.dump(info, fd)
+            self._buckets = None
+        except (IOError, OSError, pygame.error) as e:
+            logging.warning('Could not store the map tiles at %s: %s', self._cache_path, e)
+            self._cache_path = None
+            self._canvas = canvas
+
+    @staticmethod
+    def _level_scale(level):
+        return 1.0 / (2 ** level)
+
+    def _draw_tile(self, canvas, level, i, j):
+        tile = pygame.Surface((MAP_TILE_SIZE, MAP_TILE_SIZE)).convert()
+        tile.fill(canvas.background)
+        canvas.draw(tile, self._buckets[(level, i, j)], self._level_scale(level),
+                    (i * MAP_TILE_SIZE, j * MAP_TILE_SIZE))
+        return tile
+
+    def _get_tile(self, level, i, j, size):
+        """Returns the tile, resized to 'size' pixels, loading or drawing it if needed"""
+        key = (level, i, j, size)
+        if key in self._tiles:
+            self._tiles.move_to_end(key)
+            return self._tiles[key]
+
+        if (level, i, j) not in self._tile_keys:
+            if size not in self._background_tiles:
+                background = pygame.Surface((size, size)).convert()
+                background.fill(COLOR_ALUMINIUM_4)
+                self._background_tiles = {size: background}
+            return self._background_tiles[size]
+
+        if self._canvas is not None:
+            tile = self._draw_tile(self._canvas, level, i, j)
+        else:
+            tile = pygame.image.load(os.path.join(self._cache_path, str(level), '{}_{}.png'.format(i, j))).convert()
+        if size != MAP_TILE_SIZE:
+            tile = pygame.transform.smoothscale(tile, (size, size))
+
+        self._tiles[key] = tile
+        while len(self._tiles) > MAP_TILE_CACHE_SIZE:
+            self._tiles.popitem(last=False)
+        return tile
+
+    def render(self, surface, origin):
+        """Blits the visible tiles into the surface, whose top left corner is at 'origin',
+        in pixels of the current scale"""
+        level = 0
+        while level < MAP_TILE_LEVELS - 1 and self._level_scale(level + 1) >= self.scale:
+            level += 1
+        tile_width = MAP_TILE_SIZE * self.scale / self._level_scale(level)
+        size = int(math.ceil(tile_width))
+
+        num_tiles = int(math.ceil(self.width_in_pixels * self.scale / tile_width))
+        first_i = max(0, int(origin[0] // tile_width))
+        first_j = max(0, int(origin[1] // tile_width))
+        last_i = min(num_tiles - 1, int((origin[0] + surface.get_width()) // tile_width))
+        last_j = min(num_tiles - 1, int((origin[1] + surface.get_height()) // tile_width))
+
+        for i in range(first_i, last_i + 1):
+            for j in range(first_j, last_j + 1):
+                tile = self._get_tile(level, i, j, size)
+                surface.blit(tile, (int(round(i * tile_width - origin[0])), int(round(j * tile_width - origin[1]))))
+
+    def draw_road_map(self, map_canvas, carla_world, carla_map, world_to_pixel, world_to_pixel_width):
+        map_canvas.fill(COLOR_ALUMINIUM_4)
         precision = 0.05
 
         def lane_marking_color_to_tango(lane_marking_color):
@@ -481,12 +681,12 @@ class MapImage(object):
 
         def draw_solid_line(surface, color, closed, points, width):
             if len(points) >= 2:
-                pygame.draw.lines(surface, color, closed, points, width)
+                surface.lines(color, closed, points, width)
 
         def draw_broken_line(surface, color, closed, points, width):
             broken_lines = [x for n, x in enumerate(zip(*(iter(points),) * 20)) if n % 3 == 0]
             for line in broken_lines:
-                pygame.draw.lines(surface, color, closed, line, width)
+                surface.lines(color, closed, line, width)
 
         def get_lane_markings(lane_marking_type, lane_marking_color, waypoints, sign):
             margin = 0.20
@@ -574,12 +774,12 @@ class MapImage(object):
             start = end - 2.0 * forward
             right = start + 0.8 * forward + 0.4 * right_dir
             left = start + 0.8 * forward - 0.4 * right_dir
-            pygame.draw.lines(
-                surface, color, False, [
+            surface.lines(
+                color, False, [
                     world_to_pixel(x) for x in [
                         start, end]], 4)
-            pygame.draw.lines(
-                surface, color, False, [
+            surface.lines(
+                color, False, [
                     world_to_pixel(x) for x in [
                         left, start, right]], 4)
 
@@ -602,13 +802,13 @@ class MapImage(object):
                     (waypoint.transform.location + (forward_vector * 1.5) - (left_vector))]
 
             line_pixel = [world_to_pixel(p) for p in line]
-            pygame.draw.lines(surface, color, True, line_pixel, 2)
+            surface.lines(color, True, line_pixel, 2)
 
             # draw bounding box
             if self.show_triggers:
                 corners = Util.get_bounding_box(actor)
                 corners = [world_to_pixel(p) for p in corners]
-                pygame.draw.lines(surface, trigger_color, True, corners, 2)
+                surface.lines(trigger_color, True, corners, 2)
 
         def lateral_shift(transform, shift):
             transform.rotation.yaw += 90
@@ -640,8 +840,8 @@ class MapImage(object):
                 polygon = [world_to_pixel(x) for x in polygon]
 
                 if len(polygon) > 2:
-                    pygame.draw.polygon(map_surface, COLOR_ALUMINIUM_5, polygon, 5)
-                    pygame.draw.polygon(map_surface, COLOR_ALUMINIUM_5, polygon)
+                    map_canvas.polygon(COLOR_ALUMINIUM_5, polygon, 5)
+                    map_canvas.polygon(COLOR_ALUMINIUM_5, polygon)
 
                 # Draw Shoulders and Parkings
                 PARKING_COLOR = COLOR_ALUMINIUM_4_5
@@ -666,11 +866,11 @@ class MapImage(object):
                 polygon = [world_to_pixel(x) for x in polygon]
 
                 if len(polygon) > 2:
-                    pygame.draw.polygon(map_surface, final_color, polygon, 5)
-                    pygame.draw.polygon(map_surface, final_color, polygon)
+                    map_canvas.polygon(final_color, polygon, 5)
+                    map_canvas.polygon(final_color, polygon)
 
                 draw_lane_marking(
-                    map_surface,
+                    map_canvas,
                     shoulder,
                     False)
 
@@ -691,27 +891,27 @@ class MapImage(object):
                 polygon = [world_to_pixel(x) for x in polygon]
 
                 if len(polygon) > 2:
-                    pygame.draw.polygon(map_surface, final_color, polygon, 5)
-                    pygame.draw.polygon(map_surface, final_color, polygon)
+                    map_canvas.polygon(final_color, polygon, 5)
+                    map_canvas.polygon(final_color, polygon)
 
                 draw_lane_marking(
-                    map_surface,
+                    map_canvas,
                     shoulder,
                     True)
 
                 # Draw Lane Markings and Arrows
                 if not waypoint.is_intersection:
                     draw_lane_marking(
-                        map_surface,
+                        map_canvas,
                         waypoints,
                         True)
                     draw_lane_marking(
-                        map_surface,
+                        map_canvas,
                         waypoints,
                         False)
                     for n, wp in enumerate(waypoints):
                         if ((n + 1) % 400) == 0:
-                            draw_arrow(map_surface, wp.transform)
+                            draw_arrow(map_canvas, wp.transform)
 
         topology = carla_map.get_topology()
         draw_topology(topology, 0)
@@ -719,7 +919,7 @@ class MapImage(object):
 
         if self.show_spawn_points:
             for sp in carla_map.get_spawn_points():
-                draw_arrow(map_surface, sp, color=COLOR_CHOCOLATE_0)
+                draw_arrow(map_canvas, sp, color=COLOR_CHOCOLATE_0)
 
         if self.show_connections:
             dist = 1.5
@@ -727,15 +927,15 @@ class MapImage(object):
             for wp in carla_map.generate_waypoints(dist):
                 col = (0, 255, 255) if wp.is_intersection else (0, 255, 0)
                 for nxt in wp.next(dist):
-                    pygame.draw.line(map_surface, col, to_pixel(wp), to_pixel(nxt), 2)
+                    map_canvas.line(col, to_pixel(wp), to_pixel(nxt), 2)
                 if wp.lane_change & carla.LaneChange.Right:
                     r = wp.get_right_lane()
                     if r and r.lane_type == carla.LaneType.Driving:
-                        pygame.draw.line(map_surface, col, to_pixel(wp), to_pixel(r), 2)
+                        map_canvas.line(col, to_pixel(wp), to_pixel(r), 2)
                 if wp.lane_change & carla.LaneChange.Left:
                     l = wp.get_left_lane()
                     if l and l.lane_type == carla.LaneType.Driving:
-                        pygame.draw.line(map_surface, col, to_pixel(wp), to_pixel(l), 2)
+                        map_canvas.line(col, to_pixel(wp), to_pixel(l), 2)
 
         actors = carla_world.get_actors()
 
@@ -755,10 +955,10 @@ class MapImage(object):
             yield_font_surface, (yield_font_surface.get_width(), yield_font_surface.get_height() * 2))
 
         for ts_stop in stops:
-            draw_traffic_signs(map_surface, stop_font_surface, ts_stop, trigger_color=COLOR_SCARLET_RED_1)
+            draw_traffic_signs(map_canvas, stop_font_surface, ts_stop, trigger_color=COLOR_SCARLET_RED_1)
 
         for ts_yield in yields:
-            draw_traffic_signs(map_surface, yield_font_surface, ts_yield, trigger_color=COLOR_ORANGE_1)
+            draw_traffic_signs(map_canvas, yield_font_surface, ts_yield, trigger_color=COLOR_ORANGE_1)
 
     def world_to_pixel(self, location, offset=(0, 0)):
         x = self.scale * self._pixels_per_meter * (location.x - self._world_offset[0])
@@ -769,10 +969,7 @@ class MapImage(object):
         return int(self.scale * self._pixels_per_meter * width)
 
     def scale_map(self, scale):
-        if scale != self.scale:
-            self.scale = scale
-            width = int(self.big_map_surface.get_width() * self.scale)
-            self.surface = pygame.transform.smoothscale(self.big_map_surface, (width, width))
+        self.scale = scale
 
 
 class ModuleWorld(object):
@@ -843,23 +1040,29 @@ class ModuleWorld(object):
             pixels_per_meter=PIXELS_PER_METER,
             show_triggers=self.args.show_triggers,
             show_connections=self.args.show_connections,
-            show_spawn_points=self.args.show_spawn_points)
+            show_spawn_points=self.args.show_spawn_points,
+            cache_dir=self.args.map_cache_dir)
 
         # Store necessary modules
         self.module_hud = module_manager.get_module(MODULE_HUD)
         self.module_input = module_manager.get_module(MODULE_INPUT)
 
         self.original_surface_size = min(self.module_hud.dim[0], self.module_hud.dim[1])
-        self.surface_size = self.map_image.big_map_surface.get_width()
+        self.surface_size = self.map_image.width_in_pixels
 
         self.scaled_size = int(self.surface_size)
         self.prev_scaled_size = int(self.surface_size)
 
+        # The map is only rendered around the viewport, either the hero or the display one
+        scaled_original_size = self.original_surface_size * (1.0 / 0.9)
+        viewport_size = (int(math.ceil(max(self.module_hud.dim[0], scaled_original_size))),
+                         int(math.ceil(max(self.module_hud.dim[1], scaled_original_size))))
+
         # Render Actors
-        self.actors_surface = pygame.Surface((self.map_image.surface.get_width(), self.map_image.surface.get_height()))
+        self.actors_surface = pygame.Surface(viewport_size)
         self.actors_surface.set_colorkey(COLOR_BLACK)
 
-        self.vehicle_id_surface = pygame.Surface((self.surface_size, self.surface_size)).convert()
+        self.vehicle_id_surface = pygame.Surface(viewport_size).convert()
         self.vehicle_id_surface.set_colorkey(COLOR_BLACK)
 
         self.border_round_surface = pygame.Surface(self.module_hud.dim, pygame.SRCALPHA).convert()
@@ -870,10 +1073,9 @@ class ModuleWorld(object):
         pygame.draw.circle(self.border_round_surface, COLOR_ALUMINIUM_1, center_offset, int(self.module_hud.dim[1] / 2))
         pygame.draw.circle(self.border_round_surface, COLOR_WHITE, center_offset, int((self.module_hud.dim[1] - 8) / 2))
 
-        scaled_original_size = self.original_surface_size * (1.0 / 0.9)
         self.hero_surface = pygame.Surface((scaled_original_size, scaled_original_size)).convert()
 
-        self.result_surface = pygame.Surface((self.surface_size, self.surface_size)).convert()
+        self.result_surface = pygame.Surface(viewport_size).convert()
         self.result_surface.set_colorkey(COLOR_BLACK)
 
         # Start hero mode by default
@@ -1108,20 +1310,15 @@ class ModuleWorld(object):
             corners = [world_to_pixel(p) for p in corners]
             pygame.draw.lines(surface, color, False, corners, int(math.ceil(4.0 * self.map_image.scale)))
 
-    def render_actors(self, surface, vehicles, traffic_lights, speed_limits, walkers):
+    def render_actors(self, surface, vehicles, traffic_lights, speed_limits, walkers, world_to_pixel):
         # Static actors
-        self._render_traffic_lights(surface, [tl[0] for tl in traffic_lights], self.map_image.world_to_pixel)
-        self._render_speed_limits(surface, [sl[0] for sl in speed_limits], self.map_image.world_to_pixel,
+        self._render_traffic_lights(surface, [tl[0] for tl in traffic_lights], world_to_pixel)
+        self._render_speed_limits(surface, [sl[0] for sl in speed_limits], world_to_pixel,
                                   self.map_image.world_to_pixel_width)
 
         # Dynamic actors
-        self._render_vehicles(surface, vehicles, self.map_image.world_to_pixel)
-        self._render_walkers(surface, walkers, self.map_image.world_to_pixel)
-
-    def clip_surfaces(self, clipping_rect):
-        self.actors_surface.set_clip(clipping_rect)
-        self.vehicle_id_surface.set_clip(clipping_rect)
-        self.result_surface.set_clip(clipping_rect)
+        self._render_vehicles(surface, vehicles, world_to_pixel)
+        self._render_walkers(surface, walkers, world_to_pixel)
 
     def _compute_scale(self, scale_factor):
         m = self.module_input.mouse_pos
@@ -1155,60 +1352,60 @@ class ModuleWorld(object):
         if self.scaled_size != self.prev_scaled_size:
             self._compute_scale(scale_factor)
 
-        # Render Actors
+        # Compute the viewport, as the map pixel at the top left corner of the result surface
+        if self.hero_actor is not None:
+            hero_location_screen = self.map_image.world_to_pixel(self.hero_transform.location)
+            hero_front = self.hero_transform.get_forward_vector()
+            translation_offset = (
+                hero_location_screen[0] -
+                self.hero_surface.get_width() /
+                2 +
+                hero_front.x *
+                PIXELS_AHEAD_VEHICLE,
+                (hero_location_screen[1] -
+                 self.hero_surface.get_height() /
+                 2 +
+                 hero_front.y *
+                 PIXELS_AHEAD_VEHICLE))
+            viewport_origin = translation_offset
+        else:
+            translation_offset = (self.module_input.mouse_offset[0] * scale_factor + self.scale_offset[0],
+                                  self.module_input.mouse_offset[1] * scale_factor + self.scale_offset[1])
+            center_offset = (abs(display.get_width() - self.surface_size) / 2 * scale_factor, 0)
+            viewport_origin = (-translation_offset[0] - center_offset[0], -translation_offset[1])
+
+        def world_to_pixel(location):
+            return self.map_image.world_to_pixel(location, offset=viewport_origin)
+
+        # Render Map
+        self.map_image.render(self.result_surface, viewport_origin)
 
+        # Render Actors
         self.actors_surface.fill(COLOR_BLACK)
         self.render_actors(
             self.actors_surface,
             vehicles,
             traffic_lights,
             speed_limits,
-            walkers)
+            walkers,
+            world_to_pixel)
 
         # Render Ids
         self.module_hud.render_vehicles_ids(self.vehicle_id_surface, vehicles,
-                                            self.map_image.world_to_pixel, self.hero_actor, self.hero_transform)
+                                            world_to_pixel, self.hero_actor, self.hero_transform)
 
         # Blit surfaces
-        surfaces = ((self.map_image.surface, (0, 0)),
-                    (self.actors_surface, (0, 0)),
+        surfaces = ((self.actors_surface, (0, 0)),
                     (self.vehicle_id_surface, (0, 0)),
                     )
+        Util.blits(self.result_surface, surfaces)
 
         angle = 0.0 if self.hero_actor is None else self.hero_transform.rotation.yaw + 90.0
         self.traffic_light_surfaces.rotozoom(-angle, self.map_image.scale)
 
-        center_offset = (0, 0)
         if self.hero_actor is not None:
-
-            hero_location_screen = self.map_image.world_to_pixel(self.hero_transform.location)
-            hero_front = self.hero_transform.get_forward_vector()
-            translation_offset = (
-                hero_location_screen[0] -
-                self.hero_surface.get_width() /
-                2 +
-                hero_front.x *
-                PIXELS_AHEAD_VEHICLE,
-                (hero_location_screen[1] -
-                 self.hero_surface.get_height() /
-                 2 +
-                 hero_front.y *
-                 PIXELS_AHEAD_VEHICLE))
-
-            # Apply clipping rect
-            clipping_rect = pygame.Rect(translation_offset[0],
-                                        translation_offset[1],
-                                        self.hero_surface.get_width(),
-                                        self.hero_surface.get_height())
-            self.clip_surfaces(clipping_rect)
-
-            Util.blits(self.result_surface, surfaces)
-
-            self.border_round_surface.set_clip(clipping_rect)
-
             self.hero_surface.fill(COLOR_ALUMINIUM_4)
-            self.hero_surface.blit(self.result_surface, (-translation_offset[0],
-                                                         -translation_offset[1]))
+            self.hero_surface.blit(self.result_surface, (0, 0))
 
             rotated_result_surface = pygame.transform.rotozoom(self.hero_surface, angle, 0.9).convert()
 
@@ -1218,19 +1415,7 @@ class ModuleWorld(object):
 
             display.blit(self.border_round_surface, (0, 0))
         else:
-            # Translation offset
-            translation_offset = (self.module_input.mouse_offset[0] * scale_factor + self.scale_offset[0],
-                                  self.module_input.mouse_offset[1] * scale_factor + self.scale_offset[1])
-            center_offset = (abs(display.get_width() - self.surface_size) / 2 * scale_factor, 0)
-
-            # Apply clipping rect
-            clipping_rect = pygame.Rect(-translation_offset[0] - center_offset[0], -translation_offset[1],
-                                        self.module_hud.dim[0], self.module_hud.dim[1])
-            self.clip_surfaces(clipping_rect)
-            Util.blits(self.result_surface, surfaces)
-
-            display.blit(self.result_surface, (translation_offset[0] + center_offset[0],
-                                               translation_offset[1]))
+            display.blit(self.result_surface, (0, 0))
 
     def destroy(self):
         if self.spawned_hero is not None:
@@ -1477,6 +1662,12 @@ def main():
         '--show-spawn-points',
         action='store_true',
         help='show recommended spawn points')
+    argparser.add_argument(
+        '--map-cache-dir',
+        metavar='DIR',
+        default=os.path.join(os.path.expanduser('~'), '.cache', 'carla', 'no_rendering_mode'),
+        help='directory where the rendered map tiles are cached, empty to disable it '
+             '(default: ~/.cache/carla/no_rendering_mode)')
 
     args = argparser.parse_args()
     args.description = argparser.description
@@ -20,33 +20,48 @@ import traceback
 import argparse
 from argparse import RawTextHelpFormatter
 from datetime import datetime
-from distutils.version import LooseVersion
 import importlib
 import inspect
 import os
+import re
 import signal
 import sys
 import time
 import json
-import pkg_resources
 
 import carla
 
-from srunner.scenarioconfigs.openscenario_configuration import OpenScenarioConfiguration
 from srunner.scenariomanager.carla_data_provider import CarlaDataProvider
+from srunner.scenariomanager.result_writer import ResultStream
 from srunner.scenariomanager.scenario_manager import ScenarioManager
-from srunner.scenarios.open_scenario import OpenScenario
-from srunner.scenarios.route_scenario import RouteScenario
 from srunner.tools.scenario_parser import ScenarioConfigurationParser
-from srunner.tools.route_parser import RouteParser
-from srunner.tools.osc2_helper import OSC2Helper
-from srunner.scenarios.osc2_scenario import OSC2Scenario
-from srunner.scenarioconfigs.osc2_scenario_configuration import OSC2ScenarioConfiguration
+from srunner.osc2_dm.sampler import SAMPLING_STRATEGIES, RangeSampler, set_sampler
+
+# The OpenSCENARIO, route and OpenSCENARIO 2.0 frontends (with their XML schema, ANTLR parser, ...)
+# are only imported when their flag is used, see srunner/tests/benchmark_startup.py
 
 # Version of scenario_runner
 VERSION = '0.9.13'
 
 
+def get_carla_version():
+    """
+    Returns the version of the installed CARLA package. pkg_resources takes long to import,
+    so it is only used for the eggs that importlib.metadata doesn't find
+    """
+    try:
+        from importlib.metadata import version, PackageNotFoundError
+        try:
+            return version("carla")
+        except PackageNotFoundError:
+            pass
+    except ImportError:  # Python < 3.8
+        pass
+
+    import pkg_resources
+    return pkg_resources.get_distribution("carla").version
+
+
 class ScenarioRunner(object):
 
     """
@@ -86,15 +101,16 @@ class ScenarioRunner(object):
 
         if args.timeout:
             self.client_timeout = float(args.timeout)
+        self.frame_rate = float(args.frameRate)
 
         # First of all, we need to create the client that will send the requests
         # to the simulator. Here we'll assume the simulator is accepting
         # requests in the localhost at port 2000.
         self.client = carla.Client(args.host, int(args.port))
         self.client.set_timeout(self.client_timeout)
-        dist = pkg_resources.get_distribution("carla")
-        if LooseVersion(dist.version) < LooseVersion('0.9.15'):
-            raise ImportError("CARLA version 0.9.15 or newer required. CARLA version found: {}".format(dist))
+        carla_version = get_carla_version()
+        if tuple(int(number) for number in re.findall(r"\d+", carla_version)[:3]) < (0, 9, 15):
+            raise ImportError("CARLA version 0.9.15 or newer required. CARLA version found: {}".format(carla_version))
 
         # Load agent if requested via command line args
         # If something goes wrong an exception will be thrown by importlib (ok here)
@@ -104,7 +120,9 @@ class ScenarioRunner(object):
             self.module_agent = importlib.import_module(module_name)
 
         # Create the ScenarioManager
-        self.manager = ScenarioManager(self._args.debug, self._args.sync, self._args.timeout)
+        self.manager = ScenarioManager(self._args.debug, self._args.sync, self._args.timeout,
+                                       self._args.evaluationOnly, self._args.substeps,
+                                       self._args.pipelineTicks)
 
         # Create signal handler for SIGINT
         self._shutdown_requested = False
@@ -139,6 +157,16 @@ class ScenarioRunner(object):
             if not self.manager.get_running_status():
                 raise RuntimeError("Timeout occurred during scenario execution")
 
+    @staticmethod
+    def _defines_class(filename, class_name):
+        """
+        Returns whether or not the Python file defines a class with the given name, without importing it
+        """
+        if not os.path.isfile(filename):
+            return False
+        with open(filename, 'r', encoding='utf-8') as fd:
+            return re.search(r"^class\s+{}\b".format(re.escape(class_name)), fd.read(), re.MULTILINE) is not None
+
     def _get_scenario_class_or_fail(self, scenario):
         """
         Get scenario class by scenario name
@@ -149,6 +177,9 @@ class ScenarioRunner(object):
         scenarios_list = glob.glob("{}/srunner/scenarios/*.py".format(os.getenv('SCENARIO_RUNNER_ROOT', "./")))
         scenarios_list.append(self._args.additionalScenario)
 
+        # Importing all of them takes seconds, so start with the files defining the scenario class
+        scenarios_list.sort(key=lambda scenario_file: not self._defines_class(scenario_file, scenario))
+
         for scenario_file in scenarios_list:
 
             # Get their module
@@ -188,6 +219,14 @@ class ScenarioRunner(object):
             except RuntimeError:
                 sys.exit(-1)
 
+        if self.world is not None and self._args.evaluationOnly:
+            try:
+                settings = self.world.get_settings()
+                settings.no_rendering_mode = False
+                self.world.apply_settings(settings)
+            except RuntimeError:
+                sys.exit(-1)
+
         self.manager.cleanup()
 
         CarlaDataProvider.cleanup()
@@ -268,7 +307,17 @@ class ScenarioRunner(object):
         if self._args.file:
             filename = config_name + current_time + ".txt"
 
-        if not self.manager.analyze_scenario(self._args.output, filename, junit_filename, json_filename):
+        database = None
+        run_info = None
+        if self._args.resultDatabase:
+            database = self._args.resultDatabase
+            run_info = {
+                "scenario_file": self._args.openscenario2 or self._args.openscenario or self._args.route,
+                "map_name": config.town,
+            }
+
+        if not self.manager.analyze_scenario(self._args.output, filename, junit_filename, json_filename,
+                                             database, run_info):
             print("All scenario tests were passed successfully!")
         else:
             print("Not all scenario tests were successful")
@@ -307,12 +356,12 @@ class ScenarioRunner(object):
         with open(file_name, 'w', encoding='utf-8') as fp:
             json.dump(criteria_dict, fp, sort_keys=False, indent=4)
 
-    def _load_and_wait_for_world(self, town, ego_vehicles=None):
+    def _load_and_wait_for_world(self, town, ego_vehicles=None, reload_world=True):
         """
         Load a new CARLA world and provide data to CarlaDataProvider
         """
 
-        if self._args.reloadWorld:
+        if self._args.reloadWorld and reload_world:
             self.world = self.client.load_world(town)
         else:
             # if the world should not be reloaded, wait at least until all ego vehicles are ready
@@ -339,8 +388,14 @@ class ScenarioRunner(object):
             settings.fixed_delta_seconds = 1.0 / self.frame_rate
             self.world.apply_settings(settings)
 
+        if self._args.evaluationOnly:
+            settings = self.world.get_settings()
+            settings.no_rendering_mode = True
+            self.world.apply_settings(settings)
+
         CarlaDataProvider.set_client(self.client)
         CarlaDataProvider.set_world(self.world)
+        CarlaDataProvider.set_evaluation_only_mode(self._args.evaluationOnly)
 
         # Wait for the world to be ready
         if CarlaDataProvider.is_sync_mode():
@@ -356,12 +411,12 @@ class ScenarioRunner(object):
 
         return True
 
-    def _load_and_run_scenario(self, config):
+    def _load_and_run_scenario(self, config, reload_world=True):
         """
         Load and run the scenario given by config
         """
         result = False
-        if not self._load_and_wait_for_world(config.town, config.ego_vehicles):
+        if not self._load_and_wait_for_world(config.town, config.ego_vehicles, reload_world):
             self._cleanup()
             return False
 
@@ -387,16 +442,19 @@ class ScenarioRunner(object):
         try:
             self._prepare_ego_vehicles(config.ego_vehicles)
             if self._args.openscenario:
+                from srunner.scenarios.open_scenario import OpenScenario
                 scenario = OpenScenario(world=self.world,
                                         ego_vehicles=self.ego_vehicles,
                                         config=config,
                                         config_file=self._args.openscenario,
                                         timeout=100000)
             elif self._args.route:
+                from srunner.scenarios.route_scenario import RouteScenario
                 scenario = RouteScenario(world=self.world,
                                          config=config,
                                          debug_mode=self._args.debug)
             elif self._args.openscenario2:
+                from srunner.scenarios.osc2_scenario import OSC2Scenario
                 scenario = OSC2Scenario(world=self.world,
                                         ego_vehicles=self.ego_vehicles,
                                         config=config,
@@ -422,8 +480,14 @@ class ScenarioRunner(object):
                     os.getenv('SCENARIO_RUNNER_ROOT', "./"), self._args.record, config.name)
                 self.client.start_recorder(recorder_name, True)
 
+            result_stream = None
+            if self._args.resultStream:
+                stream_name = config.name + str(datetime.now().strftime('%Y-%m-%d-%H-%M-%S')) + ".ndjson"
+                result_stream = ResultStream(os.path.join(self._args.outputDir, stream_name),
+                                             self._args.resultStreamSampling)
+
             # Load scenario and run it
-            self.manager.load_scenario(scenario, self.agent_instance)
+            self.manager.load_scenario(scenario, self.agent_instance, result_stream)
             self.manager.run_scenario()
 
             # Provide outputs if required
@@ -474,6 +538,8 @@ class ScenarioRunner(object):
         """
         result = False
 
+        from srunner.tools.route_parser import RouteParser
+
         # retrieve routes
         route_configurations = RouteParser.parse_routes_file(self._args.route, self._args.route_id)
 
@@ -500,6 +566,7 @@ class ScenarioRunner(object):
             for entry in self._args.openscenarioparams.split(','):
                 [key, val] = [m.strip() for m in entry.split(':')]
                 openscenario_params[key] = val
+        from srunner.scenarioconfigs.openscenario_configuration import OpenScenarioConfiguration
         config = OpenScenarioConfiguration(self._args.openscenario, self.client, openscenario_params)
 
         result = self._load_and_run_scenario(config)
@@ -517,10 +584,31 @@ class ScenarioRunner(object):
             self._cleanup()
             return False
 
-        config = OSC2ScenarioConfiguration(self._args.openscenario2, self.client)
+        from srunner.scenarioconfigs.osc2_scenario_configuration import OSC2ScenarioConfiguration
 
-        result = self._load_and_run_scenario(config)
-        self._cleanup()
+        variants = self._args.osc2_variants
+        if self._args.osc2_variant is not None:
+            indexes = [self._args.osc2_variant]
+        else:
+            indexes = range(variants)
+
+        # All variants share the seed, so that the whole sweep can be replayed
+        seed = self._args.osc2_seed
+        result = True
+        for i, variant in enumerate(indexes):
+            self.finished = False
+            sampler = RangeSampler(seed, self._args.osc2_sampling, variant, variants)
+            seed = sampler.seed
+            set_sampler(sampler)
+            print("Running OSC-2 variant {} of {} (seed {})".format(variant, variants, seed))
+
+            config = OSC2ScenarioConfiguration(self._args.openscenario2, self.client)
+            if variants > 1:
+                config.name = "{}_variant{}".format(config.name, variant)
+
+            # The world is only loaded for the first variant, the following ones reuse it
+            result = self._load_and_run_scenario(config, reload_world=i == 0) and result
+            self._cleanup()
 
         return result
 
@@ -565,15 +653,34 @@ def main():
                         help='Seed used by the TrafficManager (default: 0)')
     parser.add_argument('--sync', action='store_true',
                         help='Forces the simulation to run synchronously')
+    parser.add_argument('--frameRate', default=20.0, type=float,
+                        help='Frame rate of the synchronous simulation, in Hz (default: 20)')
+    parser.add_argument('--substeps', default=1, type=int,
+                        help='Number of simulation frames per scenario tick in synchronous mode (default: 1)')
+    parser.add_argument('--pipelineTicks', action='store_true',
+                        help='Simulate the next frame while the scenario is ticked (synchronous mode only). '
+                        'Scenario commands are applied one frame later')
     parser.add_argument('--list', action="store_true", help='List all supported scenarios and exit')
 
     parser.add_argument(
         '--scenario', help='Name of the scenario to be executed. Use the preposition \'group:\' to run all scenarios of one class, e.g. ControlLoss or FollowLeadingVehicle')
     parser.add_argument('--openscenario', help='Provide an OpenSCENARIO definition')
     parser.add_argument('--openscenarioparams', help='Overwrited for OpenSCENARIO ParameterDeclaration')
+    parser.add_argument('--openscenarioSchemaCache', default='',
+                        help='File where the compiled OpenSCENARIO XSD schema is cached between runs')
     parser.add_argument('--openscenario2', help='Provide an openscenario2 definition')
+    parser.add_argument('--osc2-seed', type=int, default=None,
+                        help='Seed of the values sampled from the openscenario2 ranges (default: random)')
+    parser.add_argument('--osc2-sampling', default='uniform', choices=sorted(SAMPLING_STRATEGIES),
+                        help='Strategy used to sample the openscenario2 ranges (default: uniform)')
+    parser.add_argument('--osc2-variants', type=int, default=1,
+                        help='Number of openscenario2 variants sampled and run in the same world (default: 1)')
+    parser.add_argument('--osc2-variant', type=int, default=None,
+                        help='Only run this variant index out of the --osc2-variants ones, to replay it')
     parser.add_argument('--route', help='Run a route as a scenario', type=str)
     parser.add_argument('--route-id', help='Run a specific route inside that \'route\' file', default='', type=str)
+    parser.add_argument('--routeCacheDir', default='',
+                        help='Folder where the route file indexes, interpolated routes and their junctions are cached')
     parser.add_argument(
         '--agent', help="Agent used to execute the route. Not compatible with non-route-based scenarios.")
     parser.add_argument('--agentConfig', type=str, help="Path to Agent's configuration file", default="")
@@ -583,6 +690,12 @@ def main():
     parser.add_argument('--junit', action="store_true", help='Write results into a junit file')
     parser.add_argument('--json', action="store_true", help='Write results into a JSON file')
     parser.add_argument('--outputDir', default='', help='Directory for output files (default: this directory)')
+    parser.add_argument('--resultStream', action="store_true",
+                        help='Stream the criteria results into a NDJSON file while the scenario runs')
+    parser.add_argument('--resultStreamSampling', default=0, type=int,
+                        help='Ticks between samples of the criteria values in the result stream (default: 0, disabled)')
+    parser.add_argument('--resultDatabase', default='',
+                        help='SQLite file where the results of all runs are stored, see srunner/scenariomanager/result_database.py')
 
     parser.add_argument('--configFile', default='', help='Provide an additional scenario configuration file (*.xml)')
     parser.add_argument('--additionalScenario', default='', help='Provide additional scenario implementations (*.py)')
@@ -595,11 +708,25 @@ def main():
     parser.add_argument('--randomize', action="store_true", help='Scenario parameters are randomized')
     parser.add_argument('--repetitions', default=1, type=int, help='Number of scenario executions')
     parser.add_argument('--waitForEgo', action="store_true", help='Connect the scenario to an existing ego vehicle')
+    parser.add_argument('--evaluationOnly', action="store_true",
+                        help='Only evaluate the criteria: disables rendering, the scenario video and the collision sensors')
 
     arguments = parser.parse_args()
     # pylint: enable=line-too-long
 
-    OSC2Helper.wait_for_ego = arguments.waitForEgo
+    if arguments.openscenario2:
+        from srunner.tools.osc2_helper import OSC2Helper
+        OSC2Helper.wait_for_ego = arguments.waitForEgo
+    if arguments.openscenarioSchemaCache:
+        from srunner.scenarioconfigs.openscenario_configuration import OpenScenarioConfiguration
+        OpenScenarioConfiguration.schema_cache_file = arguments.openscenarioSchemaCache
+    if arguments.routeCacheDir:
+        from srunner.scenarios.background_activity import BackgroundBehavior
+        BackgroundBehavior.route_cache_dir = arguments.routeCacheDir
+        from srunner.tools.route_parser import RouteParser
+        RouteParser.index_cache_dir = arguments.routeCacheDir
+        from srunner.tools import route_manipulation
+        route_manipulation.trajectory_cache_dir = arguments.routeCacheDir
 
     if arguments.list:
         print("Currently the following scenarios are supported:")
@@ -0,0 +1,172 @@
+"""
+Incremental parsing of OSC-2 files.
+
+The preprocessed file is split into its top-level declarations (scenario, actor, struct,
+enum, extend, global, ...), which are parsed on their own and cached by the hash of their
+text. When a file is edited, only the declarations that changed are lexed and parsed again,
+and the parse trees of all the declarations are joined under a single osc_file node, ready
+to be walked by the ASTBuilder.
+"""
+
+from collections import OrderedDict
+import hashlib
+import re
+
+from antlr4 import CommonTokenStream, InputStream, Token
+from antlr4.error.ErrorListener import ErrorListener
+
+from srunner.osc2.osc2_parser.OpenSCENARIO2Lexer import OpenSCENARIO2Lexer as OSC2Lexer
+from srunner.osc2.osc2_parser.OpenSCENARIO2Parser import OpenSCENARIO2Parser as OSC2Parser
+
+# Lines starting a new top-level declaration: not indented, empty nor a comment
+DECLARATION_START = re.compile(r"[^\s#]")
+# String literals and comments, ignored when counting the open brackets of a line
+IGNORED_TEXT = re.compile(r"\"[^\"\n]*\"|'[^'\n]*'|#.*")
+
+
+class _ErrorCounter(ErrorListener):
+
+    def __init__(self):
+        super(_ErrorCounter, self).__init__()
+        self.errors = 0
+
+    def syntaxError(self, recognizer, offendingSymbol, line, column, msg, e):
+        self.errors += 1
+
+
+class _Declaration(object):
+
+    """
+    Parse tree of a top-level declaration, with the tokens it was built from
+    """
+
+    def __init__(self, parse_tree, tokens):
+        # Empty statements (blank lines) and the EOF are left out
+        self.children = [child for child in parse_tree.getChildren() if child.getText().strip()
+                         and getattr(child, "symbol", None) is None]
+        self.tokens = tokens
+        self.first_line = 1
+
+        # NEWLINEs closing the declaration. In a full parse, they are at the start of the next one
+        code_tokens = [i for i, token in enumerate(tokens) if token.type not in (
+            OSC2Parser.NEWLINE, OSC2Parser.INDENT, OSC2Parser.DEDENT, Token.EOF)]
+        last_code_token = code_tokens[-1] if code_tokens else -1
+        self.end_newlines = [(token, token.line, token.column) for token in tokens[last_code_token + 1:]
+                             if token.type == OSC2Parser.NEWLINE]
+
+    def move_to(self, first_line, next_line):
+        """
+        Shifts the line of all the tokens so that the declaration starts at first_line,
+        and moves its closing NEWLINEs to the start of the next declaration, at next_line
+        (or leaves them at the end of the declaration if it is the last one of the file)
+        """
+        offset = first_line - self.first_line
+        if offset:
+            for token in self.tokens:
+                token.line += offset
+            self.first_line = first_line
+        for token, line, column in self.end_newlines:
+            if next_line is None:
+                token.line, token.column = line + first_line - 1, column
+            else:
+                token.line, token.column = next_line, 0
+
+
+class IncrementalParser(object):
+
+    """
+    Parses OSC-2 files reusing the parse trees of their unchanged top-level declarations
+    """
+
+    CACHE_SIZE = 4096  # Amount of declarations kept
+
+    def __init__(self):
+        self._declarations = OrderedDict()
+        self.parsed = 0
+        self.reused = 0
+
+    @staticmethod
+    def split(text):
+        """
+        Returns the (first line, text) of the top-level declarations of the text.
+        Comments and empty lines are kept with the previous declaration, as well as the
+        lines inside brackets, even if they aren't indented
+        """
+        chunks = []
+        lines = text.splitlines(True)
+        start = 0
+        opened = 0
+        for i, line in enumerate(lines):
+            if i > start and opened <= 0 and DECLARATION_START.match(line):
+                chunks.append((start + 1, "".join(lines[start:i])))
+                start = i
+            code = IGNORED_TEXT.sub("", line)
+            opened += sum(code.count(c) for c in "([{") - sum(code.count(c) for c in ")]}")
+        if start < len(lines):
+            chunks.append((start + 1, "".join(lines[start:])))
+        return chunks
+
+    @staticmethod
+    def _parse_declaration(text):
+        """Parses the text of a declaration, returning None if it has syntax errors"""
+        error_counter = _ErrorCounter()
+        lexer = OSC2Lexer(InputStream(text))
+        lexer.removeErrorListeners()
+        lexer.addErrorListener(error_counter)
+        tokens = CommonTokenStream(lexer)
+        parser = OSC2Parser(tokens)
+        parser.removeErrorListeners()
+        parser.addErrorListener(error_counter)
+        parse_tree = parser.osc_file()
+        if error_counter.errors:
+            return None
+        tokens.fill()
+        return _Declaration(parse_tree, tokens.tokens)
+
+    def parse(self, text):
+        """
+        Returns the osc_file parse tree of the text, or None if it is empty or any of its
+        declarations has syntax errors (which are only reported with the right context by a full parse)
+        """
+        children = []
+        used_keys = set()
+        chunks = self.split(text)
+        for i, (first_line, chunk) in enumerate(chunks):
+            if not chunk.endswith("\n"):
+                chunk += "\n"
+            key = hashlib.sha1(chunk.encode("utf-8")).hexdigest()
+            # A declaration repeated in the same file needs its own parse tree
+            declaration = self._declarations.get(key) if key not in used_keys else None
+            if declaration is None:
+                declaration = self._parse_declaration(chunk)
+                if declaration is None:
+                    return None
+                if key not in used_keys:
+                    self._declarations[key] = declaration
+                self.parsed += 1
+            else:
+                self._declarations.move_to_end(key)
+                self.reused += 1
+
+            used_keys.add(key)
+            declaration.move_to(first_line, chunks[i + 1][0] if i + 1 < len(chunks) else None)
+            children.extend(declaration.children)
+
+        while len(self._declarations) > self.CACHE_SIZE:
+            self._declarations.popitem(last=False)
+
+        if not children:
+            return None
+
+        parse_tree = OSC2Parser.Osc_fileContext(None)
+        for child in children:
+            child.parentCtx = parse_tree
+            parse_tree.addChild(child)
+        parse_tree.start = children[0].start
+        parse_tree.stop = children[-1].stop
+        return parse_tree
+
+    def parse_file(self, filename):
+        """Returns the osc_file parse tree of the file, see parse()"""
+        with open(filename, "r", encoding="utf-8") as fd:
+            return self.parse(fd.read())
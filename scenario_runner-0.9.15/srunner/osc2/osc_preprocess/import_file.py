@@ -5,6 +5,8 @@ __file: The file itself
 """
 import queue
 
+from srunner.osc2.utils import log_manager
+
 
 class ImportFile:
     def __init__(self, base_path):
@@ -84,6 +86,11 @@ class ImportFile:
             return content, lines
         else:
             index = len(pre_line)
+            if log_manager.DIAGNOSTICS is not None:
+                log_manager.add_diagnostic(
+                    "error", "mismatched input '<EOF>'", line=lines, column=index, file_path=self.get_path()
+                )
+                return content, lines
             print(
                 "[Error] file '"
                 + self.get_path()
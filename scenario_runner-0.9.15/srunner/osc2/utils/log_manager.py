@@ -15,6 +15,9 @@ LOG_LEVEL = logging.ERROR  # The lowest level of output logs
 LOG_FORMAT = "%(message)s "  # Output log format
 DATE_FORMAT = "%Y-%m-%d  %H:%M:%S %a "  # Format of the output time
 
+# If set to a list, errors and warnings are added to it as dictionaries instead of being logged
+DIAGNOSTICS = None
+
 logging.basicConfig(
     level=LOG_LEVEL,
     format=LOG_FORMAT,
@@ -22,6 +25,27 @@ logging.basicConfig(
 )
 
 
+def add_diagnostic(severity, msg, token=None, line=None, column=None, file_path=None):
+    # The line of the diagnostics without file_path is the one of the preprocessed file
+    if token is not None:
+        line, column = token.line, token.column
+    if line is None or column is None:
+        line, column = None, None
+    elif file_path is None:
+        location = import_msg.get_msg(line)
+        if location is not None:
+            file_path, line = location
+    DIAGNOSTICS.append(
+        {
+            "severity": severity,
+            "message": msg,
+            "file": file_path,
+            "line": line,
+            "column": column,
+        }
+    )
+
+
 def LOG_DEBUG(msg, token=None, line=None, column=None):
     if token is not None:
         file_path, line = import_msg.get_msg(token.line)
@@ -79,6 +103,10 @@ def LOG_INFO(msg, token=None, line=None, column=None):
 
 
 def LOG_WARNING(msg, token=None, line=None, column=None):
+    if DIAGNOSTICS is not None:
+        add_diagnostic("warning", msg, token, line, column)
+        return
+
     # Log information required when running run_symbol_testcases.py
     run_log_msg = ""
     if token is not None:
@@ -122,6 +150,10 @@ def LOG_ERROR(msg, token=None, line=None, column=None):
     global ERROR_COUNT
     global ERROR_MAX_COUNT
 
+    if DIAGNOSTICS is not None:
+        add_diagnostic("error", msg, token, line, column)
+        return
+
     # Log information required when running run_symbol_testcases.py
     run_log_msg = ""
     if token is not None:
@@ -172,6 +204,10 @@ def LOG_CRITICAL(msg, token=None, line=None, column=None):
     global ERROR_COUNT
     global ERROR_MAX_COUNT
 
+    if DIAGNOSTICS is not None:
+        add_diagnostic("error", msg, token, line, column)
+        return
+
     if token is not None:
         file_path, line = import_msg.get_msg(token.line)
         msg = (
@@ -1,10 +1,10 @@
 import math
-import random
 import re
 import sys
 from typing import List
 
 from srunner.osc2_dm.physical_object import *
+from srunner.osc2_dm.sampler import get_sampler
 
 
 class Range(object):
@@ -39,7 +39,7 @@ class Range(object):
             return False
 
     def gen_single_value(self):
-        return random.uniform(self.start, self.end)
+        return get_sampler().uniform(self.start, self.end)
 
 
 class Physical(object):
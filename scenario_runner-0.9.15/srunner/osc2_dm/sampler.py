@@ -0,0 +1,145 @@
+"""
+Seeded sampling of the OSC-2 ranges.
+
+All the values drawn from the ranges of a scenario ([4..6]kph, one_of, ...) go through
+the active RangeSampler. Each draw is a new dimension of the sample, numbered in the
+order in which the scenario is built, so the same seed, strategy and variant always
+produce the same concrete scenario.
+"""
+
+import random
+
+import numpy as np
+
+
+def _uniform(sampler, dimension):  # pylint: disable=unused-argument
+    return sampler.rng.random_sample()
+
+
+def _latin_hypercube(sampler, dimension):
+    # Each variant falls in a different stratum of the dimension
+    permutation = np.random.RandomState([sampler.seed, dimension, 1]).permutation(sampler.variants)
+    return float(permutation[sampler.variant] + sampler.rng.random_sample()) / sampler.variants
+
+
+def _get_prime(index):
+    primes = [2]
+    candidate = 3
+    while len(primes) <= index:
+        if all(candidate % prime for prime in primes if prime * prime <= candidate):
+            primes.append(candidate)
+        candidate += 2
+    return primes[index]
+
+
+def _halton(sampler, dimension):
+    base = _get_prime(dimension)
+    index = sampler.variant + 1
+    value, fraction = 0.0, 1.0
+    while index > 0:
+        fraction /= base
+        value += fraction * (index % base)
+        index //= base
+    # Random shift of the whole sequence, so that the seed changes the sampled points
+    shift = np.random.RandomState([sampler.seed, dimension, 2]).random_sample()
+    return (value + shift) % 1.0
+
+
+def _grid(sampler, dimension):
+    levels = sampler.grid_levels
+    level = (sampler.variant // levels ** dimension) % levels
+    return level / (levels - 1.0) if levels > 1 else 0.5
+
+
+# Functions returning the value in [0, 1] of a dimension of the current variant.
+# New strategies can be registered by adding them to this dictionary
+SAMPLING_STRATEGIES = {
+    "uniform": _uniform,
+    "lhs": _latin_hypercube,
+    "halton": _halton,
+    "grid": _grid,
+}
+
+
+class RangeSampler(object):
+    """
+    Draws the values of the OSC-2 ranges of one scenario variant.
+
+    Args:
+        seed (int): seed of the variants. If None, a random one is chosen
+        strategy (str): name of the SAMPLING_STRATEGIES used
+        variant (int): index of the variant being sampled
+        variants (int): total amount of variants
+        grid_levels (int): values per range of the 'grid' strategy
+    """
+
+    def __init__(self, seed=None, strategy="uniform", variant=0, variants=1, grid_levels=3):
+        if strategy not in SAMPLING_STRATEGIES:
+            raise ValueError(
+                "Unknown sampling strategy '{}', use one of {}".format(strategy, sorted(SAMPLING_STRATEGIES)))
+
+        self.seed = random.randrange(2 ** 31) if seed is None else int(seed)
+        self.strategy = strategy
+        self.variant = variant
+        self.variants = max(1, variants, variant + 1)
+        self.grid_levels = grid_levels
+        self.rng = np.random.RandomState([self.seed, self.variant])
+        self.samples = []
+
+    def _sample(self):
+        return SAMPLING_STRATEGIES[self.strategy](self, len(self.samples))
+
+    def uniform(self, start, end):
+        """
+        Returns a value between start and end
+        """
+        value = start + (end - start) * self._sample()
+        self.samples.append({"range": [start, end], "value": value})
+        return value
+
+    def randint(self, start, end):
+        """
+        Returns an integer between start and end, both included
+        """
+        count = end - start + 1
+        value = start + min(int(self._sample() * count), count - 1)
+        self.samples.append({"range": [start, end], "value": value})
+        return value
+
+    def choice(self, sequence):
+        """
+        Returns one of the elements of the sequence
+        """
+        index = min(int(self._sample() * len(sequence)), len(sequence) - 1)
+        self.samples.append({"choices": len(sequence), "value": index})
+        return sequence[index]
+
+    def to_dict(self):
+        """
+        Returns the seed and sampled values, needed to replay the variant
+        """
+        return {
+            "seed": self.seed,
+            "strategy": self.strategy,
+            "variant": self.variant,
+            "variants": self.variants,
+            "values": self.samples,
+        }
+
+
+_active_sampler = RangeSampler()
+
+
+def get_sampler():
+    """
+    Returns the sampler used by the scenario being built
+    """
+    return _active_sampler
+
+
+def set_sampler(sampler):
+    """
+    Sets the sampler used by the next scenarios
+    """
+    global _active_sampler  # pylint: disable=global-statement
+    _active_sampler = sampler
@@ -9,10 +9,10 @@ Modifier module for OSC 2.0
 Provides modifiers for vehicle and pedestrian actions
 """
 
-import random
 import sys
 
 from srunner.osc2_dm.physical_types import Physical
+from srunner.osc2_dm.sampler import get_sampler
 from srunner.osc2_stdlib.misc_object import AVCarSide, ScenarioEvent
 from srunner.osc2_stdlib.vehicle import Vehicle
 
@@ -148,7 +148,7 @@ class ChangeLaneModifier(Modifier):
                 values = self.args["lane_changes"][1:-1].split("..")
                 start = int(float(values[0]))
                 end = int(float(values[1]))
-                value = random.randint(start, end)
+                value = get_sampler().randint(start, end)
                 return value
 
     def get_side(self):
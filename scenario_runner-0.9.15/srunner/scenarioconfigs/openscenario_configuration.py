@@ -11,6 +11,7 @@ This module provides the key configuration parameters for a scenario based on Op
 
 import logging
 import os
+import pickle
 import time
 import xml.etree.ElementTree as ET
 
@@ -32,6 +33,15 @@ class OpenScenarioConfiguration(ScenarioConfiguration):
     - Only one Story + Init is supported per Storyboard
     """
 
+    xsd_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../openscenario/OpenSCENARIO.xsd")
+
+    # If set, the compiled XSD schema is pickled to (and loaded from) this file
+    schema_cache_file = None
+
+    # Caches shared by all the configurations of the process
+    _schema = None
+    _catalog_cache = {}  # (catalog path, modification time) -> (catalog name, {entry name: entry})
+
     def __init__(self, filename, client, custom_params):
 
         super(OpenScenarioConfiguration, self).__init__()
@@ -62,15 +72,47 @@ class OpenScenarioConfiguration(ScenarioConfiguration):
         self._set_parameters()
         self._parse_openscenario_configuration()
 
+    @classmethod
+    def get_schema(cls):
+        """
+        Return the compiled OpenSCENARIO 1.0 XSD, building it only once per process.
+
+        If schema_cache_file is set, the compiled schema is loaded from it instead, as long as
+        it was stored from the same XSD file and xmlschema version.
+        """
+        if cls._schema is not None:
+            return cls._schema
+
+        cache_key = (xmlschema.__version__, os.path.getmtime(cls.xsd_file))
+        if cls.schema_cache_file and os.path.isfile(cls.schema_cache_file):
+            try:
+                with open(cls.schema_cache_file, 'rb') as cache_file:
+                    key, schema = pickle.load(cache_file)
+                if key == cache_key:
+                    cls._schema = schema
+                    return cls._schema
+            except (IOError, OSError, EOFError, pickle.UnpicklingError, AttributeError, ValueError):
+                pass
+
+        cls._schema = xmlschema.XMLSchema(cls.xsd_file)
+
+        if cls.schema_cache_file:
+            try:
+                with open(cls.schema_cache_file, 'wb') as cache_file:
+                    pickle.dump((cache_key, cls._schema), cache_file, pickle.HIGHEST_PROTOCOL)
+            except (IOError, OSError, pickle.PicklingError) as e:
+                logging.getLogger("[SR:OpenScenarioConfiguration]").warning(
+                    " Could not store the OpenSCENARIO schema at %s: %s", cls.schema_cache_file, e)
+
+        return cls._schema
+
     def _validate_openscenario_configuration(self):
         """
         Validate the given OpenSCENARIO config against the 1.0 XSD
 
         Note: This will throw if the config is not valid. But this is fine here.
         """
-        xsd_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../openscenario/OpenSCENARIO.xsd")
-        xsd = xmlschema.XMLSchema(xsd_file)
-        xsd.validate(self.xml_tree)
+        self.get_schema().validate(self.xml_tree)
 
     def _validate_openscenario_catalog_configuration(self, catalog_xml_tree):
         """
@@ -78,9 +120,7 @@ class OpenScenarioConfiguration(ScenarioConfiguration):
 
         Note: This will throw if the catalog config is not valid. But this is fine here.
         """
-        xsd_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../openscenario/OpenSCENARIO.xsd")
-        xsd = xmlschema.XMLSchema(xsd_file)
-        xsd.validate(catalog_xml_tree)
+        self.get_schema().validate(catalog_xml_tree)
 
     def _parse_openscenario_configuration(self):
         """
@@ -135,13 +175,27 @@ class OpenScenarioConfiguration(ScenarioConfiguration):
             if not os.path.isfile(catalog_path):
                 self.logger.warning(" The %s path for the %s Catalog is invalid", catalog_path, catalog_type)
             else:
-                xml_tree = ET.parse(catalog_path)
-                self._validate_openscenario_catalog_configuration(xml_tree)
-                catalog = xml_tree.find("Catalog")
-                catalog_name = catalog.attrib.get("name")
-                self.catalogs[catalog_name] = {}
-                for entry in catalog:
-                    self.catalogs[catalog_name][entry.attrib.get("name")] = entry
+                catalog_name, entries = self._parse_catalog(catalog_path)
+                self.catalogs[catalog_name] = dict(entries)
+
+    def _parse_catalog(self, catalog_path):
+        """
+        Parse and validate a catalog file, reusing the previous result if it hasn't changed.
+
+        The cached entries are shared between configurations, so they must not be modified
+        (the instances returned by get_catalog_entry share their elements without parameters).
+        """
+        cache_key = (os.path.abspath(catalog_path), os.path.getmtime(catalog_path))
+        if cache_key not in OpenScenarioConfiguration._catalog_cache:
+            xml_tree = ET.parse(catalog_path)
+            self._validate_openscenario_catalog_configuration(xml_tree)
+            catalog = xml_tree.find("Catalog")
+            entries = {}
+            for entry in catalog:
+                entries[entry.attrib.get("name")] = entry
+            OpenScenarioConfiguration._catalog_cache[cache_key] = (catalog.attrib.get("name"), entries)
+
+        return OpenScenarioConfiguration._catalog_cache[cache_key]
 
     def _set_scenario_name(self):
         """
@@ -17,6 +17,7 @@ from srunner.osc2.ast_manager import ast_node
 from srunner.osc2.ast_manager.ast_vistor import ASTVisitor
 from srunner.osc2_dm.physical_object import PhysicalObject, UnitObject
 from srunner.osc2_dm.physical_types import Physical, Range
+from srunner.osc2_dm.sampler import get_sampler
 
 # 标准库
 from srunner.osc2_stdlib.path import Path
@@ -74,6 +75,8 @@ class OSC2ScenarioConfiguration(ScenarioConfiguration):
         self.variables: dict = {}
         self.unit_dict: dict = {}
         self.physical_dict: dict = {}
+        # 当前变体的采样器（seed 与采样值记录在结果中）
+        self.sampler = get_sampler()
 
         # 保存 AST 中声明的 struct / scenario
         self.scenario_declaration: dict = {}
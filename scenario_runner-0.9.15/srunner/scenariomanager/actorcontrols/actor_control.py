@@ -173,8 +173,16 @@ class ActorControl(object):
         """
         self.control_instance.set_init_speed()
 
-    def run_step(self):
+    def run_step(self, batch=None):
         """
         Execute on tick of the controller's control loop
-        """
-        self.control_instance.run_step()
+
+        Args:
+            batch (list of carla.command): If given, controllers supporting it append their
+                commands to this list, instead of applying them directly.
+        """
+        self.control_instance.set_command_batch(batch)
+        try:
+            self.control_instance.run_step()
+        finally:
+            self.control_instance.set_command_batch(None)
@@ -37,6 +37,9 @@ class BasicControl(object):
             Defaults to False.
         _reached_goal (boolean):
             Defaults to False.
+        _command_batch (list of carla.command): If set, the controller can append its commands
+            to this list instead of applying them directly to the actor.
+            Defaults to None.
     """
 
     _actor = None
@@ -47,6 +50,7 @@ class BasicControl(object):
     _target_speed = 0
     _reached_goal = False
     _init_speed = False
+    _command_batch = None
 
     def __init__(self, actor):
         """
@@ -84,6 +88,16 @@ class BasicControl(object):
         self._offset = offset
         self._offset_updated = True
 
+    def set_command_batch(self, batch):
+        """
+        Set the list of commands the controller can append its commands to,
+        so that the commands of all controllers are applied together.
+
+        Args:
+            batch (list of carla.command): List of commands, or None to apply them directly.
+        """
+        self._command_batch = batch
+
     def set_init_speed(self):
         """
         Set _init_speed to True
@@ -9,6 +9,7 @@
 This module provides an example control for pedestrians
 """
 
+from collections import deque
 import math
 
 import carla
@@ -31,6 +32,15 @@ class PedestrianControl(BasicControl):
 
         super(PedestrianControl, self).__init__(actor)
 
+    def update_waypoints(self, waypoints, start_time=None):
+        """
+        Update the actor's waypoints, stored as a deque so that the reached ones are cheaply removed
+
+        Args:
+            waypoints (List of carla.Transform): List of new waypoints.
+        """
+        super(PedestrianControl, self).update_waypoints(deque(waypoints or []), start_time)
+
     def reset(self):
         """
         Reset the controller
@@ -69,7 +79,7 @@ class PedestrianControl(BasicControl):
             control.direction = direction / direction_norm
             self._actor.apply_control(control)
             if direction_norm < 1.0:
-                self._waypoints = self._waypoints[1:]
+                self._waypoints.popleft()
                 if not self._waypoints:
                     self._reached_goal = True
         else:
@@ -14,6 +14,7 @@ Limitations:
 - Can only consider obstacles in forward facing reaching (i.e. in tight corners obstacles may be ignored).
 """
 
+from collections import deque
 from distutils.util import strtobool
 import math
 
@@ -63,9 +64,12 @@ class SimpleVehicleControl(BasicControl):
 
     Attributes:
 
-        _generated_waypoint_list (list of carla.Transform): List of target waypoints the actor
+        _generated_waypoint_list (deque of carla.Transform): List of target waypoints the actor
             should travel along. A waypoint here is of type carla.Transform!
-            Defaults to [].
+            Defaults to an empty deque.
+        _generated_last_waypoint (carla.Waypoint): Map waypoint of the last generated waypoint,
+            used to extend the list of generated waypoints.
+            Defaults to None.
         _last_update (float): Last time step the update function (tick()) was called.
             Defaults to None.
         _consider_obstacles (boolean): Enable/Disable consideration of obstacles
@@ -86,9 +90,13 @@ class SimpleVehicleControl(BasicControl):
             Defaults to None.
     """
 
+    MAX_GENERATED_WAYPOINTS = 50  # Amount of waypoints generated ahead when no waypoints are provided
+    MIN_GENERATED_WAYPOINTS = 25  # Amount of waypoints left ahead before generating new ones
+
     def __init__(self, actor, args=None):
         super(SimpleVehicleControl, self).__init__(actor)
-        self._generated_waypoint_list = []
+        self._generated_waypoint_list = deque()
+        self._generated_last_waypoint = None
         self._last_update = None
         self._consider_traffic_lights = False
         self._consider_obstacles = False
@@ -145,6 +153,15 @@ class SimpleVehicleControl(BasicControl):
         self._obstacle_distance = event.distance
         self._obstacle_actor = event.other_actor
 
+    def update_waypoints(self, waypoints, start_time=None):
+        """
+        Update the actor's waypoints, stored as a deque so that the reached ones are cheaply removed
+
+        Args:
+            waypoints (List of carla.Transform): List of new waypoints.
+        """
+        super(SimpleVehicleControl, self).update_waypoints(deque(waypoints or []), start_time)
+
     def reset(self):
         """
         Reset the controller
@@ -175,46 +192,50 @@ class SimpleVehicleControl(BasicControl):
         if self._reached_goal:
             # Reached the goal, so stop
             velocity = carla.Vector3D(0, 0, 0)
-            self._actor.set_target_velocity(velocity)
+            self._apply_target_velocities(velocity)
             return
 
         if self._visualizer:
             self._visualizer.render()
 
         self._reached_goal = False
+        location = CarlaDataProvider.get_location(self._actor)
 
         if not self._waypoints:
             # No waypoints are provided, so we have to create a list of waypoints internally
             # get next waypoints from map, to avoid leaving the road
             self._reached_goal = False
 
-            map_wp = None
-            if not self._generated_waypoint_list:
-                map_wp = CarlaDataProvider.get_map().get_waypoint(CarlaDataProvider.get_location(self._actor))
-            else:
-                map_wp = CarlaDataProvider.get_map().get_waypoint(self._generated_waypoint_list[-1].location)
-            while len(self._generated_waypoint_list) < 50:
-                map_wps = map_wp.next(2.0)
-                if map_wps:
-                    self._generated_waypoint_list.append(map_wps[0].transform)
-                    map_wp = map_wps[0]
+            # The waypoints are generated in bulk, once the ones left ahead go below a minimum
+            if len(self._generated_waypoint_list) < self.MIN_GENERATED_WAYPOINTS:
+                if not self._generated_waypoint_list:
+                    map_wp = CarlaDataProvider.get_map().get_waypoint(location)
                 else:
-                    break
+                    map_wp = self._generated_last_waypoint
+                while len(self._generated_waypoint_list) < self.MAX_GENERATED_WAYPOINTS:
+                    map_wps = map_wp.next(2.0)
+                    if map_wps:
+                        self._generated_waypoint_list.append(map_wps[0].transform)
+                        map_wp = map_wps[0]
+                    else:
+                        break
+                self._generated_last_waypoint = map_wp
 
             # Remove all waypoints that are too close to the vehicle
             while (self._generated_waypoint_list and
-                   self._generated_waypoint_list[0].location.distance(self._actor.get_location()) < 0.5):
-                self._generated_waypoint_list = self._generated_waypoint_list[1:]
+                   self._generated_waypoint_list[0].location.distance(location) < 0.5):
+                self._generated_waypoint_list.popleft()
 
-            direction_norm = self._set_new_velocity(self._offset_waypoint(self._generated_waypoint_list[0]))
+            next_waypoint = self._generated_waypoint_list[0]
+            direction_norm = self._set_new_velocity(self._offset_waypoint(next_waypoint), next_waypoint.rotation.yaw)
             if direction_norm < 2.0:
-                self._generated_waypoint_list = self._generated_waypoint_list[1:]
+                self._generated_waypoint_list.popleft()
         else:
             # When changing from "free" driving without pre-defined waypoints to a defined route with waypoints
             # it may happen that the first few waypoints are too close to the ego vehicle for obtaining a
             # reasonable control command. Therefore, we drop these waypoints first.
-            while self._waypoints and self._waypoints[0].location.distance(self._actor.get_location()) < 0.5:
-                self._waypoints = self._waypoints[1:]
+            while self._waypoints and self._waypoints[0].location.distance(location) < 0.5:
+                self._waypoints.popleft()
 
             self._reached_goal = False
             if not self._waypoints:
@@ -222,7 +243,7 @@ class SimpleVehicleControl(BasicControl):
             else:
                 direction_norm = self._set_new_velocity(self._offset_waypoint(self._waypoints[0]))
                 if direction_norm < self._waypoint_reached_threshold:
-                    self._waypoints = self._waypoints[1:]
+                    self._waypoints.popleft()
                     if not self._waypoints:
                         self._reached_goal = True
 
@@ -246,7 +267,21 @@ class SimpleVehicleControl(BasicControl):
 
         return offset_location
 
-    def _set_new_velocity(self, next_location):
+    def _apply_target_velocities(self, velocity, angular_velocity=None):
+        """
+        Sets the target linear and angular velocities of the actor, either directly
+        or through the command batch, if one has been given
+        """
+        if self._command_batch is not None:
+            self._command_batch.append(carla.command.ApplyTargetVelocity(self._actor, velocity))
+            if angular_velocity is not None:
+                self._command_batch.append(carla.command.ApplyTargetAngularVelocity(self._actor, angular_velocity))
+        else:
+            self._actor.set_target_velocity(velocity)
+            if angular_velocity is not None:
+                self._actor.set_target_angular_velocity(angular_velocity)
+
+    def _set_new_velocity(self, next_location, next_yaw=None):
         """
         Calculate and set the new actor veloctiy given the current actor
         location and the _next_location_
@@ -261,6 +296,7 @@ class SimpleVehicleControl(BasicControl):
 
         Args:
             next_location (carla.Location): Next target location of the actor
+            next_yaw (float): Yaw of the road at the next location. If not given, it is taken from the map
 
         returns:
             direction (carla.Vector3D): Length of direction vector of the actor
@@ -272,7 +308,7 @@ class SimpleVehicleControl(BasicControl):
         if not self._last_update:
             self._last_update = current_time
 
-        current_speed = math.sqrt(self._actor.get_velocity().x**2 + self._actor.get_velocity().y**2)
+        current_speed = CarlaDataProvider.get_velocity(self._actor)
 
         if self._consider_obstacles:
             # If distance is less than the proximity threshold, adapt velocity
@@ -321,8 +357,6 @@ class SimpleVehicleControl(BasicControl):
         velocity.x = direction.x / direction_norm * target_speed
         velocity.y = direction.y / direction_norm * target_speed
 
-        self._actor.set_target_velocity(velocity)
-
         # set new angular velocity
         current_yaw = CarlaDataProvider.get_transform(self._actor).rotation.yaw
         # When we have a waypoint list, use the direction between the waypoints to calculate the heading (change)
@@ -330,8 +364,9 @@ class SimpleVehicleControl(BasicControl):
         if self._waypoints:
             delta_yaw = math.degrees(math.atan2(direction.y, direction.x)) - current_yaw
         else:
-            new_yaw = CarlaDataProvider.get_map().get_waypoint(next_location).transform.rotation.yaw
-            delta_yaw = new_yaw - current_yaw
+            if next_yaw is None:
+                next_yaw = CarlaDataProvider.get_map().get_waypoint(next_location).transform.rotation.yaw
+            delta_yaw = next_yaw - current_yaw
 
         if math.fabs(delta_yaw) > 360:
             delta_yaw = delta_yaw % 360
@@ -346,7 +381,7 @@ class SimpleVehicleControl(BasicControl):
             angular_velocity.z = 0
         else:
             angular_velocity.z = delta_yaw / (direction_norm / target_speed)
-        self._actor.set_target_angular_velocity(angular_velocity)
+        self._apply_target_velocities(velocity, angular_velocity)
 
         self._last_update = current_time
 
@@ -53,7 +53,12 @@ class CarlaDataProvider(object):  # pylint: disable=too-many-public-methods
     _actor_transform_map = {}
     _traffic_light_map = {}
     _carla_actor_pool = {}
+    _actor_pool_by_role_name = {}  # role_name -> {actor id: actor}
+    _actor_pool_by_type = {}  # First part of the type id ('vehicle', 'walker'...) -> {actor id: actor}
+    _actor_pool_by_category = {}  # Category of the actor ('car', 'pedestrian', 'misc'...) -> {actor id: actor}
+    _actor_pool_keys = {}  # actor id -> (role_name, type, category)
     _global_osc_parameters = {}
+    _global_osc_parameters_version = 0
     _client = None
     _world = None
     _map = None
@@ -61,6 +66,7 @@ class CarlaDataProvider(object):  # pylint: disable=too-many-public-methods
     _spawn_points = None
     _spawn_index = 0
     _blueprint_library = None
+    _blueprint_index = {}
     _all_actors = None
     _ego_vehicle_route = None
     _traffic_manager_port = 8000
@@ -69,6 +75,7 @@ class CarlaDataProvider(object):  # pylint: disable=too-many-public-methods
     _local_planner = None
     _grp = None
     _runtime_init_flag = False
+    _evaluation_only_flag = False
     _lock = threading.Lock()
 
     @staticmethod
@@ -109,8 +116,18 @@ class CarlaDataProvider(object):  # pylint: disable=too-many-public-methods
     def update_osc_global_params(parameters):
         """
         updates/initializes global osc parameters.
+        The parameters version is only increased if any of their values actually changes.
         """
-        CarlaDataProvider._global_osc_parameters.update(parameters)
+        global_parameters = CarlaDataProvider._global_osc_parameters
+        for name, value in parameters.items():
+            if name in global_parameters:
+                old_value = global_parameters[name]
+                if old_value is value:
+                    continue
+                if type(old_value) is type(value) and isinstance(value, (str, int, float)) and old_value == value:
+                    continue
+            global_parameters[name] = value
+            CarlaDataProvider._global_osc_parameters_version += 1
 
     @staticmethod
     def get_osc_global_param_value(ref):
@@ -119,6 +136,13 @@ class CarlaDataProvider(object):  # pylint: disable=too-many-public-methods
         """
         return CarlaDataProvider._global_osc_parameters.get(ref.replace("$", ""))
 
+    @staticmethod
+    def get_osc_global_params_version():
+        """
+        returns a counter that increases every time a global osc parameter changes its value.
+        """
+        return CarlaDataProvider._global_osc_parameters_version
+
     @staticmethod
     def register_actors(actors, transforms=None):
         """
@@ -159,6 +183,9 @@ class CarlaDataProvider(object):  # pylint: disable=too-many-public-methods
         """
         returns the absolute velocity for the given actor
         """
+        if actor in CarlaDataProvider._actor_velocity_map:
+            return CarlaDataProvider._actor_velocity_map[actor]
+
         for key in CarlaDataProvider._actor_velocity_map:
             if key.id == actor.id:
                 return CarlaDataProvider._actor_velocity_map[key]
@@ -173,6 +200,9 @@ class CarlaDataProvider(object):  # pylint: disable=too-many-public-methods
         """
         returns the location for the given actor
         """
+        if actor in CarlaDataProvider._actor_location_map:
+            return CarlaDataProvider._actor_location_map[actor]
+
         for key in CarlaDataProvider._actor_location_map:
             if key.id == actor.id:
                 return CarlaDataProvider._actor_location_map[key]
@@ -187,6 +217,9 @@ class CarlaDataProvider(object):  # pylint: disable=too-many-public-methods
         """
         returns the transform for the given actor
         """
+        if CarlaDataProvider._actor_transform_map.get(actor) is not None:
+            return CarlaDataProvider._actor_transform_map[actor]
+
         for key in CarlaDataProvider._actor_transform_map:
             if key.id == actor.id:
                 # The velocity location information is the entire behavior tree updated every tick
@@ -223,6 +256,7 @@ class CarlaDataProvider(object):  # pylint: disable=too-many-public-methods
         CarlaDataProvider._sync_flag = world.get_settings().synchronous_mode
         CarlaDataProvider._map = world.get_map()
         CarlaDataProvider._blueprint_library = world.get_blueprint_library()
+        CarlaDataProvider._blueprint_index = {}
         CarlaDataProvider._grp = GlobalRoutePlanner(CarlaDataProvider._map, 2.0)
         CarlaDataProvider.generate_spawn_points()
         CarlaDataProvider.prepare_map()
@@ -298,6 +332,21 @@ class CarlaDataProvider(object):  # pylint: disable=too-many-public-methods
         """
         return CarlaDataProvider._runtime_init_flag
 
+    @staticmethod
+    def set_evaluation_only_mode(flag):
+        """
+        Set the evaluation only mode, in which the scenario runs without rendering
+        and the criteria avoid using sensors
+        """
+        CarlaDataProvider._evaluation_only_flag = flag
+
+    @staticmethod
+    def is_evaluation_only_mode():
+        """
+        @return true if evaluation only mode is used
+        """
+        return CarlaDataProvider._evaluation_only_flag
+
     @staticmethod
     def find_weather_presets():
         """
@@ -572,7 +621,7 @@ class CarlaDataProvider(object):  # pylint: disable=too-many-public-methods
             if not blueprint.has_attribute(name):
                 return False
 
-            attribute_type = blueprint.get_attribute(key).type
+            attribute_type = blueprint.get_attribute(name).type
             if attribute_type == carla.ActorAttributeType.Bool:
                 return blueprint.get_attribute(name).as_bool() == value
             elif attribute_type == carla.ActorAttributeType.Int:
@@ -598,14 +647,25 @@ class CarlaDataProvider(object):  # pylint: disable=too-many-public-methods
             'pedestrian': 'walker.pedestrian.0001',
         }
 
-        # Set the model
-        try:
-            blueprints = CarlaDataProvider._blueprint_library.filter(model)
-            if attribute_filter is not None:
-                for key, value in attribute_filter.items():
+        def get_blueprint_ids(bp_filter, attribute_filter=None):
+            """
+            Returns the ids of the blueprints matching the filter and attributes. These are
+            indexed by both, so that the library is only searched once per world and query
+            """
+            attributes = tuple(sorted(attribute_filter.items())) if attribute_filter else ()
+            index_key = (bp_filter, attributes)
+            if index_key not in CarlaDataProvider._blueprint_index:
+                blueprints = CarlaDataProvider._blueprint_library.filter(bp_filter)
+                for key, value in attributes:
                     blueprints = [x for x in blueprints if check_attribute_value(x, key, value)]
+                CarlaDataProvider._blueprint_index[index_key] = [x.id for x in blueprints]
 
-            blueprint = CarlaDataProvider._rng.choice(blueprints)
+            return CarlaDataProvider._blueprint_index[index_key]
+
+        # Set the model. The blueprint is taken from the library with 'find', which returns a copy,
+        # so that the attributes set below don't affect later calls
+        try:
+            blueprint_id = CarlaDataProvider._rng.choice(get_blueprint_ids(model, attribute_filter))
         except ValueError:
             # The model is not part of the blueprint library. Let's take a default one for the given category
             bp_filter = "vehicle.*"
@@ -613,7 +673,8 @@ class CarlaDataProvider(object):  # pylint: disable=too-many-public-methods
             if new_model != '':
                 bp_filter = new_model
             print("WARNING: Actor model {} not available. Using instead {}".format(model, new_model))
-            blueprint = CarlaDataProvider._rng.choice(CarlaDataProvider._blueprint_library.filter(bp_filter))
+            blueprint_id = CarlaDataProvider._rng.choice(get_blueprint_ids(bp_filter))
+        blueprint = CarlaDataProvider._blueprint_library.find(blueprint_id)
 
         # Set the color
         if color:
@@ -647,10 +708,11 @@ class CarlaDataProvider(object):  # pylint: disable=too-many-public-methods
         return blueprint
 
     @staticmethod
-    def handle_actor_batch(batch, tick=True):
+    def handle_actor_batch(batch, tick=True, aligned=False):
         """
         Forward a CARLA command batch to spawn actors to CARLA, and gather the responses.
-        Returns list of actors on success, none otherwise
+        Returns list of actors on success, none otherwise.
+        If 'aligned' is set, the list has one element per command, None for the failed ones
         """
         sync_mode = CarlaDataProvider.is_sync_mode()
         actors = []
@@ -676,6 +738,9 @@ class CarlaDataProvider(object):  # pylint: disable=too-many-public-methods
                 print("WARNING: Not all actors were spawned")
                 break
         actors = list(CarlaDataProvider._world.get_actors(actor_ids))
+        if aligned:
+            actors_by_id = {actor.id: actor for actor in actors}
+            actors = [None if r.error else actors_by_id.get(r.actor_id) for r in responses]
         return actors
 
     @staticmethod
@@ -728,7 +793,7 @@ class CarlaDataProvider(object):  # pylint: disable=too-many-public-methods
         if actor is None:
             return None
 
-        CarlaDataProvider._carla_actor_pool[actor.id] = actor
+        CarlaDataProvider._add_actor_to_pool(actor, actor_category)
         CarlaDataProvider.register_actor(actor, spawn_point)
         return actor
 
@@ -751,6 +816,7 @@ class CarlaDataProvider(object):  # pylint: disable=too-many-public-methods
 
         batch = []
         actors = []
+        categories = []
 
         CarlaDataProvider.generate_spawn_points()
 
@@ -800,19 +866,19 @@ class CarlaDataProvider(object):  # pylint: disable=too-many-public-methods
                 command.then(SetVehicleLightState(FutureActor, carla.VehicleLightState.All))
 
             batch.append(command)
+            categories.append(actor.category)
 
-        actors = CarlaDataProvider.handle_actor_batch(batch, tick)
+        actors = CarlaDataProvider.handle_actor_batch(batch, tick, aligned=True)
+        spawned = [(actor, category) for actor, category in zip(actors, categories) if actor is not None]
 
-        if not actors:
+        if not spawned:
             return None
 
-        for actor in actors:
-            if actor is None:
-                continue
-            CarlaDataProvider._carla_actor_pool[actor.id] = actor
+        for actor, category in spawned:
+            CarlaDataProvider._add_actor_to_pool(actor, category)
             CarlaDataProvider.register_actor(actor, _spawn_point)
 
-        return actors
+        return [actor for actor, _ in spawned]
 
     @staticmethod
     def request_new_batch_actors(model, amount, spawn_points, autopilot=False,
@@ -862,11 +928,94 @@ class CarlaDataProvider(object):  # pylint: disable=too-many-public-methods
         for actor in actors:
             if actor is None:
                 continue
-            CarlaDataProvider._carla_actor_pool[actor.id] = actor
+            CarlaDataProvider._add_actor_to_pool(actor)
+            CarlaDataProvider.register_actor(actor, spawn_point)
+
+        return actors
+
+    @staticmethod
+    def request_new_actors_at(model, spawn_points, rolename='scenario', autopilot=False,
+                              attribute_filter=None, extra_commands=None, tick=True):
+        """
+        Batched version of "request_new_actor", creating one actor at each of the spawn points
+        with a single command batch. The autopilot activation is chained to each spawn command,
+        as well as the commands at 'extra_commands' (one list per spawn point, applied to
+        carla.command.FutureActor).
+
+        Returns a list with one element per spawn point, None for those that failed
+        """
+        SpawnActor = carla.command.SpawnActor      # pylint: disable=invalid-name
+        SetAutopilot = carla.command.SetAutopilot  # pylint: disable=invalid-name
+        FutureActor = carla.command.FutureActor    # pylint: disable=invalid-name
+
+        # For non prop models, slightly lift the actor to avoid collisions with the ground
+        z_offset = 0.2 if 'prop' not in model else 0
+
+        batch = []
+        for i, spawn_point in enumerate(spawn_points):
+            blueprint = CarlaDataProvider.create_blueprint(model, rolename, attribute_filter=attribute_filter)
+
+            # DO NOT USE spawn_point directly, as this will modify spawn_point permanently
+            _spawn_point = carla.Transform(carla.Location(), spawn_point.rotation)
+            _spawn_point.location.x = spawn_point.location.x
+            _spawn_point.location.y = spawn_point.location.y
+            _spawn_point.location.z = spawn_point.location.z + z_offset
+
+            command = SpawnActor(blueprint, _spawn_point)
+            if autopilot:
+                command.then(SetAutopilot(FutureActor, True, CarlaDataProvider._traffic_manager_port))
+            if extra_commands is not None:
+                for extra_command in extra_commands[i]:
+                    command.then(extra_command)
+            batch.append(command)
+
+        if not batch:
+            return []
+
+        actors = CarlaDataProvider.handle_actor_batch(batch, tick, aligned=True)
+        for actor, spawn_point in zip(actors, spawn_points):
+            if actor is None:
+                print("WARNING: Cannot spawn actor {} at position {}".format(model, spawn_point.location))
+                continue
+            CarlaDataProvider._add_actor_to_pool(actor)
             CarlaDataProvider.register_actor(actor, spawn_point)
 
         return actors
 
+    @staticmethod
+    def remove_actors_batch(actors, stop_actors=False):
+        """
+        Destroy the actors with a single command batch, removing them from the pool.
+
+        If 'stop_actors' is set, the autopilot and velocities of the vehicles and walkers are disabled
+        beforehand, so that they don't keep moving in case their destruction fails
+        """
+        DestroyActor = carla.command.DestroyActor                              # pylint: disable=invalid-name
+        SetAutopilot = carla.command.SetAutopilot                              # pylint: disable=invalid-name
+        ApplyTargetVelocity = carla.command.ApplyTargetVelocity                # pylint: disable=invalid-name
+        ApplyTargetAngularVelocity = carla.command.ApplyTargetAngularVelocity  # pylint: disable=invalid-name
+
+        batch = []
+        for actor in actors:
+            if actor is None:
+                continue
+            if stop_actors and isinstance(actor, (carla.Vehicle, carla.Walker)):
+                if isinstance(actor, carla.Vehicle):
+                    batch.append(SetAutopilot(actor, False, CarlaDataProvider._traffic_manager_port))
+                batch.append(ApplyTargetVelocity(actor, carla.Vector3D(0, 0, 0)))
+                batch.append(ApplyTargetAngularVelocity(actor, carla.Vector3D(0, 0, 0)))
+            batch.append(DestroyActor(actor))
+            CarlaDataProvider._remove_actor_from_pool(actor.id)
+
+        if batch and CarlaDataProvider._client:
+            try:
+                CarlaDataProvider._client.apply_batch_sync(batch)
+            except RuntimeError as e:
+                if "time-out" in str(e):
+                    pass
+                else:
+                    raise e
+
     @staticmethod
     def get_actors():
         """
@@ -886,14 +1035,48 @@ class CarlaDataProvider(object):  # pylint: disable=too-many-public-methods
 
         return False
 
+    @staticmethod
+    def _add_actor_to_pool(actor, category=None):
+        """
+        Adds the actor to the pool and to its role name, type and category indexes.
+        If no category is given, it is deduced from the actor type
+        """
+        actor_type = actor.type_id.split('.')[0]
+        if category is None:
+            category = {'vehicle': 'car', 'walker': 'pedestrian'}.get(actor_type, 'misc')
+
+        keys = (actor.attributes.get('role_name', ''), actor_type, category)
+        CarlaDataProvider._carla_actor_pool[actor.id] = actor
+        CarlaDataProvider._actor_pool_keys[actor.id] = keys
+        for index, key in zip(CarlaDataProvider._get_actor_pool_indexes(), keys):
+            index.setdefault(key, {})[actor.id] = actor
+
+    @staticmethod
+    def _remove_actor_from_pool(actor_id):
+        """
+        Removes the actor from the pool and all its indexes, returning it (None if it wasn't part of the pool)
+        """
+        actor = CarlaDataProvider._carla_actor_pool.pop(actor_id, None)
+        keys = CarlaDataProvider._actor_pool_keys.pop(actor_id, ())
+        for index, key in zip(CarlaDataProvider._get_actor_pool_indexes(), keys):
+            index[key].pop(actor_id, None)
+            if not index[key]:
+                del index[key]
+        return actor
+
+    @staticmethod
+    def _get_actor_pool_indexes():
+        return (CarlaDataProvider._actor_pool_by_role_name,
+                CarlaDataProvider._actor_pool_by_type,
+                CarlaDataProvider._actor_pool_by_category)
+
     @staticmethod
     def get_hero_actor():
         """
         Get the actor object of the hero actor if it exists, returns none otherwise.
         """
-        for actor_id in CarlaDataProvider._carla_actor_pool:
-            if CarlaDataProvider._carla_actor_pool[actor_id].attributes['role_name'] == 'hero':
-                return CarlaDataProvider._carla_actor_pool[actor_id]
+        for actor in CarlaDataProvider._actor_pool_by_role_name.get('hero', {}).values():
+            return actor
         return None
 
     @staticmethod
@@ -910,22 +1093,49 @@ class CarlaDataProvider(object):  # pylint: disable=too-many-public-methods
 
     @staticmethod
     def get_actor_by_name(role_name: str):
-
-        for actor_id in CarlaDataProvider._carla_actor_pool:
-            if CarlaDataProvider._carla_actor_pool[actor_id].attributes['role_name'] == role_name:
-                return CarlaDataProvider._carla_actor_pool[actor_id]
+        """
+        Get the first actor of the pool with the given role name. If no actor
+        has it, None is returned.
+        """
+        for actor in CarlaDataProvider._actor_pool_by_role_name.get(role_name, {}).values():
+            return actor
         print(f"Non-existing actor name {role_name}")
         return None
 
+    @staticmethod
+    def get_actors_by_role_name(role_name, actor_type=None):
+        """
+        Get all the actors of the pool with the given role name, optionally
+        only those of a type ('vehicle', 'walker', 'static'...)
+        """
+        actors = CarlaDataProvider._actor_pool_by_role_name.get(role_name, {})
+        if actor_type is None:
+            return list(actors.values())
+        actors_of_type = CarlaDataProvider._actor_pool_by_type.get(actor_type, {})
+        return [actor for actor_id, actor in actors.items() if actor_id in actors_of_type]
+
+    @staticmethod
+    def get_actors_by_type(actor_type):
+        """
+        Get all the actors of the pool of a type, given by the first part of
+        their type id ('vehicle', 'walker', 'static'...)
+        """
+        return list(CarlaDataProvider._actor_pool_by_type.get(actor_type, {}).values())
+
+    @staticmethod
+    def get_actors_by_category(category):
+        """
+        Get all the actors of the pool of a category ('car', 'pedestrian', 'misc'...)
+        """
+        return list(CarlaDataProvider._actor_pool_by_category.get(category, {}).values())
+
     @staticmethod
     def remove_actor_by_id(actor_id):
         """
         Remove an actor from the pool using its ID
         """
         if actor_id in CarlaDataProvider._carla_actor_pool:
-            CarlaDataProvider._carla_actor_pool[actor_id].destroy()
-            CarlaDataProvider._carla_actor_pool[actor_id] = None
-            CarlaDataProvider._carla_actor_pool.pop(actor_id)
+            CarlaDataProvider._remove_actor_from_pool(actor_id).destroy()
         else:
             print("Trying to remove a non-existing actor id {}".format(actor_id))
 
@@ -936,12 +1146,11 @@ class CarlaDataProvider(object):  # pylint: disable=too-many-public-methods
         provided location
         """
         for actor_id in CarlaDataProvider._carla_actor_pool.copy():
-            if CarlaDataProvider._carla_actor_pool[actor_id].get_location().distance(location) < distance:
-                CarlaDataProvider._carla_actor_pool[actor_id].destroy()
-                CarlaDataProvider._carla_actor_pool.pop(actor_id)
-
-        # Remove all keys with None values
-        CarlaDataProvider._carla_actor_pool = dict({k: v for k, v in CarlaDataProvider._carla_actor_pool.items() if v})
+            actor = CarlaDataProvider._carla_actor_pool[actor_id]
+            if actor is None or actor.get_location().distance(location) < distance:
+                CarlaDataProvider._remove_actor_from_pool(actor_id)
+                if actor is not None:
+                    actor.destroy()
 
     @staticmethod
     def get_traffic_manager_port():
@@ -989,12 +1198,17 @@ class CarlaDataProvider(object):  # pylint: disable=too-many-public-methods
         CarlaDataProvider._ego_vehicle_route = None
         CarlaDataProvider._all_actors = None
         CarlaDataProvider._carla_actor_pool = {}
+        CarlaDataProvider._actor_pool_by_role_name = {}
+        CarlaDataProvider._actor_pool_by_type = {}
+        CarlaDataProvider._actor_pool_by_category = {}
+        CarlaDataProvider._actor_pool_keys = {}
         CarlaDataProvider._client = None
         CarlaDataProvider._spawn_points = None
         CarlaDataProvider._spawn_index = 0
         CarlaDataProvider._rng = random.RandomState(CarlaDataProvider._random_seed)
         CarlaDataProvider._grp = None
         CarlaDataProvider._runtime_init_flag = False
+        CarlaDataProvider._evaluation_only_flag = False
 
     @property
     def world(self):
@@ -110,8 +110,7 @@ class RouteLightsBehavior(py_trees.behaviour.Behaviour):
         self._light_manager.turn_off(off_lights)
 
         # Vehicles
-        all_vehicles = CarlaDataProvider.get_all_actors().filter('*vehicle.*')
-        scenario_vehicles = [v for v in all_vehicles if v.attributes['role_name'] == 'scenario']
+        scenario_vehicles = CarlaDataProvider.get_actors_by_role_name('scenario', 'vehicle')
 
         for vehicle in scenario_vehicles:
             if vehicle.get_location().distance(location) > radius:
@@ -135,8 +134,7 @@ class RouteLightsBehavior(py_trees.behaviour.Behaviour):
         self._light_manager.turn_off(off_lights)
 
         # Vehicles
-        all_vehicles = CarlaDataProvider.get_all_actors().filter('*vehicle.*')
-        scenario_vehicles = [v for v in all_vehicles if v.attributes['role_name'] == 'scenario']
+        scenario_vehicles = CarlaDataProvider.get_actors_by_role_name('scenario', 'vehicle')
 
         for vehicle in scenario_vehicles:
             lights = vehicle.get_light_state()
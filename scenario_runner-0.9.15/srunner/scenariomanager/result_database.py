@@ -0,0 +1,293 @@
+#!/usr/bin/env python
+
+# This work is licensed under the terms of the MIT license.
+# For a copy, see <https://opensource.org/licenses/MIT>.
+
+"""
+SQLite store of the results of many scenario runs.
+
+Each run is indexed by its scenario, scenario file hash, sampling seed and variant (OSC-2),
+map and git commit, with the outcome of all its criteria. It is filled by the
+ResultOutputProvider (see --resultDatabase) and queried through the command line:
+
+    python -m srunner.scenariomanager.result_database results.db pass-rates --group-by map
+    python -m srunner.scenariomanager.result_database results.db regressions --base <commit> --head <commit>
+    python -m srunner.scenariomanager.result_database results.db timings --percentiles 50 90 99
+"""
+
+from __future__ import print_function
+
+import argparse
+import hashlib
+import math
+import os
+import sqlite3
+import subprocess
+import sys
+import time
+
+from tabulate import tabulate
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    scenario TEXT,
+    scenario_file TEXT,
+    file_hash TEXT,
+    seed INTEGER,
+    strategy TEXT,
+    variant INTEGER,
+    map TEXT,
+    git_commit TEXT,
+    result TEXT,
+    success INTEGER,
+    partial INTEGER,
+    timestamp REAL,
+    system_time REAL,
+    game_time REAL,
+    cpu_time_per_game_second REAL
+);
+CREATE TABLE IF NOT EXISTS criteria (
+    run_id INTEGER REFERENCES runs(id) ON DELETE CASCADE,
+    name TEXT,
+    actor TEXT,
+    optional INTEGER,
+    expected TEXT,
+    actual TEXT,
+    status TEXT,
+    success INTEGER
+);
+CREATE INDEX IF NOT EXISTS runs_scenario ON runs (scenario, file_hash);
+CREATE INDEX IF NOT EXISTS runs_seed ON runs (seed, variant);
+CREATE INDEX IF NOT EXISTS runs_map ON runs (map);
+CREATE INDEX IF NOT EXISTS runs_commit ON runs (git_commit);
+CREATE INDEX IF NOT EXISTS criteria_run ON criteria (run_id);
+CREATE INDEX IF NOT EXISTS criteria_outcome ON criteria (name, success);
+"""
+
+# Columns the runs can be grouped by
+GROUP_COLUMNS = ["scenario", "scenario_file", "file_hash", "seed", "strategy", "map", "git_commit"]
+# Columns with the timings of the runs
+TIMING_COLUMNS = ["system_time", "game_time", "cpu_time_per_game_second"]
+# Name of the run result in the regressions, next to the criteria
+RUN_RESULT = "Result"
+
+_git_commits = {}
+
+
+def get_file_hash(filename):
+    """
+    Returns the sha1 of the content of the file, or None if it can't be read
+    """
+    try:
+        with open(filename, "rb") as fd:
+            return hashlib.sha1(fd.read()).hexdigest()
+    except (IOError, OSError, TypeError):
+        return None
+
+
+def get_git_commit(path=None):
+    """
+    Returns the commit checked out at the repository of the given path
+    (by default, the one of ScenarioRunner), or None if it isn't a git repository
+    """
+    path = path or os.path.dirname(os.path.abspath(__file__))
+    if path not in _git_commits:
+        try:
+            output = subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=path, stderr=subprocess.DEVNULL)
+            _git_commits[path] = output.decode("utf-8").strip()
+        except (OSError, subprocess.CalledProcessError):
+            _git_commits[path] = None
+    return _git_commits[path]
+
+
+def _percentile(values, percentile):
+    """Nearest-rank percentile of sorted values"""
+    rank = max(1, int(math.ceil(percentile / 100.0 * len(values))))
+    return values[rank - 1]
+
+
+class ResultDatabase(object):
+
+    """
+    SQLite database with the results of the scenario runs
+    """
+
+    def __init__(self, filename):
+        self._connection = sqlite3.connect(filename)
+        self._connection.execute("PRAGMA foreign_keys = ON")
+        self._connection.executescript(SCHEMA)
+
+    def close(self):
+        """Closes the connection to the database"""
+        self._connection.close()
+
+    def add_run(self, report, scenario_file=None, map_name=None, git_commit=None):
+        """
+        Stores a scenario run.
+
+        Args:
+            report (dict): results of the run, in the format of read_result_stream
+            scenario_file (str): file describing the scenario, used to compute its hash
+            map_name (str): map where the scenario was run
+            git_commit (str): commit of ScenarioRunner, by default the checked out one
+
+        Returns:
+            int: id of the run
+        """
+        sampling = report.get("sampling") or {}
+        with self._connection:
+            cursor = self._connection.execute(
+                "INSERT INTO runs (scenario, scenario_file, file_hash, seed, strategy, variant, map, git_commit, "
+                "result, success, partial, timestamp, system_time, game_time, cpu_time_per_game_second) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (report["scenario"], scenario_file, get_file_hash(scenario_file),
+                 sampling.get("seed"), sampling.get("strategy"), sampling.get("variant"),
+                 map_name, git_commit or get_git_commit(),
+                 report["result"], report["result"] in ["SUCCESS", "ACCEPTABLE"], report.get("partial", False),
+                 report.get("start_system_time") or time.time(), report["system_time"], report["game_time"],
+                 report["cpu_time_per_game_second"]))
+            run_id = cursor.lastrowid
+            self._connection.executemany(
+                "INSERT INTO criteria (run_id, name, actor, optional, expected, actual, status, success) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(run_id, criterion["name"], criterion["actor"], criterion["optional"],
+                  str(criterion["expected"]), str(criterion["actual"]), criterion["status"],
+                  criterion["status"] in ["SUCCESS", "ACCEPTABLE"])
+                 for criterion in report["criteria"]])
+        return run_id
+
+    @staticmethod
+    def _where(filters):
+        """Returns the WHERE clause and parameters matching the runs with the given column values"""
+        filters = {column: value for column, value in (filters or {}).items() if value is not None}
+        for column in filters:
+            if column not in GROUP_COLUMNS:
+                raise ValueError("Unknown column '{}', use one of {}".format(column, GROUP_COLUMNS))
+        if not filters:
+            return "", ()
+        return "WHERE " + " AND ".join("{} = ?".format(column) for column in filters), tuple(filters.values())
+
+    def get_pass_rates(self, group_by="scenario", filters=None):
+        """
+        Returns a list of (group, runs, passed runs, pass rate) of the runs grouped by the given column
+        """
+        if group_by not in GROUP_COLUMNS:
+            raise ValueError("Unknown column '{}', use one of {}".format(group_by, GROUP_COLUMNS))
+        where, params = self._where(filters)
+        rows = self._connection.execute(
+            "SELECT {0}, COUNT(*), SUM(success) FROM runs {1} GROUP BY {0} ORDER BY {0}".format(group_by, where),
+            params).fetchall()
+        return [(group, runs, passed, float(passed) / runs) for group, runs, passed in rows]
+
+    def get_criteria_pass_rates(self, filters=None):
+        """
+        Returns a list of (criterion, runs, passed runs, pass rate) of the criteria of the matching runs
+        """
+        where, params = self._where(filters)
+        rows = self._connection.execute(
+            "SELECT name, COUNT(*), SUM(criteria.success) FROM criteria "
+            "WHERE run_id IN (SELECT id FROM runs {}) GROUP BY name ORDER BY name".format(where),
+            params).fetchall()
+        return [(name, runs, passed, float(passed) / runs) for name, runs, passed in rows]
+
+    def get_regressions(self, base_commit, head_commit):
+        """
+        Returns the (scenario, seed, variant, map, criterion) that passed at the base commit
+        and fail at the head commit. Runs repeated at the same commit count as passed if any of them passed.
+        The result of the run itself (which also fails on timeouts) is compared as the RUN_RESULT criterion
+        """
+        query = (
+            "SELECT scenario, seed, variant, map, name, MAX(success) FROM ("
+            "SELECT runs.scenario, runs.seed, runs.variant, runs.map, criteria.name AS name, "
+            "criteria.success AS success FROM runs JOIN criteria ON criteria.run_id = runs.id "
+            "WHERE runs.git_commit = :commit "
+            "UNION ALL SELECT scenario, seed, variant, map, :result, success FROM runs WHERE git_commit = :commit) "
+            "GROUP BY scenario, seed, variant, map, name")
+        base = {row[:-1]: row[-1] for row in self._connection.execute(
+            query, {"commit": base_commit, "result": RUN_RESULT})}
+        head = {row[:-1]: row[-1] for row in self._connection.execute(
+            query, {"commit": head_commit, "result": RUN_RESULT})}
+        return sorted((key for key, success in head.items() if not success and base.get(key)),
+                      key=lambda key: tuple("" if value is None else str(value) for value in key))
+
+    def get_timing_percentiles(self, column="system_time", percentiles=(50, 90, 99), group_by="scenario",
+                               filters=None):
+        """
+        Returns a list of (group, runs, *percentiles) of the given timing column of the runs
+        """
+        if column not in TIMING_COLUMNS:
+            raise ValueError("Unknown timing '{}', use one of {}".format(column, TIMING_COLUMNS))
+        if group_by not in GROUP_COLUMNS:
+            raise ValueError("Unknown column '{}', use one of {}".format(group_by, GROUP_COLUMNS))
+        where, params = self._where(filters)
+
+        groups = {}
+        rows = self._connection.execute(
+            "SELECT {0}, {1} FROM runs {2} ORDER BY {0}, {1}".format(group_by, column, where), params)
+        for group, value in rows:
+            if value is not None:
+                groups.setdefault(group, []).append(value)
+        return [tuple([group, len(values)] + [_percentile(values, p) for p in percentiles])
+                for group, values in groups.items()]
+
+
+def main():
+    """
+    Queries the pass rates, regressions and timings of the runs stored in a result database
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('database', help='SQLite file written with --resultDatabase')
+    subparsers = parser.add_subparsers(dest='command')
+
+    filters = argparse.ArgumentParser(add_help=False)
+    for column in GROUP_COLUMNS:
+        filters.add_argument('--' + column.replace('_', '-'), dest=column, help='Only use the runs with this ' + column)
+
+    pass_rates = subparsers.add_parser('pass-rates', parents=[filters], help='Pass rate of the runs')
+    pass_rates.add_argument('--group-by', default='scenario', choices=GROUP_COLUMNS)
+    pass_rates.add_argument('--criteria', action='store_true', help='Pass rate of each criterion instead')
+
+    regressions = subparsers.add_parser('regressions', help='Criteria passing at the base commit but not at the head')
+    regressions.add_argument('--base', required=True, help='Commit of the reference runs')
+    regressions.add_argument('--head', required=True, help='Commit of the runs being checked')
+
+    timings = subparsers.add_parser('timings', parents=[filters], help='Percentiles of the run timings')
+    timings.add_argument('--group-by', default='scenario', choices=GROUP_COLUMNS)
+    timings.add_argument('--timing', default='system_time', choices=TIMING_COLUMNS)
+    timings.add_argument('--percentiles', default=[50, 90, 99], type=float, nargs='+')
+
+    args = parser.parse_args()
+    if args.command is None:
+        parser.print_help()
+        return 1
+
+    database = ResultDatabase(args.database)
+    try:
+        if args.command == 'pass-rates':
+            run_filters = {column: getattr(args, column) for column in GROUP_COLUMNS}
+            if args.criteria:
+                header = ['Criterion', 'Runs', 'Passed', 'Pass rate']
+                rows = database.get_criteria_pass_rates(run_filters)
+            else:
+                header = [args.group_by, 'Runs', 'Passed', 'Pass rate']
+                rows = database.get_pass_rates(args.group_by, run_filters)
+            print(tabulate(rows, header))
+
+        elif args.command == 'regressions':
+            rows = database.get_regressions(args.base, args.head)
+            print(tabulate(rows, ['Scenario', 'Seed', 'Variant', 'Map', 'Criterion']))
+            return 1 if rows else 0
+
+        elif args.command == 'timings':
+            run_filters = {column: getattr(args, column) for column in GROUP_COLUMNS}
+            header = [args.group_by, 'Runs'] + ['p{:g}'.format(p) for p in args.percentiles]
+            print(tabulate(database.get_timing_percentiles(
+                args.timing, args.percentiles, args.group_by, run_filters), header))
+    finally:
+        database.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
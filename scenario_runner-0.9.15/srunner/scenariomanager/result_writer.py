@@ -14,15 +14,23 @@ from __future__ import print_function
 
 import time
 import json
+import queue
+import threading
 from tabulate import tabulate
 
 
 import carla
-import cv2
 import numpy as np
 
+from srunner.scenariomanager.result_database import ResultDatabase
+from srunner.scenariomanager.timer import GameTime
+
+
 class ScenarioRecorder:
     def __init__(self, vehicle, width=800, height=600, filename='scenario_video.mp4'):
+        # OpenCV is only needed (and imported) when the scenario is recorded
+        import cv2
+
         self.width = width
         self.height = height
 
@@ -64,6 +72,211 @@ class ScenarioRecorder:
         self.video_writer.release()
 
 
+class ResultStream(object):
+
+    """
+    Append-only NDJSON record of a scenario run, written while the scenario runs so that
+    a run that dies halfway still leaves its partial results. The records are:
+    - start: scenario, actors and criteria (with the index used by the other records)
+    - status: change of the status or actual value of a criterion
+    - event: TrafficEvent registered by a criterion
+    - sample: actual value of all criteria, every 'sample_period' ticks (if not 0)
+    - end: durations of the run
+    The records are serialized and written by a background thread, off the tick path.
+    """
+
+    def __init__(self, filename, sample_period=0):
+        self.filename = filename
+        self._sample_period = sample_period
+        self._queue = queue.Queue()
+        self._thread = None
+        self._criteria = []
+        self._states = []
+        self._event_counts = []
+        self._ticks = 0
+
+    def _write_records(self, fd):
+        with fd:
+            closed = False
+            while not closed:
+                records = [self._queue.get()]
+                while not self._queue.empty():
+                    records.append(self._queue.get())
+                for record in records:
+                    if record is None:
+                        closed = True
+                        break
+                    fd.write(json.dumps(record, default=str) + "\n")
+                fd.flush()
+
+    def start(self, manager):
+        """
+        Starts the writer thread, recording the scenario about to be run
+        """
+        self._criteria = manager.scenario.get_criteria()
+        self._states = [None] * len(self._criteria)
+        self._event_counts = [0] * len(self._criteria)
+        self._ticks = 0
+
+        fd = open(self.filename, 'w', encoding='utf-8')  # pylint: disable=consider-using-with
+        self._thread = threading.Thread(target=self._write_records, args=(fd,))
+        self._thread.daemon = True
+        self._thread.start()
+
+        record = {
+            "type": "start",
+            "scenario": manager.scenario_tree.name,
+            "start_system_time": manager.start_system_time,
+            "timeout": manager.scenario.timeout,
+            "ego_vehicles": [str(actor) for actor in manager.ego_vehicles],
+            "other_actors": [str(actor) for actor in manager.other_actors],
+            "criteria": [{
+                "name": criterion.name,
+                "actor": "{}-{}".format(criterion.actor.type_id[8:], criterion.actor.id),
+                "optional": criterion.optional,
+                "expected": criterion.success_value,
+            } for criterion in self._criteria]
+        }
+        sampler = getattr(manager.scenario, "sampler", None)
+        if sampler is not None:
+            record["sampling"] = sampler.to_dict()
+        self._queue.put(record)
+
+    def on_tick(self, game_time):
+        """
+        Records the criteria changes and events since the previous tick
+        """
+        for i, criterion in enumerate(self._criteria):
+            events = criterion.events
+            for event in events[self._event_counts[i]:]:
+                self._queue.put({
+                    "type": "event",
+                    "time": game_time,
+                    "criterion": i,
+                    "event": event.get_type().name,
+                    "frame": event.get_frame(),
+                    "message": event.get_message(),
+                    "data": event.get_dict(),
+                })
+            self._event_counts[i] = len(events)
+
+            state = (criterion.test_status, criterion.actual_value)
+            if state != self._states[i]:
+                self._states[i] = state
+                self._queue.put({
+                    "type": "status",
+                    "time": game_time,
+                    "criterion": i,
+                    "status": state[0],
+                    "actual": state[1],
+                })
+
+        self._ticks += 1
+        if self._sample_period and self._ticks % self._sample_period == 0:
+            self._queue.put({
+                "type": "sample",
+                "time": game_time,
+                "actual": [criterion.actual_value for criterion in self._criteria],
+            })
+
+    def stop(self, manager):
+        """
+        Records the final state of the criteria and the durations of the run, and waits
+        until everything is written
+        """
+        if self._thread is None:
+            return
+
+        self.on_tick(GameTime.get_time())
+        timeout_node = getattr(manager.scenario, "timeout_node", None)
+        self._queue.put({
+            "type": "end",
+            "end_system_time": manager.end_system_time,
+            "system_time": manager.scenario_duration_system,
+            "game_time": manager.scenario_duration_game,
+            "cpu_time": manager.scenario_cpu_time,
+            "cpu_time_per_game_second": manager.cpu_time_per_game_second,
+            "timed_out": bool(timeout_node and timeout_node.timeout),
+        })
+        self.close()
+
+    def close(self):
+        """
+        Waits until the queued records are written and closes the file. Called on its own
+        (without stop) when the run is interrupted, leaving a stream without 'end' record
+        """
+        if self._thread is None:
+            return
+
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+
+def read_result_stream(filename):
+    """
+    Builds the report of a scenario run from its ResultStream file. If the run didn't
+    finish, the report has the last known state of the criteria and 'partial' is True.
+
+    Returns:
+        dict: with the scenario, result, durations, criteria (name, actor, optional,
+        expected, actual, status and events) and samples of the run
+    """
+    report = {
+        "scenario": None,
+        "result": None,
+        "partial": True,
+        "start_system_time": None,
+        "system_time": 0.0,
+        "game_time": 0.0,
+        "cpu_time_per_game_second": 0.0,
+        "timeout": None,
+        "timed_out": False,
+        "criteria": [],
+        "samples": [],
+    }
+
+    with open(filename, 'r', encoding='utf-8') as fd:
+        for line in fd:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break  # Truncated last record of an interrupted run
+
+            record_type = record.pop("type")
+            if record_type == "start":
+                report.update({key: value for key, value in record.items() if key != "criteria"})
+                for criterion in record["criteria"]:
+                    criterion.update({"actual": None, "status": "INIT", "events": []})
+                    report["criteria"].append(criterion)
+            elif record_type == "status":
+                criterion = report["criteria"][record["criterion"]]
+                criterion["status"] = record["status"]
+                criterion["actual"] = record["actual"]
+                report["game_time"] = record["time"]
+            elif record_type == "event":
+                report["criteria"][record.pop("criterion")]["events"].append(record)
+            elif record_type == "sample":
+                report["samples"].append(record)
+                report["game_time"] = record["time"]
+            elif record_type == "end":
+                report.update(record)
+                report["partial"] = False
+
+    # Same rules as ScenarioManager.analyze_scenario
+    failure = False
+    result = "SUCCESS"
+    for criterion in report["criteria"]:
+        if not criterion["optional"] and criterion["status"] not in ["SUCCESS", "ACCEPTABLE"]:
+            failure = True
+            result = "FAILURE"
+        elif criterion["status"] == "ACCEPTABLE":
+            result = "ACCEPTABLE"
+    if report["timed_out"] and not failure:
+        result = "TIMEOUT"
+    report["result"] = result
+
+    return report
 
 
 class ResultOutputProvider(object):
@@ -73,7 +286,8 @@ class ResultOutputProvider(object):
     It shall be used from the ScenarioManager only.
     """
 
-    def __init__(self, data, result, stdout=True, filename=None, junitfile=None, jsonfile=None):
+    def __init__(self, data, result, stdout=True, filename=None, junitfile=None, jsonfile=None, streamfile=None,
+                 database=None, run_info=None):
         """
         Setup all parameters
         - _data contains all scenario-related information
@@ -82,6 +296,9 @@ class ResultOutputProvider(object):
         - _filename is used to (de)activate file output in tabular form
         - _junit is used to (de)activate file output in junit form
         - _json is used to (de)activate file output in json form
+        - _stream is the ResultStream file of the run, if any. The junit and json outputs are derived from it
+        - _database is the ResultDatabase file where the run is stored, if any
+        - _run_info are the scenario_file, map_name and git_commit of the run stored in the database
         """
         self._data = data
         self._result = result
@@ -89,6 +306,9 @@ class ResultOutputProvider(object):
         self._filename = filename
         self._junit = junitfile
         self._json = jsonfile
+        self._stream = streamfile
+        self._database = database
+        self._run_info = run_info or {}
 
         self._start_time = time.strftime('%Y-%m-%d %H:%M:%S',
                                          time.localtime(self._data.start_system_time))
@@ -99,10 +319,14 @@ class ResultOutputProvider(object):
         """
         Public write function
         """
-        if self._junit is not None:
-            self._write_to_junit()
-        if self._json is not None:
-            self._write_to_reportjson()
+        if self._junit is not None or self._json is not None or self._database is not None:
+            report = self._get_report()
+            if self._junit is not None:
+                self._write_to_junit(report)
+            if self._json is not None:
+                self._write_to_reportjson(report)
+            if self._database is not None:
+                self._write_to_database(report)
 
         output = self.create_output_text()
         if self._filename is not None:
@@ -138,12 +362,16 @@ class ResultOutputProvider(object):
         system_time = round(self._data.scenario_duration_system, 2)
         game_time = round(self._data.scenario_duration_game, 2)
         ratio = round(self._data.scenario_duration_game / self._data.scenario_duration_system, 3)
+        cpu_time = round(self._data.scenario_cpu_time, 2)
+        cpu_ratio = round(self._data.cpu_time_per_game_second, 3)
 
         list_statistics = [["Start Time", "{}".format(self._start_time)]]
         list_statistics.extend([["End Time", "{}".format(self._end_time)]])
         list_statistics.extend([["System Time", "{}s".format(system_time)]])
         list_statistics.extend([["Game Time", "{}s".format(game_time)]])
         list_statistics.extend([["Ratio (Game / System)", "{}".format(ratio)]])
+        list_statistics.extend([["CPU Time", "{}s".format(cpu_time)]])
+        list_statistics.extend([["Ratio (CPU / Game)", "{}".format(cpu_ratio)]])
 
         output += tabulate(list_statistics, tablefmt='fancy_grid')
         output += "\n\n"
@@ -183,7 +411,49 @@ class ResultOutputProvider(object):
 
         return output
 
-    def _write_to_reportjson(self):
+    def _get_report(self):
+        """
+        Returns the report written to the junit and json files, with the same format as
+        read_result_stream. If the run was streamed, the report is read from its file
+        """
+        if self._stream is not None:
+            return read_result_stream(self._stream)
+
+        report = {
+            "scenario": self._data.scenario_tree.name,
+            "result": self._result,
+            "partial": False,
+            "system_time": self._data.scenario_duration_system,
+            "game_time": self._data.scenario_duration_game,
+            "cpu_time_per_game_second": self._data.cpu_time_per_game_second,
+            "timeout": self._data.scenario.timeout,
+            "criteria": [{
+                "name": criterion.name,
+                "actor": "{}-{}".format(criterion.actor.type_id[8:], criterion.actor.id),
+                "optional": criterion.optional,
+                "expected": criterion.success_value,
+                "actual": criterion.actual_value,
+                "status": criterion.test_status,
+            } for criterion in self._data.scenario.get_criteria()]
+        }
+
+        sampler = getattr(self._data.scenario, "sampler", None)
+        if sampler is not None:
+            report["sampling"] = sampler.to_dict()
+
+        return report
+
+    def _write_to_database(self, report):
+        """
+        Stores the run in the result database
+        """
+        database = ResultDatabase(self._database)
+        try:
+            database.add_run(report, **self._run_info)
+        finally:
+            database.close()
+
+    def _write_to_reportjson(self, report):
         """
         Write a machine-readable report to JSON
 
@@ -222,21 +492,21 @@ class ResultOutputProvider(object):
                 "success": success,
             }
 
-        for criterion in self._data.scenario.get_criteria():
+        for criterion in report["criteria"]:
             json_list.append(
                 result_dict(
-                    criterion.name,
-                    "{}-{}".format(criterion.actor.type_id[8:], criterion.actor.id),
-                    criterion.optional,
-                    criterion.success_value,
-                    criterion.actual_value,
-                    criterion.test_status in ["SUCCESS", "ACCEPTABLE"]
+                    criterion["name"],
+                    criterion["actor"],
+                    criterion["optional"],
+                    criterion["expected"],
+                    criterion["actual"],
+                    criterion["status"] in ["SUCCESS", "ACCEPTABLE"]
                 )
             )
 
         # add one entry for duration
-        timeout = self._data.scenario.timeout
-        duration = self._data.scenario_duration_game
+        timeout = report["timeout"]
+        duration = report["game_time"]
         json_list.append(
             result_dict(
                 "Duration", "all", False, timeout, duration, duration <= timeout
@@ -244,28 +514,35 @@ class ResultOutputProvider(object):
         )
 
         result_object = {
-            "scenario": self._data.scenario_tree.name,
-            "success": self._result in ["SUCCESS", "ACCEPTABLE"],
+            "scenario": report["scenario"],
+            "success": report["result"] in ["SUCCESS", "ACCEPTABLE"],
+            "cpu_time_per_game_second": report["cpu_time_per_game_second"],
             "criteria": json_list
         }
+        if report["partial"]:
+            result_object["partial"] = True
+
+        # Seed and sampled values of the scenarios with sampled parameters (OSC-2)
+        if "sampling" in report:
+            result_object["sampling"] = report["sampling"]
 
         with open(self._json, "w", encoding='utf-8') as fp:
             json.dump(result_object, fp, indent=4)
 
-    def _write_to_junit(self):
+    def _write_to_junit(self, report):
         """
         Writing to Junit XML
         """
         test_count = 0
         failure_count = 0
-        for criterion in self._data.scenario.get_criteria():
+        for criterion in report["criteria"]:
             test_count += 1
-            if criterion.test_status != "SUCCESS":
+            if criterion["status"] != "SUCCESS":
                 failure_count += 1
 
         # handle timeout
         test_count += 1
-        if self._data.scenario_duration_game >= self._data.scenario.timeout:
+        if report["game_time"] >= report["timeout"]:
             failure_count += 1
 
         with open(self._junit, "w", encoding='utf-8') as junit_file:
@@ -278,57 +555,56 @@ class ResultOutputProvider(object):
                                   (test_count,
                                    failure_count,
                                    self._start_time,
-                                   self._data.scenario_duration_system))
+                                   report["system_time"]))
             junit_file.write(test_suites_string)
 
             test_suite_string = ("  <testsuite name=\"%s\" tests=\"%d\" failures=\"%d\" "
                                  "disabled=\"0\" errors=\"0\" time=\"%5.2f\">\n" %
-                                 (self._data.scenario_tree.name,
+                                 (report["scenario"],
                                   test_count,
                                   failure_count,
-                                  self._data.scenario_duration_system))
+                                  report["system_time"]))
             junit_file.write(test_suite_string)
 
-            for criterion in self._data.scenario.get_criteria():
-                testcase_name = criterion.name + "_" + \
-                    criterion.actor.type_id[8:] + "_" + str(criterion.actor.id)
+            for criterion in report["criteria"]:
+                testcase_name = criterion["name"] + "_" + "_".join(criterion["actor"].rsplit("-", 1))
                 result_string = ("    <testcase name=\"{}\" status=\"run\" "
                                  "time=\"0\" classname=\"Scenarios.{}\">\n".format(
-                                     testcase_name, self._data.scenario_tree.name))
-                if criterion.test_status != "SUCCESS":
+                                     testcase_name, report["scenario"]))
+                if criterion["status"] != "SUCCESS":
                     result_string += "      <failure message=\"{}\"  type=\"\"><![CDATA[\n".format(
-                        criterion.name)
+                        criterion["name"])
                     result_string += "  Actual:   {}\n".format(
-                        criterion.actual_value)
+                        criterion["actual"])
                     result_string += "  Expected: {}\n".format(
-                        criterion.success_value)
+                        criterion["expected"])
                     result_string += "\n"
                     result_string += "  Exact Value: {} = {}]]></failure>\n".format(
-                        criterion.name, criterion.actual_value)
+                        criterion["name"], criterion["actual"])
                 else:
                     result_string += "  Exact Value: {} = {}\n".format(
-                        criterion.name, criterion.actual_value)
+                        criterion["name"], criterion["actual"])
                 result_string += "    </testcase>\n"
                 junit_file.write(result_string)
 
             # Handle timeout separately
             result_string = ("    <testcase name=\"Duration\" status=\"run\" time=\"{}\" "
                              "classname=\"Scenarios.{}\">\n".format(
-                                 self._data.scenario_duration_system,
-                                 self._data.scenario_tree.name))
-            if self._data.scenario_duration_game >= self._data.scenario.timeout:
+                                 report["system_time"],
+                                 report["scenario"]))
+            if report["game_time"] >= report["timeout"]:
                 result_string += "      <failure message=\"{}\"  type=\"\"><![CDATA[\n".format(
                     "Duration")
                 result_string += "  Actual:   {}\n".format(
-                    self._data.scenario_duration_game)
+                    report["game_time"])
                 result_string += "  Expected: {}\n".format(
-                    self._data.scenario.timeout)
+                    report["timeout"])
                 result_string += "\n"
                 result_string += "  Exact Value: {} = {}]]></failure>\n".format(
-                    "Duration", self._data.scenario_duration_game)
+                    "Duration", report["game_time"])
             else:
                 result_string += "  Exact Value: {} = {}\n".format(
-                    "Duration", self._data.scenario_duration_game)
+                    "Duration", report["game_time"])
             result_string += "    </testcase>\n"
             junit_file.write(result_string)
 
@@ -11,6 +11,7 @@ It must not be modified and is for reference only!
 """
 
 from __future__ import print_function
+from concurrent.futures import ThreadPoolExecutor
 import sys
 import time
 
@@ -42,10 +43,18 @@ class ScenarioManager(object):
     5. If needed, cleanup with manager.stop_scenario()
     """
 
-    def __init__(self, debug_mode=False, sync_mode=False, timeout=2.0):
+    def __init__(self, debug_mode=False, sync_mode=False, timeout=2.0, evaluation_only=False,
+                 substeps=1, pipeline_ticks=False):
         """
         Setups up the parameters, which will be filled at load_scenario()
 
+        If evaluation_only is set, the scenario isn't recorded to video.
+
+        In synchronous mode, the world is ticked 'substeps' times per tick of the scenario tree.
+        With pipeline_ticks, the world tick is sent before evaluating the scenario tree, so that the
+        server simulates the next frame while the tree is ticked. The commands applied by the
+        behaviors are therefore delayed by one frame, so only use it with scenarios that don't
+        depend on same-frame feedback.
         """
         self.scenario = None
         self.scenario_tree = None
@@ -57,11 +66,21 @@ class ScenarioManager(object):
         self._sync_mode = sync_mode
         self._watchdog = None
         self._timeout = timeout
+        self._evaluation_only = evaluation_only
+        self.recorder = None
+        self._substeps = max(1, int(substeps))
+        self._pipeline_ticks = pipeline_ticks
+        self._tick_executor = None
+        self._pending_tick = None
+        self.result_stream = None
 
         self._running = False
         self._timestamp_last_run = 0.0
         self.scenario_duration_system = 0.0
         self.scenario_duration_game = 0.0
+        self.real_time_factor = 0.0
+        self.scenario_cpu_time = 0.0
+        self.cpu_time_per_game_second = 0.0
         self.start_system_time = None
         self.end_system_time = None
 
@@ -73,6 +92,9 @@ class ScenarioManager(object):
         self._timestamp_last_run = 0.0
         self.scenario_duration_system = 0.0
         self.scenario_duration_game = 0.0
+        self.real_time_factor = 0.0
+        self.scenario_cpu_time = 0.0
+        self.cpu_time_per_game_second = 0.0
         self.start_system_time = None
         self.end_system_time = None
         GameTime.restart()
@@ -95,11 +117,12 @@ class ScenarioManager(object):
 
         CarlaDataProvider.cleanup()
 
-    def load_scenario(self, scenario, agent=None):
+    def load_scenario(self, scenario, agent=None, result_stream=None):
         """
-        Load a new scenario
+        Load a new scenario. If given, the results are streamed to the ResultStream while it runs
         """
         self._reset()
+        self.result_stream = result_stream
         self._agent = AgentWrapper(agent) if agent else None
         if self._agent is not None:
             self._sync_mode = True
@@ -120,35 +143,79 @@ class ScenarioManager(object):
         """
         print("ScenarioManager: Running scenario {}".format(self.scenario_tree.name))
         self.start_system_time = time.time()
+        start_cpu_time = time.process_time()
         start_game_time = GameTime.get_time()
 
         self._watchdog = Watchdog(float(self._timeout))
         self._watchdog.start()
         self._running = True
-        self.recorder = ScenarioRecorder(self.ego_vehicles[0])
-
-        while self._running:
-            timestamp = None
-            world = CarlaDataProvider.get_world()
-            if world:
-                snapshot = world.get_snapshot()
-                if snapshot:
-                    timestamp = snapshot.timestamp
-            if timestamp:
-                self._tick_scenario(timestamp)
+        if not self._evaluation_only:
+            self.recorder = ScenarioRecorder(self.ego_vehicles[0])
+        if self._sync_mode and self._pipeline_ticks:
+            self._tick_executor = ThreadPoolExecutor(max_workers=1)
+        if self.result_stream is not None:
+            self.result_stream.start(self)
+
+        try:
+            while self._running:
+                self._wait_for_pending_tick()
+                timestamp = self._get_next_timestamp()
+                if timestamp:
+                    self._tick_scenario(timestamp)
+
+            self._wait_for_pending_tick()
+            if self._tick_executor is not None:
+                self._tick_executor.shutdown()
+                self._tick_executor = None
+
+            self.cleanup()
+            if self.recorder is not None:
+                self.recorder.stop()
+                self.recorder = None
+
+            self.end_system_time = time.time()
+            self.scenario_cpu_time = time.process_time() - start_cpu_time
+            end_game_time = GameTime.get_time()
+
+            self.scenario_duration_system = self.end_system_time - \
+                self.start_system_time
+            self.scenario_duration_game = end_game_time - start_game_time
+            if self.scenario_duration_system > 0:
+                self.real_time_factor = self.scenario_duration_game / self.scenario_duration_system
+            if self.scenario_duration_game > 0:
+                self.cpu_time_per_game_second = self.scenario_cpu_time / self.scenario_duration_game
+            print("ScenarioManager: Real time factor {:.2f}, CPU time per simulated second {:.3f}s".format(
+                self.real_time_factor, self.cpu_time_per_game_second))
+
+            if self.result_stream is not None:
+                self.result_stream.stop(self)
+        finally:
+            # If the run is interrupted, the records queued so far are still written, without the 'end' one
+            if self.result_stream is not None:
+                self.result_stream.close()
 
-        self.cleanup()
-        self.recorder.stop()
+        if self.scenario_tree.status == py_trees.common.Status.FAILURE:
+            print("ScenarioManager: Terminated due to failure")
 
-        self.end_system_time = time.time()
-        end_game_time = GameTime.get_time()
+    def _get_next_timestamp(self):
+        """
+        Returns the timestamp of the current frame. In asynchronous mode, this blocks until
+        the server sends a new frame instead of polling the world snapshot
+        """
+        world = CarlaDataProvider.get_world()
+        if not world:
+            return None
 
-        self.scenario_duration_system = self.end_system_time - \
-            self.start_system_time
-        self.scenario_duration_game = end_game_time - start_game_time
+        if self._sync_mode:
+            snapshot = world.get_snapshot()
+        else:
+            try:
+                snapshot = world.wait_for_tick(float(self._timeout))
+            except RuntimeError:
+                # No frame arrived in time, the watchdog takes care of the timeout
+                return None
 
-        if self.scenario_tree.status == py_trees.common.Status.FAILURE:
-            print("ScenarioManager: Terminated due to failure")
+        return snapshot.timestamp if snapshot else None
 
     def _tick_scenario(self, timestamp):
         """
@@ -174,9 +241,16 @@ class ScenarioManager(object):
             if self._agent is not None:
                 self.ego_vehicles[0].apply_control(ego_action)
 
+            # Let the server simulate the next frame(s) while the tree is ticked
+            if self._tick_executor is not None and self._watchdog.get_status():
+                self._pending_tick = self._tick_executor.submit(self._tick_world)
+
             # Tick scenario
             self.scenario_tree.tick_once()
 
+            if self.result_stream is not None:
+                self.result_stream.on_tick(GameTime.get_time())
+
             if self._debug_mode:
                 print("\n")
                 py_trees.display.print_ascii_tree(self.scenario_tree, show_status=True)
@@ -185,8 +259,24 @@ class ScenarioManager(object):
             if self.scenario_tree.status != py_trees.common.Status.RUNNING:
                 self._running = False
 
-        if self._sync_mode and self._running and self._watchdog.get_status():
-            CarlaDataProvider.get_world().tick()
+        if self._sync_mode and self._running and self._watchdog.get_status() and self._pending_tick is None:
+            self._tick_world()
+
+    def _tick_world(self):
+        """
+        Advances the simulation by the amount of substeps of a scenario tree tick
+        """
+        world = CarlaDataProvider.get_world()
+        for _ in range(self._substeps):
+            world.tick()
+
+    def _wait_for_pending_tick(self):
+        """
+        Waits for the world tick sent at the previous scenario tick, if any
+        """
+        if self._pending_tick is not None:
+            pending_tick, self._pending_tick = self._pending_tick, None
+            pending_tick.result()
 
     def get_running_status(self):
         """
@@ -201,11 +291,12 @@ class ScenarioManager(object):
         """
         self._running = False
 
-    def analyze_scenario(self, stdout, filename, junit, json):
+    def analyze_scenario(self, stdout, filename, junit, json, database=None, run_info=None):
         """
         This function is intended to be called from outside and provide
         the final statistics about the scenario (human-readable, in form of a junit
-        report, etc.)
+        report, etc.). If a database is given, the run is also stored in it, alongside
+        the run_info (scenario_file, map_name and git_commit)
         """
 
         failure = False
@@ -230,7 +321,8 @@ class ScenarioManager(object):
             timeout = True
             result = "TIMEOUT"
 
-        output = ResultOutputProvider(self, result, stdout, filename, junit, json)
+        stream = self.result_stream.filename if self.result_stream is not None else None
+        output = ResultOutputProvider(self, result, stdout, filename, junit, json, stream, database, run_info)
         output.write()
 
         return failure or timeout
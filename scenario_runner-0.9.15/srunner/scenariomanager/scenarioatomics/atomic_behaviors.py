@@ -401,8 +401,13 @@ class UpdateAllActorControls(AtomicBehavior):
         except AttributeError:
             pass
 
+        # The velocity commands of the controllers are sent together
+        batch = []
         for actor_id in actor_dict:
-            actor_dict[actor_id].run_step()
+            actor_dict[actor_id].run_step(batch)
+
+        if batch:
+            CarlaDataProvider.get_client().apply_batch(batch)
 
         return py_trees.common.Status.RUNNING
 
@@ -3451,61 +3456,85 @@ class ActorFlow(AtomicBehavior):
             grp = CarlaDataProvider.get_global_route_planner()
             plan = grp.trace_route(self._source_location, self._sink_location)
 
+            transforms = []
             ref_loc = plan[0][0].transform.location
             for wp, _ in plan:
                 if wp.is_junction and not self._initial_junction:
                     continue  # Spawning at junctions might break the path, so don't
                 if wp.transform.location.distance(ref_loc) < self._spawn_dist:
                     continue
-                self._spawn_actor(wp.transform)
+                transforms.append(wp.transform)
                 ref_loc = wp.transform.location
                 self._spawn_dist = self._rng.uniform(self._min_spawn_dist, self._max_spawn_dist)
 
-    def _spawn_actor(self, transform):
-        actor = CarlaDataProvider.request_new_actor(
-            'vehicle.*', transform, rolename='scenario',
+            self._spawn_actors(transforms)
+
+    def _spawn_actors(self, transforms):
+        """Spawns one actor per transform, all of them with the same command batch"""
+        actors = CarlaDataProvider.request_new_actors_at(
+            'vehicle.*', transforms, rolename='scenario', autopilot=True,
             attribute_filter=self._attribute_filter, tick=False
         )
-        if actor is None:
-            return py_trees.common.Status.RUNNING
+        actors = [actor for actor in actors if actor is not None]
+        if not actors:
+            return
 
-        actor.set_autopilot(True, CarlaDataProvider.get_traffic_manager_port())
-        self._tm.set_path(actor, [self._sink_location])
-        self._tm.auto_lane_change(actor, False)
-        self._tm.set_desired_speed(actor, 3.6 * self._speed)
-        self._tm.update_vehicle_lights(actor, True)
+        # The Traffic Manager has no batch API, so it is configured per actor
+        for actor in actors:
+            self._tm.set_path(actor, [self._sink_location])
+            self._tm.auto_lane_change(actor, False)
+            self._tm.set_desired_speed(actor, 3.6 * self._speed)
+            self._tm.update_vehicle_lights(actor, True)
+            self._tm.ignore_lights_percentage(actor, 100)
+            self._tm.ignore_signs_percentage(actor, 100)
 
         self._spawn_dist = self._rng.uniform(self._min_spawn_dist, self._max_spawn_dist)
 
-        sensor = None
+        sensors = [None] * len(actors)
         if self._is_constant_velocity_active:
-            self._tm.ignore_vehicles_percentage(actor, 100)
-            actor.enable_constant_velocity(carla.Vector3D(self._speed, 0, 0))  # For when physics are active
+            for actor in actors:
+                self._tm.ignore_vehicles_percentage(actor, 100)
+                actor.enable_constant_velocity(carla.Vector3D(self._speed, 0, 0))  # For when physics are active
 
-            sensor = self._world.spawn_actor(self._collision_bp, carla.Transform(), attach_to=actor)
-            sensor.listen(lambda _: self.stop_constant_velocity())
+            batch = [carla.command.SpawnActor(self._collision_bp, carla.Transform(), actor.id) for actor in actors]
+            sensors = CarlaDataProvider.handle_actor_batch(batch, tick=False, aligned=True)
+            for sensor in sensors:
+                if sensor is not None:
+                    sensor.listen(lambda _: self.stop_constant_velocity())
 
-        self._tm.ignore_lights_percentage(actor, 100)
-        self._tm.ignore_signs_percentage(actor, 100)
-        self._collision_sensor_list.append(sensor)
-        self._actor_list.append(actor)
+        self._collision_sensor_list.extend(sensors)
+        self._actor_list.extend(actors)
+
+    def _destroy_actors(self, actors, sensors, stop_actors=False):
+        """Destroys the actors and their collision sensors, all of them with the same command batch"""
+        for sensor in sensors:
+            if sensor is None:
+                continue
+            try:
+                sensor.stop()
+            except RuntimeError:
+                pass  # Actor was already destroyed
+        CarlaDataProvider.remove_actors_batch(list(sensors) + list(actors), stop_actors)
 
     def update(self):
         """Controls the created actors and creaes / removes other when needed"""
         # Control the vehicles, removing them when needed
+        sink_actors = []
+        sink_sensors = []
         for actor, sensor in zip(list(self._actor_list), list(self._collision_sensor_list)):
             location = CarlaDataProvider.get_location(actor)
             if not location:
                 continue
             sink_distance = self._sink_location.distance(location)
             if sink_distance < self._sink_dist:
-                if sensor is not None:
-                    sensor.stop()
-                    sensor.destroy()
+                sink_sensors.append(sensor)
                 self._collision_sensor_list.remove(sensor)
-                actor.destroy()
+                sink_actors.append(actor)
                 self._actor_list.remove(actor)
 
+        if sink_actors:
+            self._destroy_actors(sink_actors, sink_sensors)
+
         # Spawn new actors if needed
         if len(self._actor_list) == 0:
             distance = self._spawn_dist + 1
@@ -3514,7 +3543,7 @@ class ActorFlow(AtomicBehavior):
             distance = self._source_location.distance(actor_location) if actor_location else 0
 
         if distance > self._spawn_dist:
-            self._spawn_actor(self._source_transform)
+            self._spawn_actors([self._source_transform])
 
         return py_trees.common.Status.RUNNING
 
@@ -3534,26 +3563,15 @@ class ActorFlow(AtomicBehavior):
 
         self._terminated = True
 
-        for sensor in self._collision_sensor_list:
-            if sensor is None:
-                continue
-            try:
-                sensor.stop()
-                sensor.destroy()
-            except RuntimeError:
-                pass  # Actor was already destroyed
-
-        for actor in self._actor_list:
-            # TODO: Actors spawned in the same frame as the behavior termination won't be removed.
-            # Patched by removing its movement
-            actor.disable_constant_velocity()
-            actor.set_autopilot(False, CarlaDataProvider.get_traffic_manager_port())
-            actor.set_target_velocity(carla.Vector3D(0,0,0))
-            actor.set_target_angular_velocity(carla.Vector3D(0,0,0))
-            try:
-                actor.destroy()
-            except RuntimeError:
-                pass  # Actor was already destroyed
+        # TODO: Actors spawned in the same frame as the behavior termination won't be removed.
+        # Patched by removing its movement
+        if self._is_constant_velocity_active:
+            for actor in self._actor_list:
+                try:
+                    actor.disable_constant_velocity()
+                except RuntimeError:
+                    pass  # Actor was already destroyed
+        self._destroy_actors(self._actor_list, self._collision_sensor_list, stop_actors=True)
 
 
 class OppositeActorFlow(AtomicBehavior):
@@ -3644,10 +3662,10 @@ class OppositeActorFlow(AtomicBehavior):
         return super().initialise()
 
     def _spawn_actor(self):
-        actor = CarlaDataProvider.request_new_actor(
-            'vehicle.*', self._source_transform, rolename='scenario',
+        actor = CarlaDataProvider.request_new_actors_at(
+            'vehicle.*', [self._source_transform], rolename='scenario',
             attribute_filter=self._attribute_filter, tick=False
-        )
+        )[0]
         if actor is None:
             return py_trees.common.Status.RUNNING
 
@@ -3660,6 +3678,7 @@ class OppositeActorFlow(AtomicBehavior):
     def update(self):
         """Controls the created actors and creates / removes other when needed"""
         # Control the vehicles, removing them when needed
+        sink_actors = []
         for actor_data in list(self._actor_list):
             actor, controller = actor_data
             location = CarlaDataProvider.get_location(actor)
@@ -3667,11 +3686,14 @@ class OppositeActorFlow(AtomicBehavior):
                 continue
             sink_distance = self._sink_location.distance(location)
             if sink_distance < self._sink_dist:
-                actor.destroy()
+                sink_actors.append(actor)
                 self._actor_list.remove(actor_data)
             else:
                 actor.apply_control(controller.run_step())
 
+        if sink_actors:
+            CarlaDataProvider.remove_actors_batch(sink_actors)
+
         # Spawn new actors if needed
         if len(self._actor_list) == 0:
             distance = self._spawn_dist + 1
@@ -3692,17 +3714,9 @@ class OppositeActorFlow(AtomicBehavior):
 
         self._terminated = True
 
-        for actor, _ in self._actor_list:
-            # TODO: Actors spawned in the same frame as the behavior termination won't be removed.
-            # Patched by removing its movement
-            actor.disable_constant_velocity()
-            actor.set_autopilot(False, CarlaDataProvider.get_traffic_manager_port())
-            actor.set_target_velocity(carla.Vector3D(0,0,0))
-            actor.set_target_angular_velocity(carla.Vector3D(0,0,0))
-            try:
-                actor.destroy()
-            except RuntimeError:
-                pass  # Actor was already destroyed
+        # TODO: Actors spawned in the same frame as the behavior termination won't be removed.
+        # Patched by removing its movement
+        CarlaDataProvider.remove_actors_batch([actor for actor, _ in self._actor_list], stop_actors=True)
 
 
 class InvadingActorFlow(AtomicBehavior):
@@ -3761,10 +3775,10 @@ class InvadingActorFlow(AtomicBehavior):
         return super().initialise()
 
     def _spawn_actor(self):
-        actor = CarlaDataProvider.request_new_actor(
-            'vehicle.*', self._source_transform, rolename='scenario',
+        actor = CarlaDataProvider.request_new_actors_at(
+            'vehicle.*', [self._source_transform], rolename='scenario',
             attribute_filter=self._attribute_filter, tick=False
-        )
+        )[0]
         if actor is None:
             return py_trees.common.Status.RUNNING
 
@@ -3775,6 +3789,7 @@ class InvadingActorFlow(AtomicBehavior):
     def update(self):
         """Controls the created actors and creates / removes other when needed"""
         # Control the vehicles, removing them when needed
+        sink_actors = []
         for actor_data in list(self._actor_list):
             actor, controller = actor_data
             location = CarlaDataProvider.get_location(actor)
@@ -3782,11 +3797,14 @@ class InvadingActorFlow(AtomicBehavior):
                 continue
             sink_distance = self._sink_location.distance(location)
             if sink_distance < self._sink_dist:
-                actor.destroy()
+                sink_actors.append(actor)
                 self._actor_list.remove(actor_data)
             else:
                 actor.apply_control(controller.run_step())
 
+        if sink_actors:
+            CarlaDataProvider.remove_actors_batch(sink_actors)
+
         # Spawn new actors if needed
         if len(self._actor_list) == 0:
             distance = self._spawn_dist + 1
@@ -3807,17 +3825,9 @@ class InvadingActorFlow(AtomicBehavior):
 
         self._terminated = True
 
-        for actor, _ in self._actor_list:
-            # TODO: Actors spawned in the same frame as the behavior termination won't be removed.
-            # Patched by removing its movement
-            actor.disable_constant_velocity()
-            actor.set_autopilot(False, CarlaDataProvider.get_traffic_manager_port())
-            actor.set_target_velocity(carla.Vector3D(0,0,0))
-            actor.set_target_angular_velocity(carla.Vector3D(0,0,0))
-            try:
-                actor.destroy()
-            except RuntimeError:
-                pass  # Actor was already destroyed
+        # TODO: Actors spawned in the same frame as the behavior termination won't be removed.
+        # Patched by removing its movement
+        CarlaDataProvider.remove_actors_batch([actor for actor, _ in self._actor_list], stop_actors=True)
 
 
 class BicycleFlow(AtomicBehavior):
@@ -3865,55 +3875,73 @@ class BicycleFlow(AtomicBehavior):
 
     def initialise(self):
         if self._initial_actors:
+            transforms = []
             ref_loc = self._plan[0][0].transform.location
             for wp, _ in self._plan:
                 if wp.is_junction:
                     continue  # Spawning at junctions might break the path, so don't
                 if wp.transform.location.distance(ref_loc) < self._spawn_dist:
                     continue
-                self._spawn_actor(wp.transform)
+                transforms.append(wp.transform)
                 ref_loc = wp.transform.location
                 self._spawn_dist = self._rng.uniform(self._min_spawn_dist, self._max_spawn_dist)
 
-    def _spawn_actor(self, transform):
-        """Spawn the actor"""
-        # Initial actors don't want all the plan. Remove the points behind them
-        plan = self._plan
-        actor_loc = transform.location
-        while len(plan) > 0:
-            wp, _ = plan[0]
-            loc = wp.transform.location
-            actor_heading = transform.get_forward_vector()
-            actor_wp_vec = loc - actor_loc
-            if actor_heading.dot(actor_wp_vec) < 0 or loc.distance(actor_loc) < 10:
-                plan.pop(0)
-            else:
-                break
+            self._spawn_actors(transforms)
+
+    def _spawn_actors(self, transforms):
+        """Spawns one actor per transform, all of them with the same command batch"""
+        ApplyTargetVelocity = carla.command.ApplyTargetVelocity    # pylint: disable=invalid-name
+        ApplyVehicleControl = carla.command.ApplyVehicleControl    # pylint: disable=invalid-name
+        FutureActor = carla.command.FutureActor                    # pylint: disable=invalid-name
+
+        spawn_transforms = []
+        spawn_plans = []
+        extra_commands = []
+        for transform in transforms:
+            # Initial actors don't want all the plan. Remove the points behind them
+            plan = self._plan
+            actor_loc = transform.location
+            while len(plan) > 0:
+                wp, _ = plan[0]
+                loc = wp.transform.location
+                actor_heading = transform.get_forward_vector()
+                actor_wp_vec = loc - actor_loc
+                if actor_heading.dot(actor_wp_vec) < 0 or loc.distance(actor_loc) < 10:
+                    plan.pop(0)
+                else:
+                    break
 
-        if not plan:
-            return
+            if not plan:
+                break
 
-        actor = CarlaDataProvider.request_new_actor(
-            'vehicle.*', transform, rolename='scenario no lights',
-            attribute_filter={'base_type': 'bicycle'}, tick=False
+            initial_vec = plan[0][0].transform.get_forward_vector()
+            spawn_transforms.append(transform)
+            spawn_plans.append(list(plan))
+            extra_commands.append([
+                ApplyTargetVelocity(FutureActor, self._speed * initial_vec),
+                ApplyVehicleControl(FutureActor, carla.VehicleControl(throttle=1, gear=1, manual_gear_shift=True))
+            ])
+
+        actors = CarlaDataProvider.request_new_actors_at(
+            'vehicle.*', spawn_transforms, rolename='scenario no lights',
+            attribute_filter={'base_type': 'bicycle'}, extra_commands=extra_commands, tick=False
         )
-        if actor is None:
-            return
 
-        controller = BasicAgent(actor, 3.6 * self._speed, opt_dict=self._opt_dict,
-            map_inst=CarlaDataProvider.get_map(), grp_inst=CarlaDataProvider.get_global_route_planner())
-        controller.set_global_plan(plan)
+        for actor, plan in zip(actors, spawn_plans):
+            if actor is None:
+                continue
 
-        initial_vec = plan[0][0].transform.get_forward_vector()
-        actor.set_target_velocity(self._speed * initial_vec)
-        actor.apply_control(carla.VehicleControl(throttle=1, gear=1, manual_gear_shift=True))
+            controller = BasicAgent(actor, 3.6 * self._speed, opt_dict=self._opt_dict,
+                map_inst=CarlaDataProvider.get_map(), grp_inst=CarlaDataProvider.get_global_route_planner())
+            controller.set_global_plan(plan)
 
-        self._actor_data.append([actor, controller])
-        self._spawn_dist = self._rng.uniform(self._min_spawn_dist, self._max_spawn_dist)
+            self._actor_data.append([actor, controller])
+            self._spawn_dist = self._rng.uniform(self._min_spawn_dist, self._max_spawn_dist)
 
     def update(self):
         """Controls the created actors and creaes / removes other when needed"""
         # Control the vehicles, removing them when needed
+        sink_actors = []
         for actor_data in list(self._actor_data):
             actor, controller = actor_data
             location = CarlaDataProvider.get_location(actor)
@@ -3921,11 +3949,14 @@ class BicycleFlow(AtomicBehavior):
                 continue
             sink_distance = self._sink_location.distance(location)
             if sink_distance < self._sink_dist:
-                actor.destroy()
+                sink_actors.append(actor)
                 self._actor_data.remove(actor_data)
             else:
                 actor.apply_control(controller.run_step())
 
+        if sink_actors:
+            CarlaDataProvider.remove_actors_batch(sink_actors)
+
         # Spawn new actors if needed
         if len(self._actor_data) == 0:
             distance = self._spawn_dist + 1
@@ -3937,7 +3968,7 @@ class BicycleFlow(AtomicBehavior):
                 distance = self._source_location.distance(actor_location)
 
         if distance > self._spawn_dist:
-            self._spawn_actor(self._source_transform)
+            self._spawn_actors([self._source_transform])
 
         return py_trees.common.Status.RUNNING
 
@@ -3950,17 +3981,9 @@ class BicycleFlow(AtomicBehavior):
 
         self._terminated = True
 
-        for actor, _ in self._actor_data:
-            # TODO: Actors spawned in the same frame as the behavior termination won't be removed.
-            # Patched by removing its movement
-            actor.disable_constant_velocity()
-            actor.set_autopilot(False, CarlaDataProvider.get_traffic_manager_port())
-            actor.set_target_velocity(carla.Vector3D(0,0,0))
-            actor.set_target_angular_velocity(carla.Vector3D(0,0,0))
-            try:
-                actor.destroy()
-            except RuntimeError:
-                pass  # Actor was already destroyed
+        # TODO: Actors spawned in the same frame as the behavior termination won't be removed.
+        # Patched by removing its movement
+        CarlaDataProvider.remove_actors_batch([actor for actor, _ in self._actor_data], stop_actors=True)
 
 
 class OpenVehicleDoor(AtomicBehavior):
@@ -4715,13 +4738,17 @@ class WalkerFlow(AtomicBehavior):
     def update(self):
         """Controls the created actors and creates / removes other when needed"""
         # Remove walkers when needed
-        for item in self._walkers:
-            walker, controller, sink_location = item
+        sink_walkers = []
+        for item in list(self._walkers):
+            walker, _, sink_location = item
             loc = CarlaDataProvider.get_location(walker)
             if loc.distance(sink_location) < self._sink_dist:
-                self._destroy_walker(walker, controller)
+                sink_walkers.append(item)
                 self._walkers.remove(item)
 
+        if sink_walkers:
+            self._destroy_walkers(sink_walkers)
+
         # Spawn new walkers
         if len(self._walkers) == 0:
             distance = self._spawn_dist + 1
@@ -4730,18 +4757,24 @@ class WalkerFlow(AtomicBehavior):
             distance = self._source_location.distance(actor_location)
 
         if distance > self._spawn_dist:
-            # spawn new walkers
+            # spawn new walkers, all of them with the same command batch
             walker_amount = self._rng.choice(self._batch_size_list)
+            spawn_transforms = []
             for i in range(walker_amount):
                 spawn_tran = carla.Transform(self._source_location)
                 spawn_tran.location.y -= i
-                walker = CarlaDataProvider.request_new_actor(
-                    'walker.*', spawn_tran, rolename='scenario'
-                )
-                if walker is None:
+                spawn_transforms.append(spawn_tran)
+
+            walkers = CarlaDataProvider.request_new_actors_at('walker.*', spawn_transforms, rolename='scenario')
+            walkers = [walker for walker in walkers if walker is not None]
+
+            # Use ai.walker to controll walkers
+            batch = [carla.command.SpawnActor(self._controller_bp, carla.Transform(), walker.id) for walker in walkers]
+            controllers = CarlaDataProvider.handle_actor_batch(batch, tick=False, aligned=True) if batch else []
+            for walker, controller in zip(walkers, controllers):
+                if controller is None:
+                    CarlaDataProvider.remove_actors_batch([walker])
                     continue
-                # Use ai.walker to controll walkers
-                controller = self._world.try_spawn_actor(self._controller_bp, carla.Transform(), walker)
                 sink_location = self._rng.choice(a = self._sink_locations, p = self._sink_locations_prob)
                 controller.start()
                 controller.go_to_location(sink_location)
@@ -4752,20 +4785,23 @@ class WalkerFlow(AtomicBehavior):
 
         return py_trees.common.Status.RUNNING
 
-    def _destroy_walker(self, walker, controller):
-        controller.stop()
-        controller.destroy()
-        walker.destroy()
+    def _destroy_walkers(self, walkers):
+        """Destroys the walkers and their controllers, all of them with the same command batch"""
+        actors = []
+        for walker, controller, _ in walkers:
+            try:
+                controller.stop()
+            except RuntimeError:
+                pass  # Actor was already destroyed
+            actors.extend([controller, walker])
+        CarlaDataProvider.remove_actors_batch(actors)
 
     def terminate(self, new_status):
         """
         Default terminate. Can be extended in derived class
         """
-        for walker, controller, _ in self._walkers:
-            try:
-                self._destroy_walker(walker, controller)
-            except RuntimeError:
-                pass  # Actor was already destroyed
+        self._destroy_walkers(self._walkers)
+        self._walkers = []
 
 class AIWalkerBehavior(AtomicBehavior):
     """
@@ -26,6 +26,8 @@ from agents.tools.misc import get_speed
 from srunner.scenariomanager.carla_data_provider import CarlaDataProvider
 from srunner.scenariomanager.timer import GameTime
 from srunner.scenariomanager.traffic_events import TrafficEvent, TrafficEventType
+from srunner.tools.route_index import RouteIndex
+from srunner.tools.scenario_helper import RotatedRectangle
 
 
 class Criterion(py_trees.behaviour.Behaviour):
@@ -295,6 +297,7 @@ class CollisionTest(Criterion):
     COLLISION_RADIUS = 5  # Two collisions that happen within this distance count as one
     MAX_ID_TIME = 5  # Two collisions with the same id that happen within this time count as one
     EPSILON = 0.1  # Collisions at lower this speed won't be counted as the actor's fault
+    BOUNDING_BOX_CHECK_DISTANCE = 30  # Actors further away aren't checked for bounding box collisions
 
     def __init__(self, actor, other_actor=None, other_actor_type=None,
                  optional=False, terminate_on_failure=False, name="CollisionTest"):
@@ -314,7 +317,12 @@ class CollisionTest(Criterion):
 
     def initialise(self):
         """
-        Creates the sensor and callback"""
+        Creates the sensor and callback. In evaluation only mode, no sensor is
+        used and the collisions are detected by overlapping bounding boxes instead"""
+        if CarlaDataProvider.is_evaluation_only_mode():
+            super(CollisionTest, self).initialise()
+            return
+
         world = CarlaDataProvider.get_world()
         blueprint = world.get_blueprint_library().find('sensor.other.collision')
         self._collision_sensor = world.spawn_actor(blueprint, carla.Transform(), attach_to=self.actor)
@@ -332,6 +340,9 @@ class CollisionTest(Criterion):
 
         actor_location = CarlaDataProvider.get_location(self.actor)
 
+        if CarlaDataProvider.is_evaluation_only_mode():
+            self._check_bounding_box_collisions()
+
         # Check if the last collision can be ignored
         if self._collision_location:
             distance_vector = actor_location - self._collision_location
@@ -356,23 +367,66 @@ class CollisionTest(Criterion):
         self._collision_sensor = None
         super(CollisionTest, self).terminate(new_status)
 
-    def _count_collisions(self, event):     # pylint: disable=too-many-return-statements
+    @staticmethod
+    def _get_bounding_box(actor, transform):
+        """Returns the 2D rectangle of the actor's bounding box, together with its lowest and highest z values"""
+        bbox = actor.bounding_box
+        center = transform.transform(carla.Location(bbox.location.x, bbox.location.y, bbox.location.z))
+        rectangle = RotatedRectangle(center.x, center.y, 2 * bbox.extent.x, 2 * bbox.extent.y, transform.rotation.yaw)
+        return rectangle, center.z - bbox.extent.z, center.z + bbox.extent.z
+
+    def _check_bounding_box_collisions(self):
+        """
+        Sensor free collision detection, checking the actor's bounding box against the ones of
+        the nearby vehicles, walkers and props. Collisions against the map geometry aren't detected
+        """
+        actor_transform = CarlaDataProvider.get_transform(self.actor)
+        if actor_transform is None:
+            return
+        actor_rectangle, actor_bottom, actor_top = self._get_bounding_box(self.actor, actor_transform)
+
+        for other_actor in CarlaDataProvider.get_all_actors():
+            if other_actor.id == self.actor.id:
+                continue
+            if not other_actor.type_id.startswith(('vehicle.', 'walker.', 'static.prop.')):
+                continue
+            # Only the actors spawned by the scenario runner have their pose cached by the CarlaDataProvider
+            if CarlaDataProvider.actor_id_exists(other_actor.id):
+                other_transform = CarlaDataProvider.get_transform(other_actor)
+            else:
+                other_transform = other_actor.get_transform()
+            if other_transform is None:
+                continue
+            if other_transform.location.distance(actor_transform.location) > self.BOUNDING_BOX_CHECK_DISTANCE:
+                continue
+            other_rectangle, other_bottom, other_top = self._get_bounding_box(other_actor, other_transform)
+            # Actors at different heights, such as on a bridge and below it, don't collide
+            if other_bottom > actor_top or other_top < actor_bottom:
+                continue
+            if actor_rectangle.intersection(other_rectangle).area > 0:
+                self._register_collision(other_actor)
+
+    def _count_collisions(self, event):
         """Update collision count"""
+        self._register_collision(event.other_actor)
+
+    def _register_collision(self, other_actor):     # pylint: disable=too-many-return-statements
+        """Checks if the collision against the other actor is valid and if so, updates the collision count"""
         actor_location = CarlaDataProvider.get_location(self.actor)
 
         # Check if the care about the other actor
-        if self._other_actor and self._other_actor.id != event.other_actor.id:
+        if self._other_actor and self._other_actor.id != other_actor.id:
             return
 
         if self._other_actor_type:
             if self._other_actor_type == "miscellaneous":  # Special OpenScenario case
-                if "traffic" not in event.other_actor.type_id and "static" not in event.other_actor.type_id:
+                if "traffic" not in other_actor.type_id and "static" not in other_actor.type_id:
                     return
-            elif self._other_actor_type not in event.other_actor.type_id:
+            elif self._other_actor_type not in other_actor.type_id:
                     return
 
         # To avoid multiple counts of the same collision, filter some of them.
-        if self._collision_id == event.other_actor.id:
+        if self._collision_id == other_actor.id:
             return
         if self._collision_location:
             distance_vector = actor_location - self._collision_location
@@ -389,25 +443,25 @@ class CollisionTest(Criterion):
 
         self._collision_time = GameTime.get_time()
         self._collision_location = actor_location
-        if event.other_actor.id != 0: # Number 0: static objects -> ignore it
-            self._collision_id = event.other_actor.id
+        if other_actor.id != 0: # Number 0: static objects -> ignore it
+            self._collision_id = other_actor.id
 
-        if ('static' in event.other_actor.type_id or 'traffic' in event.other_actor.type_id) \
-                and 'sidewalk' not in event.other_actor.type_id:
+        if ('static' in other_actor.type_id or 'traffic' in other_actor.type_id) \
+                and 'sidewalk' not in other_actor.type_id:
             actor_type = TrafficEventType.COLLISION_STATIC
-        elif 'vehicle' in event.other_actor.type_id:
+        elif 'vehicle' in other_actor.type_id:
             actor_type = TrafficEventType.COLLISION_VEHICLE
-        elif 'walker' in event.other_actor.type_id:
+        elif 'walker' in other_actor.type_id:
             actor_type = TrafficEventType.COLLISION_PEDESTRIAN
         else:
             return
 
         collision_event = TrafficEvent(event_type=actor_type, frame=GameTime.get_frame())
-        collision_event.set_dict({'other_actor': event.other_actor, 'location': actor_location})
+        collision_event.set_dict({'other_actor': other_actor, 'location': actor_location})
         collision_event.set_message(
             "Agent collided against object with type={} and id={} at (x={}, y={}, z={})".format(
-                event.other_actor.type_id,
-                event.other_actor.id,
+                other_actor.type_id,
+                other_actor.id,
                 round(actor_location.x, 3),
                 round(actor_location.y, 3),
                 round(actor_location.z, 3)))
@@ -1006,9 +1060,9 @@ class OutsideRouteLanesTest(Criterion):
         self.units = "%"
 
         self._route = route
+        self._route_index = RouteIndex.get(self._route)
+        self._cursor = (self.actor.id, name)
         self._current_index = 0
-        self._route_length = len(self._route)
-        self._route_transforms, _ = zip(*self._route)
 
         self._map = CarlaDataProvider.get_map()
         self._last_ego_waypoint = self._map.get_waypoint(self.actor.get_location())
@@ -1052,29 +1106,20 @@ class OutsideRouteLanesTest(Criterion):
             self.test_status = "FAILURE"
 
         # Get the traveled distance
-        for index in range(self._current_index + 1,
-                           min(self._current_index + self.WINDOWS_SIZE + 1, self._route_length)):
-            # Get the dot product to know if it has passed this location
-            route_transform = self._route_transforms[index]
-            route_location = route_transform.location
-
-            wp_dir = route_transform.get_forward_vector()  # Waypoint's forward vector
-            wp_veh = location - route_location  # vector waypoint - vehicle
+        index = self._route_index.advance(self._cursor, location, self.WINDOWS_SIZE)
+        if index != self._current_index:
+            # Get the distance traveled and add it to the total distance
+            new_dist = self._route_index.get_distance(self._current_index, index)
+            self._total_distance += new_dist
 
-            if wp_veh.dot(wp_dir) > 0:
-                # Get the distance traveled and add it to the total distance
-                prev_route_location = self._route_transforms[self._current_index].location
-                new_dist = prev_route_location.distance(route_location)
-                self._total_distance += new_dist
+            # And to the wrong one if outside route lanes
+            if self._outside_lane_active or (self._wrong_direction_active and self._wrong_lane_active):
+                self._wrong_distance += new_dist
 
-                # And to the wrong one if outside route lanes
-                if self._outside_lane_active or (self._wrong_direction_active and self._wrong_lane_active):
-                    self._wrong_distance += new_dist
+            if self._wrong_distance:
+                self._set_traffic_event()
 
-                if self._wrong_distance:
-                    self._set_traffic_event()
-
-                self._current_index = index
+            self._current_index = index
 
         self.logger.debug("%s.update()[%s->%s]" % (self.__class__.__name__, self.status, new_status))
         return new_status
@@ -1415,22 +1460,11 @@ class InRouteTest(Criterion):
             self._offroad_min = self._offroad_min
 
         self._world = CarlaDataProvider.get_world()
-        self._route_transforms, _ = zip(*self._route)
-        self._route_length = len(self._route)
+        self._route_index = RouteIndex.get(self._route)
         self._current_index = 0
         self._out_route_distance = 0
         self._in_safe_route = True
 
-        self._accum_meters = []
-        prev_loc = self._route_transforms[0].location
-        for i, tran in enumerate(self._route_transforms):
-            loc = tran.location
-            d = loc.distance(prev_loc)
-            accum = 0 if i == 0 else self._accum_meters[i - 1]
-
-            self._accum_meters.append(d + accum)
-            prev_loc = loc
-
         # Blackboard variable
         blackv = py_trees.blackboard.Blackboard()
         _ = blackv.set("InRoute", True)
@@ -1452,19 +1486,11 @@ class InRouteTest(Criterion):
 
             off_route = True
 
-            shortest_distance = float('inf')
-            closest_index = -1
-
             # Get the closest distance
-            for index in range(self._current_index,
-                               min(self._current_index + self.WINDOWS_SIZE + 1, self._route_length)):
-                ref_location = self._route_transforms[index].location
-                distance = math.sqrt(((location.x - ref_location.x) ** 2) + ((location.y - ref_location.y) ** 2))
-                if distance <= shortest_distance:
-                    closest_index = index
-                    shortest_distance = distance
-
-            if closest_index == -1 or shortest_distance == float('inf'):
+            closest_index, shortest_distance = self._route_index.get_closest_index(
+                location, self._current_index, self.WINDOWS_SIZE)
+
+            if shortest_distance == float('inf'):
                 return new_status
 
             # Check if the actor is out of route
@@ -1475,12 +1501,12 @@ class InRouteTest(Criterion):
             # If actor advanced a step, record the distance
             if self._current_index != closest_index:
 
-                new_dist = self._accum_meters[closest_index] - self._accum_meters[self._current_index]
+                new_dist = self._route_index.get_distance(self._current_index, closest_index)
 
                 # If too far from the route, add it and check if its value
                 if not self._in_safe_route:
                     self._out_route_distance += new_dist
-                    out_route_percentage = 100 * self._out_route_distance / self._accum_meters[-1]
+                    out_route_percentage = 100 * self._out_route_distance / self._route_index.length
                     if out_route_percentage > self.MAX_ROUTE_PERCENTAGE:
                         off_route = True
 
@@ -1536,31 +1562,17 @@ class RouteCompletionTest(Criterion):
         self._map = CarlaDataProvider.get_map()
 
         self._index = 0
-        self._route_length = len(self._route)
-        self._route_transforms, _ = zip(*self._route)
-        self._route_accum_perc = self._get_acummulated_percentages()
+        self._route_index = RouteIndex.get(self._route)
+        self._cursor = (self.actor.id, name)
+        self._route_accum_perc = self._route_index.accum / self._route_index.length * 100
 
-        self.target_location = self._route_transforms[-1].location
+        self.target_location = self._route_index.get_location(-1)
 
         self._traffic_event = TrafficEvent(event_type=TrafficEventType.ROUTE_COMPLETION, frame=0)
         self._traffic_event.set_dict({'route_completed': self.actual_value})
         self._traffic_event.set_message("Agent has completed {} of the route".format(self.actual_value))
         self.events.append(self._traffic_event)
 
-    def _get_acummulated_percentages(self):
-        """Gets the accumulated percentage of each of the route transforms"""
-        accum_meters = []
-        prev_loc = self._route_transforms[0].location
-        for i, tran in enumerate(self._route_transforms):
-            d = tran.location.distance(prev_loc)
-            new_d = 0 if i == 0 else accum_meters[i - 1]
-
-            accum_meters.append(d + new_d)
-            prev_loc = tran.location
-
-        max_dist = accum_meters[-1]
-        return [x / max_dist * 100 for x in accum_meters]
-
     def update(self):
         """
         Check if the actor location is within trigger region
@@ -1576,16 +1588,10 @@ class RouteCompletionTest(Criterion):
 
         elif self.test_status in ('RUNNING', 'INIT'):
 
-            for index in range(self._index, min(self._index + self.WINDOWS_SIZE + 1, self._route_length)):
-                # Get the dot product to know if it has passed this location
-                route_transform = self._route_transforms[index]
-                route_location = route_transform.location
-                wp_dir = route_transform.get_forward_vector()          # Waypoint's forward vector
-                wp_veh = location - route_location                     # vector route - vehicle
-
-                if wp_veh.dot(wp_dir) > 0:
-                    self._index = index
-                    self.actual_value = self._route_accum_perc[self._index]
+            index = self._route_index.advance(self._cursor, location, self.WINDOWS_SIZE)
+            if index != self._index:
+                self._index = index
+                self.actual_value = float(self._route_accum_perc[self._index])
 
             self.actual_value = round(self.actual_value, 2)
             self._traffic_event.set_dict({'route_completed': self.actual_value})
@@ -1976,16 +1982,9 @@ class MinimumSpeedRouteTest(Criterion):
         self.actual_value = 100
 
         self._route = route
-        self._accum_dist = []
-        prev_trans = None
-        for trans, _ in route:
-            if prev_trans:
-                dist = trans.location.distance(prev_trans.location)
-                self._accum_dist.append(dist + self._accum_dist[-1])
-            else:
-                self._accum_dist.append(0)
-            prev_trans = trans
-        self._route_length = len(self._route)
+        self._route_index = RouteIndex.get(self._route)
+        self._cursor = (self.actor.id, name)
+        self._accum_dist = self._route_index.accum
 
         self._checkpoints = checkpoints
         self._checkpoint_dist = self._accum_dist[-1] / self._checkpoints
@@ -2014,15 +2013,7 @@ class MinimumSpeedRouteTest(Criterion):
         if location is None:
             return new_status
 
-        for index in range(self._index, min(self._index + self.WINDOWS_SIZE + 1, self._route_length)):
-            # Get the dot product to know if it has passed this location
-            route_transform = self._route[index][0]
-            route_location = route_transform.location
-            wp_dir = route_transform.get_forward_vector()
-            wp_veh = location - route_location
-
-            if wp_veh.dot(wp_dir) > 0:
-                self._index = index
+        self._index = self._route_index.advance(self._cursor, location, self.WINDOWS_SIZE)
 
         if self._accum_dist[self._index] - self._current_dist > self._checkpoint_dist:
             self._set_traffic_event()
@@ -2037,8 +2028,7 @@ class MinimumSpeedRouteTest(Criterion):
             return new_status
 
         # Get the speed of the surrounding Background Activity
-        all_vehicles = CarlaDataProvider.get_all_actors().filter('vehicle*')
-        background_vehicles = [v for v in all_vehicles if v.attributes['role_name'] == 'background']
+        background_vehicles = CarlaDataProvider.get_actors_by_role_name('background', 'vehicle')
 
         if background_vehicles:
             frame_mean_speed = 0
@@ -15,6 +15,7 @@ import operator
 import py_trees
 
 from srunner.scenariomanager.carla_data_provider import CarlaDataProvider
+from srunner.tools.route_index import RouteIndex
 
 
 class GameTime(object):
@@ -184,19 +185,8 @@ class RouteTimeoutBehavior(py_trees.behaviour.Behaviour):
         # Route variables
         self._wsize = 3
         self._current_index = 0
-
-        self._route_length = len(self._route)
-        self._route_transforms, _ = zip(*self._route)
-
-        self._route_accum_meters = []
-        prev_loc = self._route_transforms[0].location
-        for i, tran in enumerate(self._route_transforms):
-            loc = tran.location
-            d = loc.distance(prev_loc)
-            accum = 0 if i == 0 else self._route_accum_meters[i - 1]
-
-            self._route_accum_meters.append(d + accum)
-            prev_loc = loc
+        self._route_index = RouteIndex.get(self._route)
+        self._cursor = (self._ego_vehicle.id, name)
 
     def initialise(self):
         """
@@ -217,17 +207,11 @@ class RouteTimeoutBehavior(py_trees.behaviour.Behaviour):
         if ego_location is None:
             return new_status
 
-        new_index = self._current_index
-
-        for index in range(self._current_index, min(self._current_index + self._wsize + 1, self._route_length)):
-            route_transform = self._route_transforms[index]
-            route_veh_vec = ego_location - route_transform.location
-            if route_veh_vec.dot(route_transform.get_forward_vector()) > 0:
-                new_index = index
+        new_index = self._route_index.advance(self._cursor, ego_location, self._wsize)
 
         # Update the timeout value
         if new_index > self._current_index:
-            dist = self._route_accum_meters[new_index] - self._route_accum_meters[self._current_index]
+            dist = self._route_index.get_distance(self._current_index, new_index)
             max_speed = self._ego_vehicle.get_speed_limit() / 3.6
             timeout_speed = max_speed * self.TIMEOUT_ROUTE_PERC / 100
             self._timeout_value += dist / timeout_speed
@@ -9,6 +9,10 @@ Scenario spawning elements to make the town dynamic and interesting
 """
 
 from collections import OrderedDict
+import hashlib
+import logging
+import os
+import pickle
 import py_trees
 
 import carla
@@ -17,6 +21,8 @@ from agents.navigation.local_planner import RoadOption
 
 from srunner.scenariomanager.carla_data_provider import CarlaDataProvider
 from srunner.scenariomanager.scenarioatomics.atomic_behaviors import AtomicBehavior
+from srunner.tools.route_index import RouteIndex
+from srunner.tools.route_manipulation import get_map_hash
 from srunner.tools.scenario_helper import get_same_dir_lanes, get_opposite_dir_lanes
 
 JUNCTION_ENTRY = 'entry'
@@ -46,6 +52,10 @@ def get_lane_key_from_ids(road_id, lane_id):
     """Returns the lane corresping to a given road and lane ids"""
     return str(road_id) + '*' + str(lane_id)
 
+def get_xodr_key(waypoint):
+    """Returns the OpenDRIVE coordinates of a waypoint, used to store it"""
+    return (waypoint.road_id, waypoint.lane_id, waypoint.s)
+
 
 # Debug variables
 DEBUG_ROAD = 'road'
@@ -165,8 +175,14 @@ class Junction(object):
 class BackgroundBehavior(AtomicBehavior):
     """
     Handles the background activity
+
+    If route_cache_dir is set, the route annotation (route waypoints, junctions and their topology)
+    is stored at that folder and reused by the following runs of the same route and map
     """
 
+    route_cache_dir = None
+    ROUTE_CACHE_VERSION = 1
+
     def __init__(self, ego_actor, route, debug=False, name="BackgroundBehavior"):
         """
         Setup class members
@@ -193,6 +209,11 @@ class BackgroundBehavior(AtomicBehavior):
         self._all_actors = []
         self._lane_width_threshold = 2.25  # Used to stop some behaviors at narrow lanes to avoid problems [m]
 
+        self._actor_wps = {}  # Dictionary actor - [location, waypoint], updated each tick
+        self._lane_actors = {}  # Dictionary lane key - list of (index, actor), grouping the actors by lane
+        self._actor_wp_update_dist = 0.2  # Actors that moved less than this keep their waypoint [m]
+        self._ending_lanes = {}  # Dictionary (road id, lane id, s) - whether or not the lane is ending
+
         self._spawn_vertical_shift = 0.2
         self._reuse_dist = 10  # When spawning actors, might reuse actors closer to this distance
         self._spawn_free_radius = 20  # Sources closer to the ego will not spawn actors
@@ -251,8 +272,8 @@ class BackgroundBehavior(AtomicBehavior):
         self._active_opposite_sources = True  # Flag to (de)activate all opposite sources
 
         # Scenario variables:
-        self._scenario_stopped_actors = []  # Actors stopped by a hard break scenario
-        self._scenario_stopped_back_actors = []  # Actors stopped by a open doors scenario
+        self._scenario_stopped_actors = set()  # Actors stopped by a hard break scenario
+        self._scenario_stopped_back_actors = set()  # Actors stopped by a open doors scenario
         self._scenario_max_speed = 0  # Max speed of the Background Activity. Deactivated with a value of 0
         self._scenario_junction_entry = False  # Flag indicating the ego is entering a junction
         self._scenario_junction_entry_distance = self._road_spawn_dist  # Min distance between vehicles and ego
@@ -261,20 +282,23 @@ class BackgroundBehavior(AtomicBehavior):
 
     def _get_route_data(self, route):
         """Extract the information from the route"""
-        self._route = []  # Transform the route into a list of waypoints
-        self._route_options = []  # Extract the RoadOptions from the route
-        self._accum_dist = []  # Save the total traveled distance for each waypoint
-        prev_trans = None
-        for trans, option in route:
-            self._route.append(self._map.get_waypoint(trans.location))
-            self._route_options.append(option)
-            if prev_trans:
-                dist = trans.location.distance(prev_trans.location)
-                self._accum_dist.append(dist + self._accum_dist[-1])
-            else:
-                self._accum_dist.append(0)
-            prev_trans = trans
-
+        self._route_options = [option for _, option in route]  # Extract the RoadOptions from the route
+
+        # Transform the route into a list of waypoints
+        self._route_cache = None
+        if self.route_cache_dir and not self.debug:
+            self._route_cache = self._get_route_cache_file(route)
+        self._route_annotation = self._load_route_annotation()
+        if self._route_annotation is not None:
+            self._route = [self._map.get_waypoint_xodr(*key) for key in self._route_annotation['route']]
+            if None in self._route:
+                self._route_annotation = None
+        if self._route_annotation is None:
+            self._route = [self._map.get_waypoint(trans.location) for trans, _ in route]
+
+        self._route_progress = RouteIndex.get(route)
+        self._route_cursor = (self._ego_actor.id, self.name)
+        self._accum_dist = self._route_progress.accum  # Save the total traveled distance for each waypoint
         self._route_length = len(route)
         self._route_index = 0
         self._route_buffer = 3
@@ -308,6 +332,7 @@ class BackgroundBehavior(AtomicBehavior):
 
         # Update ego's route position. For robustness, the route point is used for most calculus
         self._update_ego_data()
+        self._update_actor_waypoints()
 
         # Parameters and scenarios
         self._update_parameters()
@@ -350,23 +375,158 @@ class BackgroundBehavior(AtomicBehavior):
 
     def _check_background_actors(self):
         """Checks if the Traffic Manager has removed a backgroudn actor"""
-        alive_ids = [actor.id for actor in CarlaDataProvider.get_all_actors().filter('vehicle*')]
+        alive_ids = {actor.id for actor in CarlaDataProvider.get_all_actors().filter('vehicle*')}
         for actor in list(self._all_actors):
             if actor.id not in alive_ids:
                 self._remove_actor_info(actor)
 
+    def _get_actor_waypoint(self, actor, location):
+        """
+        Returns the waypoint of an actor. It is only recomputed if the actor has moved
+        since the last time it was calculated
+        """
+        actor_data = self._actor_wps.get(actor)
+        if actor_data is None or actor_data[0].distance(location) > self._actor_wp_update_dist:
+            actor_data = [location, self._map.get_waypoint(location)]
+            self._actor_wps[actor] = actor_data
+        return actor_data[1]
+
+    def _update_actor_waypoints(self):
+        """Updates the waypoints of all the actors, grouping them by their lane"""
+        self._lane_actors = {}
+        for i, actor in enumerate(self._all_actors):
+            location = CarlaDataProvider.get_location(actor)
+            if location is None:
+                continue
+            lane_key = get_lane_key(self._get_actor_waypoint(actor, location))
+            self._lane_actors.setdefault(lane_key, []).append((i, actor))
+
+    def _is_ending_lane(self, waypoint):
+        """Checks if the lane of a waypoint is narrowing, which happens at ending lanes"""
+        key = (waypoint.road_id, waypoint.lane_id, round(waypoint.s))
+        if key not in self._ending_lanes:
+            next_wps = waypoint.next(0.5)
+            self._ending_lanes[key] = bool(next_wps) and next_wps[0].lane_width < waypoint.lane_width
+        return self._ending_lanes[key]
+
     ################################
     ##       Junction cache       ##
     ################################
 
     def _create_junction_dict(self):
         """Extracts the junctions the ego vehicle will pass through."""
+        if self._route_annotation is not None and self._set_junction_annotation(self._route_annotation):
+            return
+
         data = self._get_junctions_data()
         fake_data, filtered_data = self._filter_fake_junctions(data)
         self._get_fake_lane_pairs(fake_data)
         route_data = self._join_complex_junctions(filtered_data)
         self._add_junctions_topology(route_data)
         self._junctions = route_data
+        self._store_route_annotation()
+
+    def _get_route_cache_file(self, route):
+        """Returns the file where the annotation of the route is cached, and its key"""
+        locations = ['{:.2f},{:.2f},{:.2f}'.format(t.location.x, t.location.y, t.location.z) for t, _ in route]
+        route_hash = hashlib.sha1(';'.join(locations).encode('utf-8')).hexdigest()
+        map_name = self._map.name.split('/')[-1]
+        filename = os.path.join(self.route_cache_dir, '{}_{}.pkl'.format(map_name, route_hash))
+        return filename, (self.ROUTE_CACHE_VERSION, get_map_hash(self._map), route_hash)
+
+    def _load_route_annotation(self):
+        """Returns the cached annotation of the route, or None if it isn't available or the map has changed"""
+        if self._route_cache is None:
+            return None
+
+        filename, cache_key = self._route_cache
+        if not os.path.isfile(filename):
+            return None
+        try:
+            with open(filename, 'rb') as cache_file:
+                key, annotation = pickle.load(cache_file)
+        except (IOError, OSError, EOFError, pickle.UnpicklingError, AttributeError, ValueError):
+            return None
+        return annotation if key == cache_key else None
+
+    def _store_route_annotation(self):
+        """Saves the route waypoints and junctions to the route cache"""
+        if self._route_cache is None:
+            return
+
+        junctions = []
+        for junction_data in self._junctions:
+            junctions.append({
+                'id': junction_data.id,
+                'route_entry_index': junction_data.route_entry_index,
+                'route_exit_index': junction_data.route_exit_index,
+                # A waypoint inside each of the junctions
+                'junctions': [get_xodr_key(j.get_waypoints(carla.LaneType.Driving)[0][0])
+                              for j in junction_data.junctions],
+                'entry_wps': [get_xodr_key(wp) for wp in junction_data.entry_wps],
+                'exit_wps': [get_xodr_key(wp) for wp in junction_data.exit_wps],
+                'entry_lane_keys': junction_data.entry_lane_keys,
+                'exit_lane_keys': junction_data.exit_lane_keys,
+                'route_entry_keys': junction_data.route_entry_keys,
+                'route_exit_keys': junction_data.route_exit_keys,
+                'opposite_entry_keys': junction_data.opposite_entry_keys,
+                'opposite_exit_keys': junction_data.opposite_exit_keys,
+                'entry_directions': junction_data.entry_directions,
+                'exit_directions': junction_data.exit_directions,
+            })
+        annotation = {
+            'route': [get_xodr_key(wp) for wp in self._route],
+            'fake_junction_ids': self._fake_junction_ids,
+            'fake_lane_pair_keys': self._fake_lane_pair_keys,
+            'junctions': junctions,
+        }
+
+        filename, cache_key = self._route_cache
+        try:
+            if not os.path.isdir(self.route_cache_dir):
+                os.makedirs(self.route_cache_dir)
+            with open(filename, 'wb') as cache_file:
+                pickle.dump((cache_key, annotation), cache_file, pickle.HIGHEST_PROTOCOL)
+        except (IOError, OSError, pickle.PicklingError) as e:
+            logging.getLogger("[SR:BackgroundBehavior]").warning(
+                " Could not store the route annotation at %s: %s", filename, e)
+
+    def _set_junction_annotation(self, annotation):
+        """Creates the route junctions from the cached annotation. Returns False if it can't be used"""
+        junctions = []
+        for data in annotation['junctions']:
+            junction_wps = [self._map.get_waypoint_xodr(*key) for key in data['junctions']]
+            entry_wps = [self._map.get_waypoint_xodr(*key) for key in data['entry_wps']]
+            exit_wps = [self._map.get_waypoint_xodr(*key) for key in data['exit_wps']]
+            if None in junction_wps or None in entry_wps or None in exit_wps:
+                return False
+
+            junction_data = Junction(junction_wps[0].get_junction(), data['id'],
+                                     data['route_entry_index'], data['route_exit_index'])
+            junction_data.junctions = [wp.get_junction() for wp in junction_wps]
+            junction_data.entry_wps = entry_wps
+            junction_data.exit_wps = exit_wps
+            junction_data.entry_lane_keys = list(data['entry_lane_keys'])
+            junction_data.exit_lane_keys = list(data['exit_lane_keys'])
+            junction_data.route_entry_keys = list(data['route_entry_keys'])
+            junction_data.route_exit_keys = list(data['route_exit_keys'])
+            junction_data.opposite_entry_keys = list(data['opposite_entry_keys'])
+            junction_data.opposite_exit_keys = list(data['opposite_exit_keys'])
+            junction_data.entry_directions = {k: list(v) for k, v in data['entry_directions'].items()}
+            junction_data.exit_directions = {k: list(v) for k, v in data['exit_directions'].items()}
+            for exit_wp in exit_wps:
+                junction_data.exit_dict[get_lane_key(exit_wp)] = {
+                    'actors': [],
+                    'max_actors': 0,
+                    'ref_wp': None,
+                    'max_distance': 0,
+                }
+            junctions.append(junction_data)
+
+        self._fake_junction_ids = list(annotation['fake_junction_ids'])
+        self._fake_lane_pair_keys = list(annotation['fake_lane_pair_keys'])
+        self._junctions = junctions
+        return True
 
     def _get_junctions_data(self):
         """Gets all the junctions the ego passes through"""
@@ -999,9 +1159,14 @@ class BackgroundBehavior(AtomicBehavior):
             source.previous_lane_keys = [get_lane_key(prev_wp) for prev_wp in source.wp.previous(self._reuse_dist)]
             source.previous_lane_keys.append(get_lane_key(source.wp))
 
-        for actor in self._all_actors:
-            if actor in source.actors:
-                continue  # Don't use actors already part of the source
+        # Only check the actors at the lanes that pass through the source
+        candidates = []
+        for lane_key in source.previous_lane_keys:
+            candidates.extend(self._lane_actors.get(lane_key, []))
+
+        for _, actor in sorted(candidates, key=lambda candidate: candidate[0]):
+            if actor in source.actors or actor not in self._actor_wps:
+                continue  # Don't use actors already part of the source, or removed ones
 
             actor_location = CarlaDataProvider.get_location(actor)
             if actor_location is None:
@@ -1009,7 +1174,7 @@ class BackgroundBehavior(AtomicBehavior):
             if source_location.distance(actor_location) > self._reuse_dist:
                 continue  # Don't use actors far away
 
-            actor_wp = self._map.get_waypoint(actor_location)
+            actor_wp = self._get_actor_waypoint(actor, actor_location)
             if get_lane_key(actor_wp) not in source.previous_lane_keys:
                 continue  # Don't use actors that won't pass through the source
 
@@ -1745,7 +1910,7 @@ class BackgroundBehavior(AtomicBehavior):
             for actor in self._road_dict[lane].actors:
                 location = CarlaDataProvider.get_location(actor)
                 if location and not self._is_location_behind_ego(location):
-                    self._scenario_stopped_actors.append(actor)
+                    self._scenario_stopped_actors.add(actor)
                     self._actors_speed_perc[actor] = 0
                     self._tm.update_vehicle_lights(actor, False)
                     lights = actor.get_light_state()
@@ -1762,7 +1927,7 @@ class BackgroundBehavior(AtomicBehavior):
             lights = actor.get_light_state()
             lights &= ~carla.VehicleLightState.Brake
             actor.set_light_state(carla.VehicleLightState(lights))
-        self._scenario_stopped_actors = []
+        self._scenario_stopped_actors = set()
 
     def _stop_road_back_vehicles(self):
         """
@@ -1773,7 +1938,7 @@ class BackgroundBehavior(AtomicBehavior):
                 location = CarlaDataProvider.get_location(actor)
                 if location and self._is_location_behind_ego(location):
                     self._actors_speed_perc[actor] = 0
-                    self._scenario_stopped_back_actors.append(actor)
+                    self._scenario_stopped_back_actors.add(actor)
 
     def _start_road_back_vehicles(self):
         """
@@ -1781,7 +1946,7 @@ class BackgroundBehavior(AtomicBehavior):
         """
         for actor in self._scenario_stopped_back_actors:
             self._actors_speed_perc[actor] = 100
-        self._scenario_stopped_back_actors = []
+        self._scenario_stopped_back_actors = set()
 
     def _move_actors_forward(self, actors, space):
         """Teleports the actors forward a set distance"""
@@ -2197,7 +2362,7 @@ class BackgroundBehavior(AtomicBehavior):
         Not applied to those behind it so that they can catch up it
         """
         # Updates their speed
-        scenario_actors = self._scenario_stopped_actors + self._scenario_stopped_back_actors
+        scenario_actors = self._scenario_stopped_actors | self._scenario_stopped_back_actors
         for lane_key in self._road_dict:
             for i, actor in enumerate(self._road_dict[lane_key].actors):
                 location = CarlaDataProvider.get_location(actor)
@@ -2215,12 +2380,11 @@ class BackgroundBehavior(AtomicBehavior):
                     continue
 
                 # TODO: Lane changes are weird with the TM, so just stop them
-                actor_wp = self._map.get_waypoint(location)
+                actor_wp = self._get_actor_waypoint(actor, location)
                 if actor_wp.lane_width < self._lane_width_threshold:
 
                     # Ensure only ending lanes are affected. not sure if it is needed though
-                    next_wps = actor_wp.next(0.5)
-                    if next_wps and next_wps[0].lane_width < actor_wp.lane_width:
+                    if self._is_ending_lane(actor_wp):
                         actor.set_target_velocity(carla.Vector3D(0, 0, 0))
                         self._actors_speed_perc[actor] = 0
                         lights = actor.get_light_state()
@@ -2388,11 +2552,11 @@ class BackgroundBehavior(AtomicBehavior):
             actor_dict = junction.actor_dict
             exit_dict = junction.exit_dict
 
-            scenario_entry_actor_ids = []
+            scenario_entry_actor_ids = set()
             if self._scenario_junction_entry:
                 for source in junction.entry_sources:
                     if get_lane_key(source.wp) in junction.route_entry_keys:
-                        scenario_entry_actor_ids.extend([x.id for x in source.actors])
+                        scenario_entry_actor_ids.update(x.id for x in source.actors)
 
             for actor in list(actor_dict):
                 if actor not in actor_dict:
@@ -2412,7 +2576,7 @@ class BackgroundBehavior(AtomicBehavior):
 
                 # Monitor its entry
                 elif state == JUNCTION_ENTRY:
-                    actor_wp = self._map.get_waypoint(location)
+                    actor_wp = self._get_actor_waypoint(actor, location)
                     if self._is_junction(actor_wp) and junction.contains_wp(actor_wp):
                         if junction.clear_middle:
                             self._destroy_actor(actor)  # Don't clutter the junction if a junction scenario is active
@@ -2421,7 +2585,7 @@ class BackgroundBehavior(AtomicBehavior):
 
                 # Monitor its exit and destroy an actor if needed
                 elif state == JUNCTION_MIDDLE:
-                    actor_wp = self._map.get_waypoint(location)
+                    actor_wp = self._get_actor_waypoint(actor, location)
                     actor_lane_key = get_lane_key(actor_wp)
                     if not self._is_junction(actor_wp) and actor_lane_key in exit_dict:
                         if i < max_index and actor_lane_key in junction.route_exit_keys:
@@ -2488,7 +2652,7 @@ class BackgroundBehavior(AtomicBehavior):
 
             # Ending / starting lanes create issues as the lane width gradually decreases until reaching 0,
             # where the lane starts / ends. Set their speed to 0, and they'll eventually dissapear.
-            actor_wp = self._map.get_waypoint(location)
+            actor_wp = self._get_actor_waypoint(actor, location)
             if actor_wp.lane_width < self._lane_width_threshold:
                 self._actors_speed_perc[actor] = 0
 
@@ -2516,10 +2680,9 @@ class BackgroundBehavior(AtomicBehavior):
 
         if actor in self._opposite_actors:
             self._opposite_actors.remove(actor)
-        if actor in self._scenario_stopped_actors:
-            self._scenario_stopped_actors.remove(actor)
-        if actor in self._scenario_stopped_back_actors:
-            self._scenario_stopped_back_actors.remove(actor)
+        self._scenario_stopped_actors.discard(actor)
+        self._scenario_stopped_back_actors.discard(actor)
+        self._actor_wps.pop(actor, None)
 
         for opposite_source in self._opposite_sources:
             if actor in opposite_source.actors:
@@ -2562,15 +2725,7 @@ class BackgroundBehavior(AtomicBehavior):
         location = CarlaDataProvider.get_location(self._ego_actor)
 
         prev_index = self._route_index
-        for index in range(self._route_index, min(self._route_index + self._route_buffer, self._route_length)):
-            route_wp = self._route[index]
-
-            route_wp_dir = route_wp.transform.get_forward_vector()    # Waypoint's forward vector
-            veh_wp_dir = location - route_wp.transform.location       # vector waypoint - vehicle
-            dot_ve_wp = veh_wp_dir.x * route_wp_dir.x + veh_wp_dir.y * route_wp_dir.y + veh_wp_dir.z * route_wp_dir.z
-
-            if dot_ve_wp > 0:
-                self._route_index = index
+        self._route_index = self._route_progress.advance(self._route_cursor, location, self._route_buffer - 1)
 
         # Monitor route changes for those scenario that remove and readd a specific lane
         if self._scenario_removed_lane:
@@ -11,7 +11,6 @@ Basic scenario class using the OpenSCENARIO definition
 
 from __future__ import print_function
 
-from distutils.util import strtobool
 import itertools
 import os
 import py_trees
@@ -23,7 +22,7 @@ from srunner.scenariomanager.scenarioatomics.atomic_behaviors import ChangeActor
 from srunner.scenariomanager.timer import GameTime
 from srunner.scenariomanager.weather_sim import OSCWeatherBehavior
 from srunner.scenarios.basic_scenario import BasicScenario
-from srunner.tools.openscenario_parser import OpenScenarioParser, oneshot_with_check, ParameterRef
+from srunner.tools.openscenario_parser import OpenScenarioParser, oneshot_with_check, ParameterRef, strtobool
 from srunner.tools.py_trees_port import Decorator
 
 
@@ -3,7 +3,6 @@ from __future__ import print_function
 import copy
 import math
 import operator
-import random
 import re
 import sys
 import carla
@@ -21,6 +20,7 @@ from srunner.osc2.symbol_manager.parameter_symbol import ParameterSymbol
 from srunner.osc2.utils.log_manager import (LOG_INFO, LOG_ERROR, LOG_WARNING)
 from srunner.osc2.utils.relational_operator import RelationalOperator
 from srunner.osc2_dm.physical_types import Physical, Range
+from srunner.osc2_dm.sampler import get_sampler
 
 # from sqlalchemy import true
 # from srunner.osc2_stdlib import event, variables
@@ -795,6 +795,7 @@ class OSC2Scenario(BasicScenario):
         self.route = None
         self.osc2_file = osc2_file
         self.ast_tree = OSC2Helper.gen_osc2_ast(self.osc2_file)
+        self.sampler = config.sampler
         # Timeout of scenario in seconds
         self.timeout = timeout
         self.all_duration = float()
@@ -1100,10 +1101,44 @@ class OSC2Scenario(BasicScenario):
             self.__cur_behavior = None
             self.__parent_behavior = {}
             self.__duration = 1000000000.0
+            # Previous values of the symbols assigned by each declaration being instantiated
+            self.__bindings = []
 
         def get_behavior_tree(self):
             return self.root_behavior
 
+        def _bind_value(self, symbol, value):
+            """
+            Assigns a value to a symbol. While instantiating a declaration, the previous
+            value is saved so that it is restored once the instantiation finishes
+            """
+            if self.__bindings and id(symbol) not in self.__bindings[-1]:
+                self.__bindings[-1][id(symbol)] = (symbol, symbol.value)
+            symbol.value = value
+
+        def _instantiate_declaration(self, declaration_node, arguments, visit):
+            """
+            Visits a scenario or method declaration with the invocation arguments bound to its parameters.
+            Declarations are shared templates, so instead of visiting a copy of them, all values
+            assigned to their symbols during the visit are undone afterwards
+            """
+            scope = declaration_node.get_scope()
+            parent_behavior = self.__parent_behavior
+            self.__parent_behavior = {}
+            self.__bindings.append({})
+            try:
+                if isinstance(arguments, List):
+                    for arg in arguments:
+                        if isinstance(arg, Tuple):
+                            self._bind_value(scope.resolve(arg[0]), arg[1])
+                elif isinstance(arguments, Tuple):
+                    self._bind_value(scope.resolve(arguments[0]), arguments[1])
+                return visit(declaration_node)
+            finally:
+                for symbol, value in reversed(list(self.__bindings.pop().values())):
+                    symbol.value = value
+                self.__parent_behavior = parent_behavior
+
         def visit_scenario_declaration(self, node: ast_node.ScenarioDeclaration):
             scenario_name = node.qualified_behavior_name
 
@@ -1171,7 +1206,7 @@ class OSC2Scenario(BasicScenario):
                     for child in node.get_children():
                         if isinstance(child, ast_node.DoMember):
                             do_member_list.append(child)
-                    sub_node = random.choice(do_member_list)
+                    sub_node = get_sampler().choice(do_member_list)
             else:
                 raise NotImplementedError(
                     f"no supported scenario operator {composition_operator}"
@@ -1322,30 +1357,11 @@ class OSC2Scenario(BasicScenario):
                 is not None
             ):
                 self.father_ins.visit_power = True
-                scenario_declaration_node = copy.deepcopy(
-                    node.get_scope().declaration_address
-                )
-                # scenario_declaration_node = self.father_ins.scenario_declaration.get(behavior_invocation_name)
-                scenario_declaration_node_scope = scenario_declaration_node.get_scope()
+                scenario_declaration_node = node.get_scope().declaration_address
                 arguments = self.visit_children(node)
-                # Stores the value of the argument before the invoked scenario was overwritten， 如a: time=None
-                # keyword_args = {}
-                if isinstance(arguments, List):
-                    for arg in arguments:
-                        if isinstance(arg, Tuple):
-                            scope = scenario_declaration_node_scope.resolve(arg[0])
-                            # keyword_args[arg[0]] = scope.value
-                            scope.value = arg[1]
-                elif isinstance(arguments, Tuple):
-                    scope = scenario_declaration_node_scope.resolve(arguments[0])
-                    # keyword_args[arguments[0]] = scope.value
-                    scope.value = arguments[1]
-                self.visit_scenario_declaration(scenario_declaration_node)
-                # Restores the value of the argument before the called scene was overwritten
-                # for (name,value) in keyword_args.items():
-                #     scope = scenario_declaration_node_scope.resolve(name)
-                #     scope.value = value
-                del scenario_declaration_node
+                self._instantiate_declaration(
+                    scenario_declaration_node, arguments, self.visit_scenario_declaration
+                )
                 return
 
             behavior = py_trees.composites.Parallel(
@@ -1610,23 +1626,16 @@ class OSC2Scenario(BasicScenario):
                     column=column,
                 )
             if isinstance(method_scope, MethodSymbol):
-                method_declaration_node = copy.deepcopy(
-                    method_scope.declaration_address
+                def visit_method(method_declaration_node):
+                    method_value = None
+                    for child in method_declaration_node.get_children():
+                        if isinstance(child, ast_node.MethodBody):
+                            method_value = self.visit_method_body(child)
+                    return method_value
+
+                method_value = self._instantiate_declaration(
+                    method_scope.declaration_address, arguments, visit_method
                 )
-                method_scope = method_declaration_node.get_scope()
-                if isinstance(arguments, List):
-                    for arg in arguments:
-                        if isinstance(arg, Tuple):
-                            scope = method_scope.resolve(arg[0])
-                            scope.value = arg[1]
-                elif isinstance(arguments, Tuple):
-                    scope = method_scope.resolve(arguments[0])
-                    scope.value = arguments[1]
-                method_value = None
-                for child in method_declaration_node.get_children():
-                    if isinstance(child, ast_node.MethodBody):
-                        method_value = self.visit_method_body(child)
-                del method_declaration_node
                 if method_value is not None:
                     return method_value
                 return
@@ -1876,7 +1885,7 @@ class OSC2Scenario(BasicScenario):
                 if isinstance(child, ast_node.FunctionApplicationExpression):
                     para_value = self.visit_function_application_expression(child)
             if para_value is not None:
-                node.get_scope().value = para_value
+                self._bind_value(node.get_scope(), para_value)
 
             # Save variables of type struct for later access
             if para_type in self.father_ins.struct_declaration:
@@ -1968,24 +1977,15 @@ class OSC2Scenario(BasicScenario):
                 )
             para_value = None
             if isinstance(method_scope, MethodSymbol):
-                method_declaration_node = copy.deepcopy(
-                    method_scope.declaration_address
+                def visit_method(method_declaration_node):
+                    for child in method_declaration_node.get_children():
+                        if isinstance(child, ast_node.MethodBody):
+                            return self.visit_method_body(child)
+                    return None
+
+                para_value = self._instantiate_declaration(
+                    method_scope.declaration_address, arguments, visit_method
                 )
-                method_scope = method_declaration_node.get_scope()
-                if isinstance(arguments, List):
-                    for arg in arguments:
-                        if isinstance(arg, Tuple):
-                            scope = method_scope.resolve(arg[0])
-                            scope.value = arg[1]
-                elif isinstance(arguments, Tuple):
-                    scope = method_scope.resolve(arguments[0])
-                    scope.value = arguments[1]
-                para_value = None
-                for child in method_declaration_node.get_children():
-                    if isinstance(child, ast_node.MethodBody):
-                        para_value = self.visit_method_body(child)
-                        break
-                del method_declaration_node
                 if para_value is not None:
                     return para_value
                 return para_value
@@ -2013,7 +2013,7 @@ class OSC2Scenario(BasicScenario):
             param_scope = node.get_scope().resolve(retrieval_name)
             if param_scope is not None and isinstance(param_scope, ParameterSymbol):
                 if arguments[2] == RelationalOperator.EQUALITY.value:
-                    param_scope.value = arguments[1]
+                    self._bind_value(param_scope, arguments[1])
                 elif arguments[2] == RelationalOperator.INEQUALITY.value:
                     pass
                 elif arguments[2] == RelationalOperator.LESS_THAN.value:
@@ -2031,9 +2031,13 @@ class OSC2Scenario(BasicScenario):
         # The struct variable tree is a subtree of the symbol tree
         def _build_struct_tree(self, param_symbol: ParameterSymbol):
             if param_symbol.value is None:
-                param_symbol.value = copy.deepcopy(
-                    self.father_ins.struct_parameters[param_symbol.name]
-                ).get_scope()
+                # Only the field symbols are copied, the struct declaration is shared
+                struct_scope = self.father_ins.struct_parameters[param_symbol.name].get_scope()
+                struct_instance = copy.copy(struct_scope)
+                struct_instance.symbols = {
+                    key: copy.copy(symbol) for key, symbol in struct_scope.symbols.items()
+                }
+                self._bind_value(param_symbol, struct_instance)
             for key in param_symbol.value.symbols:
                 child_symbol = param_symbol.value.symbols[key]
                 if isinstance(child_symbol, ParameterSymbol):
@@ -2046,7 +2050,7 @@ class OSC2Scenario(BasicScenario):
             self, root: ParameterSymbol, suffix: list, index: int, value
         ):
             if root.type not in self.father_ins.struct_declaration:
-                root.value = value
+                self._bind_value(root, value)
                 return
             if index >= len(suffix):
                 return
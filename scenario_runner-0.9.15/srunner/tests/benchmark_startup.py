@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+
+# This work is licensed under the terms of the MIT license.
+# For a copy, see <https://opensource.org/licenses/MIT>.
+
+"""
+Benchmark of the startup time of scenario_runner.py.
+
+The imports done before the first tick of a frontend (scenario_runner.py plus the modules
+imported when its flag is used) are timed with 'python -X importtime' in a new interpreter,
+and the slowest modules are printed. Fails if the import time exceeds the budget, or if
+modules only needed by other frontends (or by the scenario recording) are imported.
+Run it from the ScenarioRunner root folder:
+
+    python srunner/tests/benchmark_startup.py --frontend osc2 --budget 1500
+"""
+
+from __future__ import print_function
+
+import argparse
+import re
+import subprocess
+import sys
+
+# Modules imported by scenario_runner.py when the flag of each frontend is used
+FRONTEND_MODULES = {
+    "scenario": [],
+    "openscenario": ["srunner.scenarioconfigs.openscenario_configuration", "srunner.scenarios.open_scenario"],
+    "route": ["srunner.tools.route_parser", "srunner.scenarios.route_scenario"],
+    "osc2": ["srunner.scenarioconfigs.osc2_scenario_configuration", "srunner.scenarios.osc2_scenario"],
+}
+
+# Heavy modules that must only be imported by some frontends
+RESTRICTED_MODULES = {
+    "xmlschema": ["openscenario"],
+    "srunner.osc2.osc2_parser.OpenSCENARIO2Parser": ["osc2"],
+    "pkg_resources": [],
+    "cv2": [],  # Only imported when the scenario is recorded
+}
+
+IMPORT_TIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def get_import_times(frontend):
+    """
+    Imports the modules of the frontend in a new interpreter.
+
+    Returns:
+        list: (module, self time, cumulative time, depth) of each imported module, times in ms
+    """
+    code = "; ".join(["import scenario_runner"] + ["import " + module for module in FRONTEND_MODULES[frontend]])
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                             stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True, check=False)
+    if process.returncode != 0:
+        raise RuntimeError("Failed to import the '{}' frontend:\n{}".format(frontend, process.stderr))
+
+    imports = []
+    for line in process.stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match:
+            self_time, cumulative_time, indent, module = match.groups()
+            imports.append((module, int(self_time) / 1000.0, int(cumulative_time) / 1000.0, len(indent) // 2))
+    return imports
+
+
+def main():
+    """
+    Time the imports of a frontend and check them against the budget
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--frontend', default='osc2', choices=sorted(FRONTEND_MODULES),
+                        help='Frontend whose imports are timed (default: osc2)')
+    parser.add_argument('--budget', default=0, type=float, help='Maximum import time in ms (default: 0, no limit)')
+    parser.add_argument('--passes', default=3, type=int, help='Number of times the imports are timed')
+    parser.add_argument('--top', default=15, type=int, help='Number of slowest modules printed')
+    args = parser.parse_args()
+
+    timings = []
+    imports = []
+    for _ in range(args.passes):
+        imports = get_import_times(args.frontend)
+        timings.append(sum(cumulative for _, _, cumulative, depth in imports if depth == 0))
+    import_time = sorted(timings)[len(timings) // 2]
+
+    print("{:<60} {:>10} {:>10}".format("Module", "self (ms)", "total (ms)"))
+    for module, self_time, cumulative_time, _ in sorted(imports, key=lambda x: x[2], reverse=True)[:args.top]:
+        print("{:<60} {:>10.1f} {:>10.1f}".format(module, self_time, cumulative_time))
+    print("Import time of the '{}' frontend: {:.1f} ms (median of {} passes)".format(
+        args.frontend, import_time, args.passes))
+
+    failed = False
+    imported = set(module for module, _, _, _ in imports)
+    for module, frontends in RESTRICTED_MODULES.items():
+        if module in imported and args.frontend not in frontends:
+            print("FAILED: '{}' is imported by the '{}' frontend".format(module, args.frontend))
+            failed = True
+    if args.budget and import_time > args.budget:
+        print("FAILED: import time over the budget of {:.1f} ms".format(args.budget))
+        failed = True
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+
+# Copyright (c) 2019 Intel Corporation
+#
+# This work is licensed under the terms of the MIT license.
+# For a copy, see <https://opensource.org/licenses/MIT>.
+
+"""
+Benchmark of the loading time of the OpenSCENARIO examples.
+
+Each file of srunner/examples/*.xosc is loaded several times (the first pass
+builds the schema and catalog caches, the following ones reuse them) and the
+time per scenario is printed. Before that, all the entries of the catalogs in
+srunner/examples/catalogs are referenced many times, to time the instantiation
+of catalog entries (which doesn't need a CARLA server, see --noServer).
+Run it from the ScenarioRunner root folder:
+
+    python srunner/tests/benchmark_xosc_load.py --passes 3
+"""
+
+from __future__ import print_function
+
+import argparse
+import glob
+import time
+import xml.etree.ElementTree as ET
+
+import carla
+
+from srunner.scenarioconfigs.openscenario_configuration import OpenScenarioConfiguration
+from srunner.tools.openscenario_parser import OpenScenarioParser
+
+
+def benchmark_catalogs(pattern, references):
+    """
+    Reference each entry of the catalogs (with their default parameters) and report the time per reference
+    """
+    print("{:<60} {:>8} {:>14}".format("Catalog", "Entries", "ms / reference"))
+    for filename in sorted(glob.glob(pattern)):
+        catalog = ET.parse(filename).find("Catalog")
+        catalogs = {catalog.attrib.get("name"): {entry.attrib.get("name"): entry for entry in catalog}}
+        catalog_references = [ET.Element("CatalogReference", {"catalogName": catalog.attrib.get("name"),
+                                                               "entryName": entry.attrib.get("name")})
+                              for entry in catalog]
+        if not catalog_references:
+            continue
+
+        start = time.time()
+        for _ in range(references):
+            for catalog_reference in catalog_references:
+                OpenScenarioParser.get_catalog_entry(catalogs, catalog_reference)
+        elapsed = (time.time() - start) / (references * len(catalog_references))
+        print("{:<60} {:>8} {:>14.4f}".format(filename, len(catalog_references), elapsed * 1000))
+
+
+def main():
+    """
+    Load all the OpenSCENARIO examples and report their loading time
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1', help='IP of the host server (default: localhost)')
+    parser.add_argument('--port', default=2000, type=int, help='TCP port to listen to (default: 2000)')
+    parser.add_argument('--files', default='srunner/examples/*.xosc', help='Glob of the files to be loaded')
+    parser.add_argument('--passes', default=2, type=int, help='Number of times each file is loaded')
+    parser.add_argument('--schemaCache', default='', help='File used to cache the compiled XSD schema')
+    parser.add_argument('--catalogs', default='srunner/examples/catalogs/*.xosc', help='Glob of the catalogs')
+    parser.add_argument('--references', default=1000, type=int, help='Number of times each catalog entry is referenced')
+    parser.add_argument('--noServer', action='store_true', help='Only time the catalogs, without loading the files')
+    args = parser.parse_args()
+
+    benchmark_catalogs(args.catalogs, args.references)
+    if args.noServer:
+        return
+
+    OpenScenarioConfiguration.schema_cache_file = args.schemaCache or None
+
+    client = carla.Client(args.host, args.port)
+    client.set_timeout(60.0)
+
+    filenames = sorted(glob.glob(args.files))
+    timings = {filename: [] for filename in filenames}
+    for _ in range(args.passes):
+        for filename in filenames:
+            start = time.time()
+            try:
+                OpenScenarioConfiguration(filename, client, {})
+            except Exception as e:  # pylint: disable=broad-except
+                print("{}: failed to load ({})".format(filename, e))
+                continue
+            timings[filename].append(time.time() - start)
+
+    print("{:<60} {}".format("Scenario", " ".join("pass {:<4}".format(i + 1) for i in range(args.passes))))
+    for filename in filenames:
+        print("{:<60} {}".format(filename, " ".join("{:8.3f}s".format(t) for t in timings[filename])))
+
+    for i in range(args.passes):
+        total = sum(t[i] for t in timings.values() if len(t) > i)
+        print("Total pass {}: {:.3f}s".format(i + 1, total))
+
+
+if __name__ == '__main__':
+    main()
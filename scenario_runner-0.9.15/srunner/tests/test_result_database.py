@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+
+# This work is licensed under the terms of the MIT license.
+# For a copy, see <https://opensource.org/licenses/MIT>.
+
+"""
+This module provides some basic unit tests for the result database of ScenarioRunner
+"""
+
+from unittest import TestCase
+import os
+import shutil
+import tempfile
+
+from srunner.scenariomanager.result_database import RUN_RESULT, ResultDatabase
+
+
+def create_report(scenario, result, criteria, system_time=1.0, seed=None, variant=None):
+    """
+    Returns a report in the format of read_result_stream, with the given criteria (name -> status)
+    """
+    return {
+        "scenario": scenario,
+        "result": result,
+        "partial": False,
+        "sampling": {"seed": seed, "strategy": "uniform", "variant": variant} if seed is not None else None,
+        "start_system_time": 0.0,
+        "system_time": system_time,
+        "game_time": 2.0 * system_time,
+        "cpu_time_per_game_second": 0.5,
+        "criteria": [{"name": name, "actor": "lincoln-1", "optional": False, "expected": 0, "actual": 0,
+                      "status": status} for name, status in criteria.items()],
+    }
+
+
+class TestResultDatabase(TestCase):
+    """
+    Test class storing runs in a temporary SQLite file and querying them
+    """
+
+    def setUp(self):
+        self._folder = tempfile.mkdtemp()
+        self.database = ResultDatabase(os.path.join(self._folder, "results.db"))
+
+    def tearDown(self):
+        self.database.close()
+        shutil.rmtree(self._folder)
+
+    def test_pass_rates(self):
+        """
+        Pass rates of the runs by scenario and map, and of their criteria
+        """
+        passed = {"CollisionTest": "SUCCESS", "RouteCompletionTest": "SUCCESS"}
+        failed = {"CollisionTest": "FAILURE", "RouteCompletionTest": "SUCCESS"}
+        self.database.add_run(create_report("A", "SUCCESS", passed), map_name="Town01", git_commit="base")
+        self.database.add_run(create_report("A", "FAILURE", failed), map_name="Town02", git_commit="base")
+        self.database.add_run(create_report("B", "ACCEPTABLE", passed), map_name="Town01", git_commit="base")
+
+        self.assertEqual(self.database.get_pass_rates(), [("A", 2, 1, 0.5), ("B", 1, 1, 1.0)])
+        self.assertEqual(self.database.get_pass_rates("map"), [("Town01", 2, 2, 1.0), ("Town02", 1, 0, 0.0)])
+        self.assertEqual(self.database.get_pass_rates(filters={"map": "Town02"}), [("A", 1, 0, 0.0)])
+        self.assertEqual(self.database.get_criteria_pass_rates({"scenario": "A"}),
+                         [("CollisionTest", 2, 1, 0.5), ("RouteCompletionTest", 2, 2, 1.0)])
+        with self.assertRaises(ValueError):
+            self.database.get_pass_rates("result")
+
+    def test_regressions(self):
+        """
+        Criteria and results passing at the base commit but not at the head one
+        """
+        passed = {"CollisionTest": "SUCCESS"}
+        failed = {"CollisionTest": "FAILURE"}
+        self.database.add_run(create_report("A", "SUCCESS", passed, seed=1, variant=0), git_commit="base")
+        self.database.add_run(create_report("A", "FAILURE", failed, seed=1, variant=0), git_commit="head")
+        # Repeated runs count as passed if any of them passed
+        self.database.add_run(create_report("B", "SUCCESS", passed), git_commit="base")
+        self.database.add_run(create_report("B", "FAILURE", failed), git_commit="head")
+        self.database.add_run(create_report("B", "SUCCESS", passed), git_commit="head")
+        # Timed out run, without any failing criterion
+        self.database.add_run(create_report("C", "SUCCESS", passed), git_commit="base")
+        self.database.add_run(create_report("C", "TIMEOUT", passed), git_commit="head")
+        # Already failing at the base commit
+        self.database.add_run(create_report("D", "FAILURE", failed), git_commit="base")
+        self.database.add_run(create_report("D", "FAILURE", failed), git_commit="head")
+
+        self.assertEqual(self.database.get_regressions("base", "head"), [
+            ("A", 1, 0, None, "CollisionTest"),
+            ("A", 1, 0, None, RUN_RESULT),
+            ("C", None, None, None, RUN_RESULT),
+        ])
+        self.assertEqual(self.database.get_regressions("head", "base"), [])
+
+    def test_timing_percentiles(self):
+        """
+        Nearest-rank percentiles of the run timings
+        """
+        for system_time in [4.0, 1.0, 3.0, 2.0]:
+            self.database.add_run(create_report("A", "SUCCESS", {}, system_time=system_time), git_commit="base")
+        self.database.add_run(create_report("B", "SUCCESS", {}, system_time=10.0), git_commit="base")
+
+        self.assertEqual(self.database.get_timing_percentiles(percentiles=(50, 100)),
+                         [("A", 4, 2.0, 4.0), ("B", 1, 10.0, 10.0)])
+        self.assertEqual(self.database.get_timing_percentiles("game_time", (25,), filters={"scenario": "A"}),
+                         [("A", 4, 2.0)])
+        with self.assertRaises(ValueError):
+            self.database.get_timing_percentiles("timestamp")
@@ -11,12 +11,12 @@ This module provides a parser for scenario configuration files based on OpenSCEN
 
 from __future__ import print_function
 
-from distutils.util import strtobool
 import re
-import copy
 import datetime
 import math
 import operator
+import weakref
+import xml.etree.ElementTree as ET
 
 import py_trees
 import carla
@@ -77,6 +77,19 @@ from srunner.tools.py_trees_port import oneshot_behavior
 from srunner.tools.scenario_helper import get_offset_transform, get_troad_from_transform
 
 
+def strtobool(value):
+    """
+    Converts a string representation of truth to 1 or 0, as distutils.util.strtobool.
+    distutils takes long to import (and is gone in Python 3.12)
+    """
+    value = value.lower()
+    if value in ('y', 'yes', 't', 'true', 'on', '1'):
+        return 1
+    if value in ('n', 'no', 'f', 'false', 'off', '0'):
+        return 0
+    raise ValueError("invalid truth value {!r}".format(value))
+
+
 def oneshot_with_check(variable_name, behaviour, name=None):
     """
     Check if the blackboard contains already variable_name and
@@ -94,30 +107,48 @@ class ParameterRef:
     """
     This class stores osc parameter reference in its original form.
     Returns the converted value whenever it is used.
+
+    The reference is classified once, at construction. Literals are converted only once,
+    and parameters are only looked up again when the global osc parameters change.
     """
 
+    LITERAL_PATTERN = re.compile(r"(-)?\d+(\.\d*)?(e[+-]\d*)?")
+    PARAMETER_PATTERN = re.compile(r"[$][A-Za-z_][\w]*")
+
     def __init__(self, reference_text) -> None:
         # TODO: (for OSC1.1) add methods(lexer and math_interpreter) to
         #  recognize and interpret math expression from reference_text
         self.reference_text = str(reference_text)
+        self._is_literal = self._is_matching(self.LITERAL_PATTERN)
+        self._is_parameter = not self._is_literal and self._is_matching(self.PARAMETER_PATTERN)
+
+        self._literal_float = None
+        if self._is_literal:
+            try:
+                self._literal_float = float(self.reference_text)
+            except ValueError:
+                pass
+
+        self._parameter_value = None
+        self._parameter_version = None
 
     def is_literal(self) -> bool:
         """
         Returns: True when text is a literal/number
         """
-        return self._is_matching(pattern=r"(-)?\d+(\.\d*)?(e[+-]\d*)?")
+        return self._is_literal
 
     def is_parameter(self) -> bool:
         """
         Returns: True when text is a parameter
         """
-        return self._is_matching(pattern=r"[$][A-Za-z_][\w]*")
+        return self._is_parameter
 
-    def _is_matching(self, pattern: str) -> bool:
+    def _is_matching(self, pattern) -> bool:
         """
-        Returns: True when pattern is matching with text
+        Returns: True when the (compiled) pattern is matching with text
         """
-        match = re.search(pattern, self.reference_text)
+        match = pattern.search(self.reference_text)
         if match is not None:
             matching_string = match.group()
             return matching_string == self.reference_text
@@ -127,17 +158,24 @@ class ParameterRef:
         """
         Returns: interpreted value from reference_text
         """
-        if self.is_literal():
+        if self._is_literal:
             value = self.reference_text
-        elif self.is_parameter():
-            value = CarlaDataProvider.get_osc_global_param_value(self.reference_text)
-            if value is None:
-                raise Exception("Parameter '{}' is not defined".format(self.reference_text[1:]))
+        elif self._is_parameter:
+            version = CarlaDataProvider.get_osc_global_params_version()
+            if version != self._parameter_version:
+                value = CarlaDataProvider.get_osc_global_param_value(self.reference_text)
+                if value is None:
+                    raise Exception("Parameter '{}' is not defined".format(self.reference_text[1:]))
+                self._parameter_value = value
+                self._parameter_version = version
+            value = self._parameter_value
         else:
             value = None
         return value
 
     def __float__(self) -> float:
+        if self._literal_float is not None:
+            return self._literal_float
         value = self.get_interpreted_value()
         if value is not None:
             return float(value)
@@ -223,6 +261,71 @@ class ParameterRef:
         return abs(self.__float__())
 
 
+class CatalogTemplate(object):
+
+    """
+    Catalog entry prepared once for all the CatalogReferences to it.
+
+    The default values of its parameters and the elements with attributes referencing
+    them are found when the template is created. Each instance only copies these elements
+    (and their ancestors), sharing all the other ones with the catalog entry, which therefore
+    must not be modified. The entry isn't referenced by the template, so that it can be
+    stored in a WeakKeyDictionary keyed by the entry.
+    """
+
+    def __init__(self, entry):
+        self.parameters = {}
+        for elem in entry.iter():
+            parameters = elem.find('ParameterDeclarations')
+            if parameters is not None:
+                for parameter in parameters:
+                    self.parameters[parameter.attrib.get('name')] = parameter.attrib.get('value')
+
+        self._parametrized = set()  # ids of the elements whose subtree references parameters
+        self._find_parametrized(entry)
+
+    def _find_parametrized(self, elem):
+        parametrized = any("$" in value for value in elem.attrib.values())
+        for child in elem:
+            parametrized = self._find_parametrized(child) or parametrized
+        if parametrized:
+            self._parametrized.add(id(elem))
+        return parametrized
+
+    def _substitute(self, elem, parameter_dict, names):
+        if id(elem) not in self._parametrized:
+            return elem
+
+        attrib = {}
+        for key, value in elem.attrib.items():
+            for param in names:
+                if "$" + param in value:
+                    value = value.replace("$" + param, parameter_dict[param])
+            attrib[key] = value
+
+        view = ET.Element(elem.tag, attrib)
+        view.text = elem.text
+        view.tail = elem.tail
+        view.extend(self._substitute(child, parameter_dict, names) for child in elem)
+        return view
+
+    def instantiate(self, entry, catalog_reference):
+        """
+        Returns the entry (the one the template was created from) with the parameter values
+        of the catalog_reference, or the default ones
+        """
+        if id(entry) not in self._parametrized:
+            return entry
+
+        parameter_dict = dict(self.parameters)
+        for parameter_assignments in catalog_reference.iter("ParameterAssignments"):
+            for parameter_assignment in parameter_assignments.iter("ParameterAssignment"):
+                parameter = parameter_assignment.attrib.get("parameterRef")
+                parameter_dict[parameter] = parameter_assignment.attrib.get("value")
+
+        return self._substitute(entry, parameter_dict, sorted(parameter_dict, key=len, reverse=True))
+
+
 class OpenScenarioParser(object):
 
     """
@@ -255,6 +358,7 @@ class OpenScenarioParser(object):
     global_osc_parameters = {}
     use_carla_coordinate_system = False
     osc_filepath = None
+    catalog_templates = weakref.WeakKeyDictionary()  # catalog entry -> CatalogTemplate
 
     @staticmethod
     def get_traffic_light_from_osc_name(name):
@@ -364,56 +468,17 @@ class OpenScenarioParser(object):
             catalog_reference (XML ElementTree): Reference containing the exact catalog to be used
 
         returns:
-            Catalog entry (XML ElementTree)
+            Catalog entry (XML ElementTree). It may share elements with the catalog, so it must not be modified
         """
         entry_name = str(ParameterRef(catalog_reference.attrib.get("entryName")))
         entry = catalogs[catalog_reference.attrib.get("catalogName")][entry_name]
-        entry_copy = copy.deepcopy(entry)
-        catalog_copy = copy.deepcopy(catalog_reference)
-        entry = OpenScenarioParser.assign_catalog_parameters(entry_copy, catalog_copy)
-
-        return entry
-
-    @staticmethod
-    def assign_catalog_parameters(entry_instance, catalog_reference):
-        """
-        Parse catalog_reference, and replace all parameter references
-        in entry_instance by the values provided in catalog_reference.
-
-        Not to be used from outside this class.
-
-        Args:
-            entry_instance (XML ElementTree): Entry to be updated
-            catalog_reference (XML ElementTree): Reference containing the exact parameter values
-
-        returns:
-            updated entry_instance with updated parameter values
-        """
-
-        parameter_dict = {}
-        for elem in entry_instance.iter():
-            if elem.find('ParameterDeclarations') is not None:
-                parameters = elem.find('ParameterDeclarations')
-                for parameter in parameters:
-                    name = parameter.attrib.get('name')
-                    value = parameter.attrib.get('value')
-                    parameter_dict[name] = value
-
-        for parameter_assignments in catalog_reference.iter("ParameterAssignments"):
-            for parameter_assignment in parameter_assignments.iter("ParameterAssignment"):
-                parameter = parameter_assignment.attrib.get("parameterRef")
-                value = parameter_assignment.attrib.get("value")
-                parameter_dict[parameter] = value
-
-        for node in entry_instance.iter():
-            for key in node.attrib:
-                for param in sorted(parameter_dict, key=len, reverse=True):
-                    if "$" + param in node.attrib[key]:
-                        node.attrib[key] = node.attrib[key].replace("$" + param, parameter_dict[param])
 
-        OpenScenarioParser.set_parameters(entry_instance, OpenScenarioParser.global_osc_parameters)
+        template = OpenScenarioParser.catalog_templates.get(entry)
+        if template is None:
+            template = CatalogTemplate(entry)
+            OpenScenarioParser.catalog_templates[entry] = template
 
-        return entry_instance
+        return template.instantiate(entry, catalog_reference)
 
     @staticmethod
     def get_friction_from_env_action(xml_tree, catalogs):
@@ -12,6 +12,7 @@ from antlr4.tree.Tree import ParseTreeWalker
 from numpy.linalg import det
 
 from srunner.osc2.ast_manager.ast_builder import ASTBuilder
+from srunner.osc2.ast_manager.incremental_parser import IncrementalParser
 from srunner.osc2.error_manager.error_listener import OscErrorListener
 from srunner.osc2.osc2_parser.OpenSCENARIO2Lexer import OpenSCENARIO2Lexer as OSC2Lexer
 from srunner.osc2.osc2_parser.OpenSCENARIO2Parser import (
@@ -25,6 +26,8 @@ class OSC2Helper(object):
     ast_tree = None
     ego_name = "ego_vehicle"
     wait_for_ego = False
+    # Keeps the parse trees of the top-level declarations, so that only the edited ones are parsed again
+    incremental_parser = IncrementalParser()
 
     @classmethod
     def gen_osc2_ast(cls, osc2_file_name: str):
@@ -33,18 +36,22 @@ class OSC2Helper(object):
         else:
             # preprocessing
             new_file, _ = Preprocess(osc2_file_name).import_process()
-            input_stream = FileStream(new_file, encoding="utf-8")
-
-            osc_error_listeners = OscErrorListener(input_stream)
-            lexer = OSC2Lexer(input_stream)
-            lexer.removeErrorListeners()
-            lexer.addErrorListener(osc_error_listeners)
-
-            tokens = CommonTokenStream(lexer)
-            parser = OSC2Parser(tokens)
-            parser.removeErrorListeners()
-            parser.addErrorListener(osc_error_listeners)
-            parse_tree = parser.osc_file()
+            parse_tree = cls.incremental_parser.parse_file(new_file)
+
+            # Syntax errors are reported by parsing the whole file
+            if parse_tree is None:
+                input_stream = FileStream(new_file, encoding="utf-8")
+
+                osc_error_listeners = OscErrorListener(input_stream)
+                lexer = OSC2Lexer(input_stream)
+                lexer.removeErrorListeners()
+                lexer.addErrorListener(osc_error_listeners)
+
+                tokens = CommonTokenStream(lexer)
+                parser = OSC2Parser(tokens)
+                parser.removeErrorListeners()
+                parser.addErrorListener(osc_error_listeners)
+                parse_tree = parser.osc_file()
 
             osc2_ast_builder = ASTBuilder()
             walker = ParseTreeWalker()
@@ -0,0 +1,288 @@
+#!/usr/bin/env python
+
+# This work is licensed under the terms of the MIT license.
+# For a copy, see <https://opensource.org/licenses/MIT>.
+
+"""
+Static validation of OpenSCENARIO 2.0 files, without a CARLA server.
+
+Files are parsed and their symbols checked the same way scenario_runner.py does, but the
+errors and warnings are returned as structured diagnostics. The validator can run as a
+long-lived service that keeps the ANTLR parser warm, answering JSON-RPC requests (one per
+line) through stdin / stdout or a Unix socket:
+
+    python -m srunner.tools.osc2_validator --jobs 4
+    {"jsonrpc": "2.0", "id": 1, "method": "validate", "params": {"files": ["ai_gen/basic.osc"]}}
+
+Or validate some files once and print their diagnostics:
+
+    python -m srunner.tools.osc2_validator ai_gen/*.osc
+"""
+
+from __future__ import print_function
+
+import argparse
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import contextlib
+import copy
+import hashlib
+import json
+import os
+import socketserver
+import sys
+import tempfile
+import time
+
+from antlr4 import CommonTokenStream, FileStream, InputStream, ParseTreeWalker
+
+from srunner.osc2.ast_manager.ast_builder import ASTBuilder
+from srunner.osc2.ast_manager.incremental_parser import IncrementalParser
+from srunner.osc2.error_manager.error_listener import OscErrorListener
+from srunner.osc2.osc2_parser.OpenSCENARIO2Lexer import OpenSCENARIO2Lexer as OSC2Lexer
+from srunner.osc2.osc2_parser.OpenSCENARIO2Parser import OpenSCENARIO2Parser as OSC2Parser
+from srunner.osc2.osc_preprocess.import_msg import create_ImportMsg as import_msg
+from srunner.osc2.osc_preprocess.pre_process import Preprocess
+from srunner.osc2.utils import log_manager
+
+WARM_UP_SCENARIO = "scenario top:\n    do serial:\n        wait elapsed(1s)\n"
+
+# Diagnostics of the last validated inputs, by hash of the file with its imports expanded
+RESULTS_CACHE_SIZE = 256
+_results_cache = OrderedDict()
+
+# Parse trees of the top-level declarations, only the edited ones are parsed again
+_incremental_parser = IncrementalParser()
+
+
+def _parse(input_stream):
+    """Parses the stream, reporting the syntax errors through the OscErrorListener"""
+    error_listener = OscErrorListener(input_stream)
+    lexer = OSC2Lexer(input_stream)
+    lexer.removeErrorListeners()
+    lexer.addErrorListener(error_listener)
+    parser = OSC2Parser(CommonTokenStream(lexer))
+    parser.removeErrorListeners()
+    parser.addErrorListener(error_listener)
+    return parser.osc_file()
+
+
+def warm_up():
+    """
+    Parses a small scenario, filling the ANTLR caches shared by all the following parses
+    """
+    log_manager.DIAGNOSTICS = []
+    import_msg.add("<warm up>", WARM_UP_SCENARIO.count("\n"))
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            ParseTreeWalker().walk(ASTBuilder(), _parse(InputStream(WARM_UP_SCENARIO)))
+    finally:
+        log_manager.DIAGNOSTICS = None
+        import_msg.clear_msg()
+
+
+def validate_file(filename):
+    """
+    Checks the syntax and symbols of an OSC-2 file (and its imports).
+
+    Returns:
+        dict: file, whether or not it is valid (has no errors), its diagnostics and the validation
+        time in milliseconds. Each diagnostic has a severity, message, file, line, column and phase
+        (import, syntax, symbol or internal)
+    """
+    # The preprocessor and the error relocation print some messages, which must not be mixed with the responses
+    with contextlib.redirect_stdout(sys.stderr):
+        return _validate_file(filename)
+
+
+def _validate_file(filename):
+    start_time = time.time()
+    diagnostics = []
+
+    def set_phase(phase):
+        for diagnostic in diagnostics:
+            diagnostic.setdefault("phase", phase)
+
+    log_manager.DIAGNOSTICS = diagnostics
+    try:
+        # The preprocessor expects paths relative to the working directory
+        preprocess = Preprocess(os.path.relpath(os.path.abspath(filename)))
+        preprocess.result = os.path.join(tempfile.gettempdir(), "osc2_validator_{}.osc".format(os.getpid()))
+        preprocessed_file, _ = preprocess.import_process()
+        set_phase("import")
+
+        # Lexing is the slowest part, so reuse the diagnostics if the input hasn't changed
+        cache_key = None
+        if not diagnostics:
+            with open(preprocessed_file, "rb") as fd:
+                cache_key = (hashlib.sha1(fd.read()).hexdigest(), tuple(import_msg.files), tuple(import_msg.index))
+            if cache_key in _results_cache:
+                _results_cache.move_to_end(cache_key)
+                diagnostics.extend(copy.deepcopy(_results_cache[cache_key]))
+
+        if cache_key not in _results_cache:
+            parse_tree = _incremental_parser.parse_file(preprocessed_file)
+            if parse_tree is None:
+                parse_tree = _parse(FileStream(preprocessed_file, encoding="utf-8"))
+            set_phase("syntax")
+
+            # Symbols can only be checked on a syntactically correct file
+            if not diagnostics:
+                ParseTreeWalker().walk(ASTBuilder(), parse_tree)
+                set_phase("symbol")
+
+            if cache_key is not None:
+                _results_cache[cache_key] = copy.deepcopy(diagnostics)
+                while len(_results_cache) > RESULTS_CACHE_SIZE:
+                    _results_cache.popitem(last=False)
+    except Exception as e:  # pylint: disable=broad-except
+        diagnostics.append({
+            "severity": "error",
+            "message": "{}: {}".format(type(e).__name__, e),
+            "file": filename,
+            "line": None,
+            "column": None,
+            "phase": "internal",
+        })
+    finally:
+        log_manager.DIAGNOSTICS = None
+        import_msg.clear_msg()
+
+    return {
+        "file": filename,
+        "valid": not any(d["severity"] == "error" for d in diagnostics),
+        "diagnostics": diagnostics,
+        "time": round((time.time() - start_time) * 1000, 2),
+    }
+
+
+class OSC2Validator(object):
+
+    """
+    Validates OSC-2 files, using a pool of warm processes if jobs > 1
+    """
+
+    def __init__(self, jobs=1):
+        self.shutdown_requested = False
+        self._pool = None
+        if jobs > 1:
+            self._pool = ProcessPoolExecutor(max_workers=jobs, initializer=warm_up)
+        else:
+            warm_up()
+
+    def validate(self, filenames):
+        """Returns the results of validate_file for each of the files, in order"""
+        if self._pool is None:
+            return [validate_file(filename) for filename in filenames]
+        return list(self._pool.map(validate_file, filenames))
+
+    def handle_request(self, request):
+        """
+        Answers a JSON-RPC request. Supported methods are 'validate', with a 'files' list
+        as parameter, and 'shutdown'. Returns None for notifications (requests without id)
+        """
+        if not isinstance(request, dict):
+            return {"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": "Invalid request"}}
+
+        response = {"jsonrpc": "2.0", "id": request.get("id")}
+        method = request.get("method")
+        try:
+            if method == "validate":
+                params = request.get("params", {})
+                files = params.get("files", []) if isinstance(params, dict) else None
+                if not isinstance(files, list) or not all(isinstance(f, str) for f in files):
+                    response["error"] = {"code": -32602, "message": "Invalid params: 'files' must be a list of paths"}
+                else:
+                    response["result"] = self.validate(files)
+            elif method == "shutdown":
+                self.shutdown_requested = True
+                response["result"] = None
+            else:
+                response["error"] = {"code": -32601, "message": "Method not found: {}".format(method)}
+        except Exception as e:  # pylint: disable=broad-except
+            response["error"] = {"code": -32603, "message": "Internal error: {}: {}".format(type(e).__name__, e)}
+        return response if "id" in request else None
+
+    def handle_line(self, line):
+        """Answers a request serialized as a JSON line, returning the serialized response"""
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            response = {"jsonrpc": "2.0", "id": None, "error": {"code": -32700, "message": str(e)}}
+        else:
+            response = self.handle_request(request)
+        return json.dumps(response) if response is not None else None
+
+    def close(self):
+        """Stops the process pool"""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+def serve_stdio(validator):
+    """Answers the requests received through stdin until EOF or a 'shutdown' request"""
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        response = validator.handle_line(line)
+        if response is not None:
+            print(response)
+            sys.stdout.flush()
+        if validator.shutdown_requested:
+            break
+
+
+def serve_socket(validator, path):
+    """Answers the requests received through a Unix socket, one connection at a time"""
+
+    class RequestHandler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                if not line.strip():
+                    continue
+                response = validator.handle_line(line.decode("utf-8"))
+                if response is not None:
+                    self.wfile.write((response + "\n").encode("utf-8"))
+                    self.wfile.flush()
+
+    if os.path.exists(path):
+        os.remove(path)
+    server = socketserver.UnixStreamServer(path, RequestHandler)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        os.remove(path)
+
+
+def main():
+    """
+    Validates the given files, or starts the validation service if none are given
+    """
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('files', nargs='*', help='Files to validate. If empty, the validation service is started')
+    parser.add_argument('--jobs', default=1, type=int, help='Number of processes validating files (default: 1)')
+    parser.add_argument('--socket', default='', help='Unix socket where the service listens, instead of stdin')
+    args = parser.parse_args()
+
+    validator = OSC2Validator(args.jobs)
+    try:
+        if args.files:
+            results = validator.validate(args.files)
+            print(json.dumps(results, indent=4))
+            return 0 if all(result["valid"] for result in results) else 1
+
+        if args.socket:
+            serve_socket(validator, args.socket)
+        else:
+            serve_stdio(validator)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        validator.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
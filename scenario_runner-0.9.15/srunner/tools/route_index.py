@@ -0,0 +1,224 @@
+#!/usr/bin/env python
+
+# Copyright (c) 2019 Intel Corporation
+#
+# This work is licensed under the terms of the MIT license.
+# For a copy, see <https://opensource.org/licenses/MIT>.
+
+"""
+This module provides the RouteIndex, a precomputed description of a route shared
+by all the behaviors and criteria that have to know the progress of an actor along it.
+"""
+
+from collections import OrderedDict
+import math
+
+import numpy as np
+
+import carla
+
+
+class RouteIndex(object):
+
+    """
+    Route points, headings and accumulated distances stored as NumPy arrays, together
+    with a grid of the route segments used to project locations onto the route.
+
+    Each actor (or any other key) moving through the route has a monotonic cursor,
+    which is only checked against a small window of route points ahead of it.
+
+    Use RouteIndex.get(route) to share the same index between all the users of a route.
+    """
+
+    CELL_SIZE = 10.0  # Size of the grid cells, in meters
+    CACHE_SIZE = 8  # Amount of routes whose index is kept
+
+    _cache = OrderedDict()
+
+    def __init__(self, route):
+        """
+        Args:
+            route (list): list of (carla.Transform | carla.Waypoint | carla.Location, RoadOption)
+        """
+        points = []
+        yaws = []
+        for element, _ in route:
+            if isinstance(element, carla.Waypoint):
+                element = element.transform
+            if isinstance(element, carla.Transform):
+                points.append((element.location.x, element.location.y, element.location.z))
+                yaws.append(math.radians(element.rotation.yaw))
+            else:
+                points.append((element.x, element.y, element.z))
+                yaws.append(None)
+
+        self.points = np.array(points, dtype=float).reshape(-1, 3)
+        self._size = len(self.points)
+
+        segments = np.diff(self.points[:, :2], axis=0)
+        lengths = np.linalg.norm(np.diff(self.points, axis=0), axis=1)
+        self.accum = np.concatenate(([0.0], np.cumsum(lengths)))
+        self.length = float(self.accum[-1]) if self._size else 0.0
+
+        # Locations have no orientation, use the one of the route segment instead
+        segment_yaws = np.arctan2(segments[:, 1], segments[:, 0])
+        segment_yaws = np.concatenate((segment_yaws, segment_yaws[-1:])) if len(segment_yaws) else [0.0]
+        self.yaws = np.array([segment_yaws[i] if yaw is None else yaw for i, yaw in enumerate(yaws)], dtype=float)
+        self.forward = np.stack((np.cos(self.yaws), np.sin(self.yaws)), axis=1)
+
+        self._segments = segments
+        self._segments_length_sq = np.maximum((segments ** 2).sum(axis=1), 1e-9)
+        self._grid = self._build_grid()
+        self._cursors = {}
+
+    @classmethod
+    def get(cls, route):
+        """
+        Returns the index of the given route, building it only the first time it is requested
+        """
+        key = id(route)
+        entry = cls._cache.get(key)
+        if entry is not None and entry[0] is route and len(route) == len(entry[1]):
+            cls._cache.move_to_end(key)
+            return entry[1]
+
+        route_index = cls(route)
+        cls._cache[key] = (route, route_index)
+        while len(cls._cache) > cls.CACHE_SIZE:
+            cls._cache.popitem(last=False)
+        return route_index
+
+    def __len__(self):
+        return self._size
+
+    def _get_cell(self, x, y):
+        return (int(math.floor(x / self.CELL_SIZE)), int(math.floor(y / self.CELL_SIZE)))
+
+    def _build_grid(self):
+        """
+        Registers each route segment at all the cells covered by its bounding box
+        """
+        grid = {}
+        for i in range(len(self._segments)):
+            (x1, y1), (x2, y2) = self.points[i, :2], self.points[i + 1, :2]
+            min_cell = self._get_cell(min(x1, x2), min(y1, y2))
+            max_cell = self._get_cell(max(x1, x2), max(y1, y2))
+            for cx in range(min_cell[0], max_cell[0] + 1):
+                for cy in range(min_cell[1], max_cell[1] + 1):
+                    grid.setdefault((cx, cy), []).append(i)
+        return {cell: np.array(segments, dtype=int) for cell, segments in grid.items()}
+
+    def get_location(self, index):
+        """
+        Returns the carla.Location of the route point at the given index
+        """
+        x, y, z = self.points[index]
+        return carla.Location(x=float(x), y=float(y), z=float(z))
+
+    def project(self, location, max_distance=20.0):
+        """
+        Projects the location onto the closest route segment.
+
+        Returns:
+            tuple(int, float, float): index of the segment start, distance along the route and distance
+            to the route. The index is None if no segment is closer than max_distance.
+        """
+        if self._size < 2:
+            if self._size:
+                distance = math.hypot(location.x - self.points[0, 0], location.y - self.points[0, 1])
+                if distance <= max_distance:
+                    return 0, 0.0, distance
+            return None, self.length, float('inf')
+
+        min_cell = self._get_cell(location.x - max_distance, location.y - max_distance)
+        max_cell = self._get_cell(location.x + max_distance, location.y + max_distance)
+        candidates = [self._grid[(cx, cy)]
+                      for cx in range(min_cell[0], max_cell[0] + 1)
+                      for cy in range(min_cell[1], max_cell[1] + 1)
+                      if (cx, cy) in self._grid]
+        if not candidates:
+            return None, self.length, float('inf')
+        candidates = np.unique(np.concatenate(candidates))
+
+        point = np.array((location.x, location.y))
+        starts = self.points[candidates, :2]
+        segments = self._segments[candidates]
+        ratios = np.clip(((point - starts) * segments).sum(axis=1) / self._segments_length_sq[candidates], 0, 1)
+        distances = np.linalg.norm(starts + segments * ratios[:, None] - point, axis=1)
+
+        closest = int(np.argmin(distances))
+        if distances[closest] > max_distance:
+            return None, self.length, float('inf')
+
+        index = int(candidates[closest])
+        along = self.accum[index] + ratios[closest] * (self.accum[index + 1] - self.accum[index])
+        return index, float(along), float(distances[closest])
+
+    def get_close_points(self, location, max_distance):
+        """
+        Returns the indexes of the route points closer than max_distance to the location
+        """
+        point = np.array((location.x, location.y, location.z))
+        if self._size < 2:
+            candidates = np.arange(self._size)
+        else:
+            min_cell = self._get_cell(location.x - max_distance, location.y - max_distance)
+            max_cell = self._get_cell(location.x + max_distance, location.y + max_distance)
+            segments = [self._grid[(cx, cy)]
+                        for cx in range(min_cell[0], max_cell[0] + 1)
+                        for cy in range(min_cell[1], max_cell[1] + 1)
+                        if (cx, cy) in self._grid]
+            if not segments:
+                return np.array([], dtype=int)
+            # Each segment covers the cells of both of its points
+            segments = np.unique(np.concatenate(segments))
+            candidates = np.union1d(segments, segments + 1)
+
+        distances = np.linalg.norm(self.points[candidates] - point, axis=1)
+        return candidates[distances < max_distance]
+
+    def get_passed_index(self, location, start, window):
+        """
+        Returns the furthest route point, out of the 'window' ones after 'start',
+        that the location has already passed. If none has been passed, returns 'start'
+        """
+        end = min(start + window + 1, self._size)
+        if end <= start:
+            return start
+        offsets = np.array((location.x, location.y)) - self.points[start:end, :2]
+        passed = np.flatnonzero((offsets * self.forward[start:end]).sum(axis=1) > 0)
+        return start + int(passed[-1]) if len(passed) else start
+
+    def get_closest_index(self, location, start, window):
+        """
+        Returns the route point, out of the 'window' ones after 'start', closest to the location,
+        alongside its 2D distance to it
+        """
+        end = min(start + window + 1, self._size)
+        if end <= start:
+            return start, float('inf')
+        distances = np.linalg.norm(self.points[start:end, :2] - np.array((location.x, location.y)), axis=1)
+        # Prefer the furthest point in case of a tie
+        closest = len(distances) - 1 - int(np.argmin(distances[::-1]))
+        return start + closest, float(distances[closest])
+
+    def advance(self, key, location, window=3):
+        """
+        Moves the cursor identified by 'key' to the furthest route point passed by the location.
+        Cursors never go backwards. Returns the new index of the cursor
+        """
+        index = self.get_passed_index(location, self._cursors.get(key, 0), window)
+        self._cursors[key] = index
+        return index
+
+    def get_cursor(self, key):
+        """
+        Returns the route point index of the cursor identified by 'key'
+        """
+        return self._cursors.get(key, 0)
+
+    def get_distance(self, start_index, end_index):
+        """
+        Returns the distance along the route between two route points
+        """
+        return float(self.accum[end_index] - self.accum[start_index])
@@ -8,16 +8,44 @@
 """
 Module to manipulate the routes, by making then more or less dense (Up to a certain parameter).
 It also contains functions to convert the CARLA world location do GPS coordinates.
+
+If trajectory_cache_dir is set, the interpolated routes are stored there, keyed by the map,
+keypoints and hop resolution, and later runs of the same route skip the route planning.
 """
 
+from collections import OrderedDict
+import hashlib
 import math
+import os
 import xml.etree.ElementTree as ET
+import zipfile
+
+import numpy as np
 
+import carla
 from agents.navigation.global_route_planner import GlobalRoutePlanner
 from agents.navigation.local_planner import RoadOption
 
 from srunner.scenariomanager.carla_data_provider import CarlaDataProvider
 
+EARTH_RADIUS_EQUA = 6378137.0
+
+# Folder where the interpolated trajectories are cached. If None, they are only kept in memory
+trajectory_cache_dir = None  # pylint: disable=invalid-name
+
+TRAJECTORY_CACHE_VERSION = 1
+TRAJECTORY_CACHE_SIZE = 16  # Amount of trajectories kept in memory
+_trajectories = OrderedDict()
+
+_map_hashes = {}  # Map name -> hash of its OpenDRIVE
+
+
+def get_map_hash(carla_map):
+    """Returns a hash of the map's OpenDRIVE, computed once per map"""
+    if carla_map.name not in _map_hashes:
+        _map_hashes[carla_map.name] = hashlib.sha1(carla_map.to_opendrive().encode('utf-8')).hexdigest()
+    return _map_hashes[carla_map.name]
+
 
 def _location_to_gps(lat_ref, lon_ref, location):
     """
@@ -28,7 +56,6 @@ def _location_to_gps(lat_ref, lon_ref, location):
     :return: dictionary with lat, lon and height
     """
 
-    EARTH_RADIUS_EQUA = 6378137.0   # pylint: disable=invalid-name
     scale = math.cos(lat_ref * math.pi / 180.0)
     mx = scale * lon_ref * math.pi * EARTH_RADIUS_EQUA / 180.0
     my = scale * EARTH_RADIUS_EQUA * math.log(math.tan((90.0 + lat_ref) * math.pi / 360.0))
@@ -42,6 +69,26 @@ def _location_to_gps(lat_ref, lon_ref, location):
     return {'lat': lat, 'lon': lon, 'z': z}
 
 
+def _locations_to_gps(lat_ref, lon_ref, locations):
+    """
+    Convert an array of world coordinates to GPS coordinates, see _location_to_gps
+    :param locations: array with the x, y and z of each location
+    :return: list of dictionaries with lat, lon and height
+    """
+    locations = np.asarray(locations, dtype=float).reshape(-1, 3)
+
+    scale = math.cos(lat_ref * math.pi / 180.0)
+    mx = scale * lon_ref * math.pi * EARTH_RADIUS_EQUA / 180.0
+    my = scale * EARTH_RADIUS_EQUA * math.log(math.tan((90.0 + lat_ref) * math.pi / 360.0))
+    mx = mx + locations[:, 0]
+    my = my - locations[:, 1]
+
+    lon = mx * 180.0 / (math.pi * EARTH_RADIUS_EQUA * scale)
+    lat = 360.0 * np.arctan(np.exp(my / (EARTH_RADIUS_EQUA * scale))) / math.pi - 90.0
+
+    return [{'lat': la, 'lon': lo, 'z': z} for la, lo, z in zip(lat.tolist(), lon.tolist(), locations[:, 2].tolist())]
+
+
 def location_route_to_gps(route, lat_ref, lon_ref):
     """
         Locate each waypoint of the route into gps, (lat long ) representations.
@@ -50,13 +97,9 @@ def location_route_to_gps(route, lat_ref, lon_ref):
     :param lon_ref:
     :return:
     """
-    gps_route = []
-
-    for transform, connection in route:
-        gps_point = _location_to_gps(lat_ref, lon_ref, transform.location)
-        gps_route.append((gps_point, connection))
-
-    return gps_route
+    locations = [(t.location.x, t.location.y, t.location.z) for t, _ in route]
+    gps_points = _locations_to_gps(lat_ref, lon_ref, locations)
+    return [(gps_point, connection) for gps_point, (_, connection) in zip(gps_points, route)]
 
 
 def _get_latlon_ref(world):
@@ -130,31 +173,97 @@ def downsample_route(route, sample_factor):
     return ids_to_sample
 
 
-def interpolate_trajectory(waypoints_trajectory, hop_resolution=1.0):
+def _get_trajectory_key(carla_map, waypoints_trajectory, hop_resolution):
+    """Returns the key identifying the interpolated trajectory of some keypoints"""
+    keypoints = ';'.join('{!r},{!r},{!r}'.format(l.x, l.y, l.z) for l in waypoints_trajectory)
+    data = '{}|{}|{!r}|{}'.format(TRAJECTORY_CACHE_VERSION, get_map_hash(carla_map), hop_resolution, keypoints)
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+
+def _get_trajectory_cache_file(carla_map, key):
+    """Returns the file where the interpolated trajectory is cached"""
+    return os.path.join(trajectory_cache_dir, '{}_{}.npz'.format(carla_map.name.split('/')[-1], key))
+
+
+def _load_trajectory(filename):
+    """Returns the cached transforms, road options and GPS reference, or None if they aren't available"""
+    if not os.path.isfile(filename):
+        return None
+    try:
+        with np.load(filename, allow_pickle=False) as data:
+            return data['transforms'], data['options'], tuple(data['latlon_ref'].tolist())
+    except (IOError, OSError, ValueError, KeyError, zipfile.BadZipFile):
+        return None
+
+
+def _store_trajectory(filename, trajectory):
+    """Saves the transforms, road options and GPS reference of the trajectory"""
+    transforms, options, latlon_ref = trajectory
+    try:
+        if not os.path.isdir(trajectory_cache_dir):
+            os.makedirs(trajectory_cache_dir)
+        np.savez_compressed(filename, transforms=transforms, options=options, latlon_ref=np.array(latlon_ref))
+    except (IOError, OSError) as e:
+        print("WARNING: Couldn't store the interpolated trajectory at '{}': {}".format(filename, e))
+
+
+def _trace_trajectory(carla_map, waypoints_trajectory, hop_resolution):
     """
-    Given some raw keypoints interpolate a full dense trajectory to be used by the user.
-    returns the full interpolated route both in GPS coordinates and also in its original form.
-    
-    Args:
-        - waypoints_trajectory: the current coarse trajectory
-        - hop_resolution: distance between the trajectory's waypoints
+    Plans the route between the keypoints. Returns an array with the location and rotation of
+    each of the dense route transforms, the values of their road options and the GPS reference
     """
-
-    grp = GlobalRoutePlanner(CarlaDataProvider.get_map(), hop_resolution)
-    # Obtain route plan
+    grp = GlobalRoutePlanner(carla_map, hop_resolution)
     lat_ref, lon_ref = _get_latlon_ref(CarlaDataProvider.get_world())
 
-    route = []
-    gps_route = []
-
+    transforms = []
+    options = []
     for i in range(len(waypoints_trajectory) - 1):
 
         waypoint = waypoints_trajectory[i]
         waypoint_next = waypoints_trajectory[i + 1]
         interpolated_trace = grp.trace_route(waypoint, waypoint_next)
         for wp, connection in interpolated_trace:
-            route.append((wp.transform, connection))
-            gps_coord = _location_to_gps(lat_ref, lon_ref, wp.transform.location)
-            gps_route.append((gps_coord, connection))
+            location, rotation = wp.transform.location, wp.transform.rotation
+            transforms.append((location.x, location.y, location.z, rotation.pitch, rotation.yaw, rotation.roll))
+            options.append(connection.value)
+
+    return np.array(transforms, dtype=float).reshape(-1, 6), np.array(options, dtype=np.int8), (lat_ref, lon_ref)
+
+
+def interpolate_trajectory(waypoints_trajectory, hop_resolution=1.0):
+    """
+    Given some raw keypoints interpolate a full dense trajectory to be used by the user.
+    returns the full interpolated route both in GPS coordinates and also in its original form.
+    The dense trajectory only depends on the map, keypoints and resolution, so it is
+    computed once and reused (see trajectory_cache_dir).
+
+    Args:
+        - waypoints_trajectory: the current coarse trajectory
+        - hop_resolution: distance between the trajectory's waypoints
+    """
+    carla_map = CarlaDataProvider.get_map()
+    key = _get_trajectory_key(carla_map, waypoints_trajectory, hop_resolution)
+
+    trajectory = _trajectories.get(key)
+    filename = _get_trajectory_cache_file(carla_map, key) if trajectory_cache_dir else None
+    if trajectory is None and filename:
+        trajectory = _load_trajectory(filename)
+    if trajectory is None:
+        trajectory = _trace_trajectory(carla_map, waypoints_trajectory, hop_resolution)
+        if filename:
+            _store_trajectory(filename, trajectory)
+
+    _trajectories[key] = trajectory
+    _trajectories.move_to_end(key)
+    while len(_trajectories) > TRAJECTORY_CACHE_SIZE:
+        _trajectories.popitem(last=False)
+
+    # The transforms are created again each time, as the users of the route can modify them
+    transforms, options, (lat_ref, lon_ref) = trajectory
+    route = []
+    for (x, y, z, pitch, yaw, roll), option in zip(transforms.tolist(), options.tolist()):
+        route.append((carla.Transform(carla.Location(x=x, y=y, z=z), carla.Rotation(pitch=pitch, yaw=yaw, roll=roll)),
+                      RoadOption(option)))
+    gps_route = location_route_to_gps(route, lat_ref, lon_ref)
 
     return gps_route, route
@@ -7,19 +7,30 @@
 Module used to parse all the route and scenario configuration parameters.
 """
 
+import hashlib
 import json
 import math
+import os
+import re
 import xml.etree.ElementTree as ET
 
+import numpy as np
+
 import carla
 from agents.navigation.local_planner import RoadOption
 from srunner.scenarioconfigs.route_scenario_configuration import RouteScenarioConfiguration
 from srunner.scenarioconfigs.scenario_configuration import ScenarioConfiguration, ActorConfigurationData
+from srunner.tools.route_index import RouteIndex
 
 # Threshold to say if a scenarios trigger position is part of the route
 DIST_THRESHOLD = 2.0
 ANGLE_THRESHOLD = 10
 
+# Opening tag of a route, with its id, and the comments and CDATA sections that must be skipped to find it
+ROUTE_START = re.compile(rb"<!--.*?-->|<!\[CDATA\[.*?\]\]>|<route\b[^>]*?\bid\s*=\s*[\"']([^\"']*)[\"'][^>]*>", re.S)
+ROUTE_END = re.compile(rb"<!--.*?-->|<!\[CDATA\[.*?\]\]>|(</route\s*>)", re.S)
+ROUTE_INDEX_VERSION = 2
+
 
 def convert_elem_to_transform(elem):
     """Convert an ElementTree.Element to a CARLA transform"""
@@ -43,57 +54,137 @@ class RouteParser(object):
     Pure static class used to parse all the route and scenario configuration parameters.
     """
 
+    # Folder where the route index of each routes file is stored. If None, they are only kept in memory
+    index_cache_dir = None
+
+    _route_indexes = {}
+
+    @staticmethod
+    def build_route_index(route_filename):
+        """
+        Returns a dictionary with the (start, end) byte offsets of the routes of the file, by route id.
+        Routes sharing an id are all kept, in the order of the file. Commented out routes are ignored
+        """
+        with open(route_filename, "rb") as fd:
+            data = fd.read()
+
+        route_index = {}
+        for match in ROUTE_START.finditer(data):
+            if match.group(1) is None:
+                continue  # Comment or CDATA section
+
+            start = match.start()
+            end = len(data)
+            if match.group(0).endswith(b"/>"):
+                end = match.end()
+            else:
+                for end_match in ROUTE_END.finditer(data, match.end()):
+                    if end_match.group(1) is not None:
+                        end = end_match.end()
+                        break
+            route_index.setdefault(match.group(1).decode("utf-8"), []).append((start, end))
+        return route_index
+
+    @staticmethod
+    def get_route_index(route_filename):
+        """
+        Returns the byte offsets of the routes of the file (see build_route_index). The index is
+        built once per file and version, and stored at the index_cache_dir to be reused by later runs
+        """
+        stat = os.stat(route_filename)
+        version = [ROUTE_INDEX_VERSION, stat.st_size, stat.st_mtime_ns]
+        key = os.path.abspath(route_filename)
+
+        cached = RouteParser._route_indexes.get(key)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        route_index = None
+        index_filename = None
+        if RouteParser.index_cache_dir:
+            index_filename = os.path.join(RouteParser.index_cache_dir, "{}_{}.json".format(
+                os.path.splitext(os.path.basename(key))[0], hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]))
+            try:
+                with open(index_filename, "r", encoding="utf-8") as fd:
+                    data = json.load(fd)
+                if data["version"] == version:
+                    route_index = {route_id: [tuple(offsets) for offsets in routes]
+                                   for route_id, routes in data["routes"].items()}
+            except (IOError, OSError, ValueError, KeyError):
+                pass
+
+        if route_index is None:
+            route_index = RouteParser.build_route_index(route_filename)
+            if index_filename:
+                try:
+                    if not os.path.isdir(RouteParser.index_cache_dir):
+                        os.makedirs(RouteParser.index_cache_dir)
+                    with open(index_filename, "w", encoding="utf-8") as fd:
+                        json.dump({"version": version, "routes": route_index}, fd)
+                except (IOError, OSError) as e:
+                    print("WARNING: Couldn't store the route index at '{}': {}".format(index_filename, e))
+
+        RouteParser._route_indexes[key] = (version, route_index)
+        return route_index
+
     @staticmethod
     def parse_routes_file(route_filename, single_route_id=''):
         """
         Returns a list of route configuration elements.
         :param route_filename: the path to a set of routes.
-        :param single_route: If set, only this route shall be returned
+        :param single_route: If set, only this route shall be returned, parsing only its part of the file
         :return: List of dicts containing the waypoints, id and town of the routes
         """
+        if single_route_id:
+            route_configs = []
+            with open(route_filename, "rb") as fd:
+                for start, end in RouteParser.get_route_index(route_filename).get(single_route_id, []):
+                    fd.seek(start)
+                    route_configs.append(RouteParser.parse_route(ET.fromstring(fd.read(end - start))))
+            return route_configs
 
-        route_configs = []
         tree = ET.parse(route_filename)
-        for route in tree.iter("route"):
-
-            route_id = route.attrib['id']
-            if single_route_id and route_id != single_route_id:
-                continue
-
-            route_config = RouteScenarioConfiguration()
-            route_config.town = route.attrib['town']
-            route_config.name = "RouteScenario_{}".format(route_id)
-            route_config.weather = RouteParser.parse_weather(route)
-
-            # The list of carla.Location that serve as keypoints on this route
-            positions = []
-            for position in route.find('waypoints').iter('position'):
-                positions.append(carla.Location(x=float(position.attrib['x']),
-                                                y=float(position.attrib['y']),
-                                                z=float(position.attrib['z'])))
-            route_config.keypoints = positions
-
-            # The list of ScenarioConfigurations that store the scenario's data
-            scenario_configs = []
-            for scenario in route.find('scenarios').iter('scenario'):
-                scenario_config = ScenarioConfiguration()
-                scenario_config.name = scenario.attrib.get('name')
-                scenario_config.type = scenario.attrib.get('type')
-
-                for elem in scenario.getchildren():
-                    if elem.tag == 'trigger_point':
-                        scenario_config.trigger_points.append(convert_elem_to_transform(elem))
-                    elif elem.tag == 'other_actor':
-                        scenario_config.other_actors.append(ActorConfigurationData.parse_from_node(elem, 'scenario'))
-                    else:
-                        scenario_config.other_parameters[elem.tag] = elem.attrib
-
-                scenario_configs.append(scenario_config)
-            route_config.scenario_configs = scenario_configs
-
-            route_configs.append(route_config)
-
-        return route_configs
+        return [RouteParser.parse_route(route) for route in tree.iter("route")]
+
+    @staticmethod
+    def parse_route(route):
+        """
+        Returns the route configuration of a route element
+        """
+        route_id = route.attrib['id']
+
+        route_config = RouteScenarioConfiguration()
+        route_config.town = route.attrib['town']
+        route_config.name = "RouteScenario_{}".format(route_id)
+        route_config.weather = RouteParser.parse_weather(route)
+
+        # The list of carla.Location that serve as keypoints on this route
+        positions = []
+        for position in route.find('waypoints').iter('position'):
+            positions.append(carla.Location(x=float(position.attrib['x']),
+                                            y=float(position.attrib['y']),
+                                            z=float(position.attrib['z'])))
+        route_config.keypoints = positions
+
+        # The list of ScenarioConfigurations that store the scenario's data
+        scenario_configs = []
+        for scenario in route.find('scenarios').iter('scenario'):
+            scenario_config = ScenarioConfiguration()
+            scenario_config.name = scenario.attrib.get('name')
+            scenario_config.type = scenario.attrib.get('type')
+
+            for elem in scenario:
+                if elem.tag == 'trigger_point':
+                    scenario_config.trigger_points.append(convert_elem_to_transform(elem))
+                elif elem.tag == 'other_actor':
+                    scenario_config.other_actors.append(ActorConfigurationData.parse_from_node(elem, 'scenario'))
+                else:
+                    scenario_config.other_parameters[elem.tag] = elem.attrib
+
+            scenario_configs.append(scenario_config)
+        route_config.scenario_configs = scenario_configs
+
+        return route_config
 
     @staticmethod
     def parse_weather(route):
@@ -126,18 +217,13 @@ class RouteParser(object):
     def is_scenario_at_route(trigger_transform, route):
         """
         Check if the scenario is affecting the route.
-        This is true if the trigger position is very close to any route point
+        This is true if the trigger position is very close to any route point with a similar orientation.
+        Only the route points around the trigger, found through the grid of the RouteIndex, are checked
         """
-        def is_trigger_close(trigger_transform, route_transform):
-            """Check if the two transforms are similar"""
-            dist = trigger_transform.location.distance(route_transform.location)
-            angle_dist = (trigger_transform.rotation.yaw - route_transform.rotation.yaw) % 360
-
-            return dist < DIST_THRESHOLD \
-                and (angle_dist < ANGLE_THRESHOLD or angle_dist > (360 - ANGLE_THRESHOLD))
-
-        for route_transform, _ in route:
-            if is_trigger_close(trigger_transform, route_transform):
-                return True
+        route_index = RouteIndex.get(route)
+        close_points = route_index.get_close_points(trigger_transform.location, DIST_THRESHOLD)
+        if not len(close_points):
+            return False
 
-        return False
+        angle_dist = (trigger_transform.rotation.yaw - np.degrees(route_index.yaws[close_points])) % 360
+        return bool(np.any((angle_dist < ANGLE_THRESHOLD) | (angle_dist > (360 - ANGLE_THRESHOLD))))
@@ -20,6 +20,7 @@ from agents.tools.misc import vector
 from agents.navigation.local_planner import RoadOption
 
 from srunner.scenariomanager.carla_data_provider import CarlaDataProvider
+from srunner.tools.route_index import RouteIndex
 
 
 def get_distance_along_route(route, target_location):
@@ -30,92 +31,21 @@ def get_distance_along_route(route, target_location):
     """
 
     wmap = CarlaDataProvider.get_map()
-    covered_distance = 0
-    prev_position = None
-    found = False
+    route_index = RouteIndex.get(route)
 
     # Don't use the input location, use the corresponding wp as location
-    target_location_from_wp = wmap.get_waypoint(target_location).transform.location
+    target_wp = wmap.get_waypoint(target_location)
 
-    for position, _ in route:
+    # Neighbor lanes close to the route are also valid, as long as they have the same direction
+    index, covered_distance, _ = route_index.project(target_wp.transform.location, max_distance=20)
+    if index is None:
+        return route_index.length, False
 
-        location = target_location_from_wp
+    yaw_diff = math.degrees(math.radians(target_wp.transform.rotation.yaw) - route_index.yaws[index]) % 360
+    if 90 < yaw_diff < 270:
+        return route_index.length, False
 
-        # Don't perform any calculations for the first route point
-        if not prev_position:
-            prev_position = position
-            continue
-
-        # Calculate distance between previous and current route point
-        interval_length_squared = ((prev_position.x - position.x) ** 2) + ((prev_position.y - position.y) ** 2)
-        distance_squared = ((location.x - prev_position.x) ** 2) + ((location.y - prev_position.y) ** 2)
-
-        # Close to the current position? Stop calculation
-        if distance_squared < 0.01:
-            break
-
-        if distance_squared < 400 and not distance_squared < interval_length_squared:
-            # Check if a neighbor lane is closer to the route
-            # Do this only in a close distance to correct route interval, otherwise the computation load is too high
-            starting_wp = wmap.get_waypoint(location)
-            wp = starting_wp.get_left_lane()
-            while wp is not None:
-                new_location = wp.transform.location
-                new_distance_squared = ((new_location.x - prev_position.x) ** 2) + (
-                    (new_location.y - prev_position.y) ** 2)
-
-                if np.sign(starting_wp.lane_id) != np.sign(wp.lane_id):
-                    break
-
-                if new_distance_squared < distance_squared:
-                    distance_squared = new_distance_squared
-                    location = new_location
-                else:
-                    break
-
-                wp = wp.get_left_lane()
-
-            wp = starting_wp.get_right_lane()
-            while wp is not None:
-                new_location = wp.transform.location
-                new_distance_squared = ((new_location.x - prev_position.x) ** 2) + (
-                    (new_location.y - prev_position.y) ** 2)
-
-                if np.sign(starting_wp.lane_id) != np.sign(wp.lane_id):
-                    break
-
-                if new_distance_squared < distance_squared:
-                    distance_squared = new_distance_squared
-                    location = new_location
-                else:
-                    break
-
-                wp = wp.get_right_lane()
-
-        if distance_squared < interval_length_squared:
-            # The location could be inside the current route interval, if route/lane ids match
-            # Note: This assumes a sufficiently small route interval
-            # An alternative is to compare orientations, however, this also does not work for
-            # long route intervals
-
-            curr_wp = wmap.get_waypoint(position)
-            prev_wp = wmap.get_waypoint(prev_position)
-            wp = wmap.get_waypoint(location)
-
-            if prev_wp and curr_wp and wp:
-                if wp.road_id in (prev_wp.road_id, curr_wp.road_id):
-                    # Roads match, now compare the sign of the lane ids
-                    if (np.sign(wp.lane_id) == np.sign(prev_wp.lane_id) or
-                            np.sign(wp.lane_id) == np.sign(curr_wp.lane_id)):
-                        # The location is within the current route interval
-                        covered_distance += math.sqrt(distance_squared)
-                        found = True
-                        break
-
-        covered_distance += math.sqrt(interval_length_squared)
-        prev_position = position
-
-    return covered_distance, found
+    return covered_distance, True
 
 
 def get_crossing_point(actor):
@@ -635,56 +565,85 @@ def get_offset_transform(transform, offset):
     return transform
 
 
+_lane_section_widths = {}
+
+
+def get_lane_section_widths(waypoint):
+    """
+    Returns a dictionary with the width of all the lanes of the road section the waypoint is at.
+    The lanes are only queried the first time a section is requested.
+    """
+    wmap = CarlaDataProvider.get_map()
+    key = (wmap.name, waypoint.road_id, waypoint.section_id)
+    if key not in _lane_section_widths:
+        lane_widths = {}
+        for i in range(-50, 50):
+            _wp = wmap.get_waypoint_xodr(waypoint.road_id, i, waypoint.s)
+            if _wp and i != 0:
+                lane_widths[i] = _wp.lane_width
+        _lane_section_widths[key] = lane_widths
+
+    return _lane_section_widths[key]
+
+
 def get_troad_from_transform(actor_transform):
     """
-    This function finds the lateral road position (t) from actor_transform
+    This function finds the lateral road position (t) from actor_transform.
+    The reference line is located using the cached widths of the lanes between it and the actor's lane
     """
     actor_loc = actor_transform.location
     c_wp = CarlaDataProvider.get_map().get_waypoint(actor_loc)
-    left_lanes, right_lanes = [], []
-    # opendrive standard: (left ==> +ve lane_id) and (right ==> -ve lane_id)
-    ref_lane = CarlaDataProvider.get_map().get_waypoint_xodr(c_wp.road_id, 0, c_wp.s)
-    for i in range(-50, 50):
-        _wp = CarlaDataProvider.get_map().get_waypoint_xodr(c_wp.road_id, i, c_wp.s)
-        if _wp:
-            if i < 0:
-                left_lanes.append(_wp)
-            elif i > 0:
-                right_lanes.append(_wp)
-
-    if left_lanes:
-        left_lane_ids = [ln.lane_id for ln in left_lanes]
-        lm_id = min(left_lane_ids)
-        lm_lane = left_lanes[left_lane_ids.index(lm_id)]
-        lm_lane_offset = lm_lane.lane_width / 2
-    else:
-        lm_lane, lm_lane_offset = ref_lane, 0
-    lm_tr = get_offset_transform(carla.Transform(lm_lane.transform.location, lm_lane.transform.rotation),
-                                 lm_lane_offset)
-    distance_from_lm_lane_edge = lm_tr.location.distance(actor_loc)
-    distance_from_lm_lane_ref_lane = lm_tr.location.distance(ref_lane.transform.location)
-    if right_lanes:
-        right_lane_ids = [ln.lane_id for ln in right_lanes]
-        rm_id = max(right_lane_ids)
-        rm_lane = right_lanes[right_lane_ids.index(rm_id)]
-        rm_lane_offset = -rm_lane.lane_width / 2
-    else:
-        rm_lane, rm_lane_offset = ref_lane, -distance_from_lm_lane_ref_lane
-    distance_from_rm_lane_edge = get_offset_transform(carla.Transform(rm_lane.transform.location,
-                                                                      rm_lane.transform.rotation),
-                                                      rm_lane_offset).location.distance(actor_loc)
-    t_road = ref_lane.transform.location.distance(actor_loc)
-    if not right_lanes or not left_lanes:
-        closest_road_edge = min(distance_from_lm_lane_edge, distance_from_rm_lane_edge)
-        if closest_road_edge == distance_from_lm_lane_edge:
-            t_road = -1*t_road
-    else:
-        if c_wp.lane_id < 0:
-            t_road = -1*t_road
+    lane_widths = get_lane_section_widths(c_wp)
+
+    # opendrive standard: (left ==> +ve lane_id) and (right ==> -ve lane_id).
+    # Waypoints of the left lanes point against the road, so their right vector points away from the reference line
+    lane_sign = 1 if c_wp.lane_id > 0 else -1
+    wp_loc = c_wp.transform.location
+    right_vec = c_wp.transform.get_right_vector()
+    lane_offset = (actor_loc.x - wp_loc.x) * right_vec.x + (actor_loc.y - wp_loc.y) * right_vec.y
+
+    inner_width = sum(lane_widths.get(lane_sign * i, 0) for i in range(1, abs(c_wp.lane_id)))
+    t_road = lane_sign * (inner_width + c_wp.lane_width / 2 + lane_offset)
 
     return t_road
 
 
+_route_distances = {}
+ROUTE_DISTANCE_RESOLUTION = 10  # Length (in meters) of the lane segments sharing the same cached route
+ROUTE_DISTANCE_CACHE_SIZE = 1000
+
+
+def get_route_distance_between_waypoints(start_wp, end_wp, global_planner):
+    """
+    Returns the length of the route between the two waypoints.
+
+    The length of the traced route is cached by the lane segments of both waypoints. While they
+    stay inside the same segments, the distance is updated with the s movement of the waypoints.
+    """
+    def get_segment(wp):
+        return (wp.road_id, wp.lane_id, int(wp.s // ROUTE_DISTANCE_RESOLUTION))
+
+    def get_direction(wp):
+        # s grows with the lane direction at the right lanes, and against it at the left ones
+        return 1 if wp.lane_id < 0 else -1
+
+    # Planners of the same map and resolution trace the same routes, so they share the cache
+    key = (CarlaDataProvider.get_map().name, global_planner._sampling_resolution,  # pylint: disable=protected-access
+           get_segment(start_wp), get_segment(end_wp))
+    if key not in _route_distances:
+        route = global_planner.trace_route(start_wp.transform.location, end_wp.transform.location)
+        locations = np.array([[wp.transform.location.x, wp.transform.location.y, wp.transform.location.z]
+                              for wp, _ in route]).reshape(-1, 3)
+        length = float(np.linalg.norm(np.diff(locations, axis=0), axis=1).sum())
+
+        if len(_route_distances) >= ROUTE_DISTANCE_CACHE_SIZE:
+            _route_distances.clear()
+        _route_distances[key] = (length, start_wp.s, end_wp.s)
+
+    length, start_s, end_s = _route_distances[key]
+    return length - get_direction(start_wp) * (start_wp.s - start_s) + get_direction(end_wp) * (end_wp.s - end_s)
+
+
 def get_distance_between_actors(current, target, distance_type="euclidianDistance", freespace=False,
                                 global_planner=None):
     """
@@ -704,14 +663,7 @@ def get_distance_between_actors(current, target, distance_type="euclidianDistanc
             extent_sum_y = target.bounding_box.extent.y + current.bounding_box.extent.y
     if distance_type == "longitudinal":
         if not current_wp.road_id == target_wp.road_id:
-            distance = 0
-            # Get the route
-            route = global_planner.trace_route(current_transform.location, target_transform.location)
-            # Get the distance of the route
-            for i in range(1, len(route)):
-                curr_loc = route[i][0].transform.location
-                prev_loc = route[i - 1][0].transform.location
-                distance += curr_loc.distance(prev_loc)
+            distance = get_route_distance_between_waypoints(current_wp, target_wp, global_planner)
         else:
             distance = abs(current_wp.s - target_wp.s)
         if freespace:
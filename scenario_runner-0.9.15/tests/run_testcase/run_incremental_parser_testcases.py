@@ -0,0 +1,153 @@
+import unittest
+import glob
+import os
+import sys
+import tempfile
+import warnings
+
+try:
+    sys.path.insert(0, '../../')
+except IndexError:
+    pass
+# Add the current working directory to the module search path
+sys.path.append(os.getcwd())
+
+from antlr4 import CommonTokenStream, InputStream
+from antlr4.error.ErrorListener import ErrorListener
+from antlr4.tree.Tree import TerminalNode
+
+from srunner.osc2.ast_manager.incremental_parser import IncrementalParser
+from srunner.osc2.osc2_parser.OpenSCENARIO2Lexer import OpenSCENARIO2Lexer
+from srunner.osc2.osc2_parser.OpenSCENARIO2Parser import OpenSCENARIO2Parser
+from srunner.tools.osc2_validator import validate_file
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+
+class _SyntaxErrors(ErrorListener):
+    def __init__(self):
+        super(_SyntaxErrors, self).__init__()
+        self.errors = 0
+
+    def syntaxError(self, recognizer, offendingSymbol, line, column, msg, e):
+        self.errors += 1
+
+
+# Parses the whole text at once, returning the osc_file tree and its amount of syntax errors
+def full_parse(text):
+    errors = _SyntaxErrors()
+    lexer = OpenSCENARIO2Lexer(InputStream(text))
+    lexer.removeErrorListeners()
+    lexer.addErrorListener(errors)
+    parser = OpenSCENARIO2Parser(CommonTokenStream(lexer))
+    parser.removeErrorListeners()
+    parser.addErrorListener(errors)
+    return parser.osc_file(), errors.errors
+
+
+# Returns the rule names and the (type, line, column, text) of the tokens of the tree, in order.
+# Empty statements and the EOF of the file are left out, as the incremental parser drops them
+def flatten(tree):
+    nodes = []
+
+    def visit(node):
+        if isinstance(node, TerminalNode):
+            token = node.symbol
+            nodes.append((token.type, token.line, token.column, token.text))
+        else:
+            nodes.append(type(node).__name__)
+            for child in node.getChildren():
+                visit(child)
+
+    nodes.append(type(tree).__name__)
+    for child in tree.getChildren():
+        if child.getText().strip() and not isinstance(child, TerminalNode):
+            visit(child)
+    return nodes
+
+
+# Removes the NEWLINE and DEDENT tokens the lexer adds at the end of the file
+def strip_synthetic_tokens(nodes):
+    nodes = list(nodes)
+    while nodes and isinstance(nodes[-1], tuple) and nodes[-1][0] in (
+            OpenSCENARIO2Parser.NEWLINE, OpenSCENARIO2Parser.DEDENT):
+        nodes.pop()
+    return nodes
+
+
+# Compares the parse trees of the incremental parser with the ones of a full parse
+class TestIncrementalParser(unittest.TestCase):
+    def setUp(self):
+        warnings.simplefilter('ignore', ResourceWarning)
+        self.parser = IncrementalParser()
+
+    def test_repo_files(self):
+        filenames = []
+        for pattern in ['ai_gen/**/*.osc', 'srunner/examples/**/*.osc', 'tests/**/*.osc']:
+            filenames.extend(glob.glob(os.path.join(ROOT_DIR, pattern), recursive=True))
+        self.assertTrue(filenames)
+
+        compared = 0
+        for filename in sorted(filenames):
+            with open(filename, 'r', encoding='utf-8') as fd:
+                text = fd.read()
+            full_tree, errors = full_parse(text)
+            incremental_tree = self.parser.parse(text)
+            if errors or incremental_tree is None:
+                continue
+            incremental_nodes = flatten(incremental_tree)
+            full_nodes = flatten(full_tree)
+            if not text.endswith("\n"):
+                incremental_nodes = strip_synthetic_tokens(incremental_nodes)
+                full_nodes = strip_synthetic_tokens(full_nodes)
+            with self.subTest(filename=os.path.relpath(filename, ROOT_DIR)):
+                self.assertEqual(incremental_nodes, full_nodes)
+            compared += 1
+        self.assertGreater(compared, len(filenames) // 2)
+
+    def test_edited_file(self):
+        text = ("struct a:\n    x: int\n\n"
+                "scenario top:\n    do serial:\n        wait elapsed(1s)\n")
+        self.assertEqual(flatten(self.parser.parse(text)), flatten(full_parse(text)[0]))
+
+        # Only the new comment and the struct are parsed again, the scenario is reused with its lines moved
+        edited = "# comment\n" + text.replace("x: int", "x: int\n    y: float")
+        self.assertEqual(flatten(self.parser.parse(edited)), flatten(full_parse(edited)[0]))
+        self.assertEqual((self.parser.parsed, self.parser.reused), (4, 1))
+
+        edited = edited.replace("y: float", "y: float\n    z: bool")
+        self.assertEqual(flatten(self.parser.parse(edited)), flatten(full_parse(edited)[0]))
+        self.assertEqual((self.parser.parsed, self.parser.reused), (5, 3))
+
+        # The struct is now the last declaration, its closing NEWLINE stays at its end
+        edited = edited[:edited.index("scenario")]
+        self.assertEqual(flatten(self.parser.parse(edited)), flatten(full_parse(edited)[0]))
+        self.assertEqual((self.parser.parsed, self.parser.reused), (5, 5))
+
+    def test_no_trailing_newline(self):
+        text = "scenario top:\n    do serial:\n        wait elapsed(1s)"
+        incremental_nodes = flatten(self.parser.parse(text))
+        full_nodes = flatten(full_parse(text)[0])
+        self.assertNotEqual(incremental_nodes, full_nodes)
+        self.assertEqual(strip_synthetic_tokens(incremental_nodes), strip_synthetic_tokens(full_nodes))
+
+    def test_syntax_error(self):
+        text = "scenario top:\n    do serial:\n        wait elapsed(1s\n"
+        self.assertGreater(full_parse(text)[1], 0)
+        self.assertIsNone(self.parser.parse(text))
+        self.assertIsNone(self.parser.parse(""))
+
+        # The syntax errors are reported by the full parse, at their line of the file
+        with tempfile.NamedTemporaryFile('w', suffix='.osc', dir=ROOT_DIR, delete=False) as fd:
+            fd.write("struct a:\n    x: int\n\n" + text)
+        try:
+            result = validate_file(fd.name)
+        finally:
+            os.remove(fd.name)
+        self.assertFalse(result["valid"])
+        self.assertEqual([d["phase"] for d in result["diagnostics"]], ["syntax"] * len(result["diagnostics"]))
+        self.assertEqual((result["diagnostics"][0]["line"], result["diagnostics"][0]["column"]), (7, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
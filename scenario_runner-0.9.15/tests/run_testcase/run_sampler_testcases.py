@@ -0,0 +1,92 @@
+import unittest
+import os
+import sys
+
+try:
+    sys.path.insert(0, '../../')
+except IndexError:
+    pass
+# Add the current working directory to the module search path
+sys.path.append(os.getcwd())
+
+from srunner.osc2_dm.sampler import SAMPLING_STRATEGIES, RangeSampler, get_sampler, set_sampler
+
+
+# Draws the values of a small scenario: two ranges, an integer and a choice
+def draw(sampler):
+    return [
+        sampler.uniform(4.0, 6.0),
+        sampler.uniform(-1.0, 1.0),
+        sampler.randint(1, 10),
+        sampler.choice(["left", "right", "straight"]),
+    ]
+
+
+class TestSampler(unittest.TestCase):
+    def test_reproducible(self):
+        for strategy in SAMPLING_STRATEGIES:
+            for variant in range(4):
+                with self.subTest(strategy=strategy, variant=variant):
+                    values = draw(RangeSampler(42, strategy, variant, 4))
+                    self.assertEqual(values, draw(RangeSampler(42, strategy, variant, 4)))
+
+    def test_seed_changes_values(self):
+        for strategy in ["uniform", "lhs", "halton"]:
+            with self.subTest(strategy=strategy):
+                self.assertNotEqual(draw(RangeSampler(1, strategy)), draw(RangeSampler(2, strategy)))
+
+    def test_values_in_range(self):
+        for strategy in SAMPLING_STRATEGIES:
+            for variant in range(10):
+                sampler = RangeSampler(7, strategy, variant, 10)
+                first, second, integer, choice = draw(sampler)
+                self.assertTrue(4.0 <= first <= 6.0)
+                self.assertTrue(-1.0 <= second <= 1.0)
+                self.assertIn(integer, range(1, 11))
+                self.assertIn(choice, ["left", "right", "straight"])
+
+    def test_lhs_strata(self):
+        # Each variant falls in a different stratum of each dimension
+        variants = 8
+        for dimension in range(3):
+            strata = set()
+            for variant in range(variants):
+                sampler = RangeSampler(3, "lhs", variant, variants)
+                value = [sampler.uniform(0.0, 1.0) for _ in range(dimension + 1)][-1]
+                strata.add(int(value * variants))
+            self.assertEqual(strata, set(range(variants)))
+
+    def test_grid(self):
+        values = set()
+        for variant in range(9):
+            sampler = RangeSampler(0, "grid", variant, 9, grid_levels=3)
+            values.add((sampler.uniform(0.0, 2.0), sampler.uniform(0.0, 2.0)))
+        self.assertEqual(values, set((x, y) for x in [0.0, 1.0, 2.0] for y in [0.0, 1.0, 2.0]))
+
+    def test_to_dict_replay(self):
+        sampler = RangeSampler(None, "halton", 3, 5)
+        values = draw(sampler)
+        data = sampler.to_dict()
+        self.assertEqual([sample["value"] for sample in data["values"]][:3], values[:3])
+        self.assertEqual(data["values"][3], {"choices": 3, "value": ["left", "right", "straight"].index(values[3])})
+
+        replay = RangeSampler(data["seed"], data["strategy"], data["variant"], data["variants"])
+        self.assertEqual(draw(replay), values)
+        self.assertEqual(replay.to_dict(), data)
+
+    def test_active_sampler(self):
+        previous = get_sampler()
+        sampler = RangeSampler(5)
+        set_sampler(sampler)
+        try:
+            self.assertIs(get_sampler(), sampler)
+        finally:
+            set_sampler(previous)
+
+    def test_unknown_strategy(self):
+        with self.assertRaises(ValueError):
+            RangeSampler(0, "sobol")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+import io
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import warnings
+
+try:
+    sys.path.insert(0, '../../')
+except IndexError:
+    pass
+# Add the current working directory to the module search path
+sys.path.append(os.getcwd())
+
+# Importing the symbol test cases also changes the working directory to tests/
+from tests.run_testcase import run_symbol_testcases
+from srunner.tools.osc2_validator import OSC2Validator, validate_file
+
+
+# Returns the symbol diagnostics of the validator in the format of the symbol test cases
+class ValidatorSymbolClass(object):
+    def testcase(self, str):
+        result = validate_file(str)
+        msg_list = []
+        for diagnostic in result["diagnostics"]:
+            if diagnostic["phase"] != "symbol":
+                continue
+            if diagnostic["line"] is None:
+                msg_list.append("")
+                continue
+            msg_list.append("[{}] line {}:{}, {}".format(
+                diagnostic["severity"].capitalize(), diagnostic["line"],
+                diagnostic["column"], diagnostic["message"]))
+        return msg_list
+
+
+# Runs the testcases1 expectations of the symbol test cases through the validator
+class TestValidator(run_symbol_testcases.TestStruct):
+    def setUp(self):
+        warnings.simplefilter('ignore', ResourceWarning)
+        self.test_class = ValidatorSymbolClass()
+
+
+# Checks the JSON-RPC requests and responses of the validation service
+class TestValidatorService(unittest.TestCase):
+    def setUp(self):
+        warnings.simplefilter('ignore', ResourceWarning)
+        self.validator = OSC2Validator()
+
+    def request(self, request):
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            response = self.validator.handle_line(request)
+        # Only the response can be written to the stream
+        self.assertEqual(stdout.getvalue(), "")
+        return json.loads(response)
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.request("[1, 2]")["error"]["code"], -32600)
+        self.assertEqual(self.request('"validate"')["error"]["code"], -32600)
+        self.assertEqual(self.request("{")["error"]["code"], -32700)
+        for params in ['[1]', '{"files": "a.osc"}', '{"files": [1]}']:
+            response = self.request('{"jsonrpc": "2.0", "id": 1, "method": "validate", "params": %s}' % params)
+            self.assertEqual(response["error"]["code"], -32602)
+        response = self.request('{"jsonrpc": "2.0", "id": 2, "method": "run"}')
+        self.assertEqual(response["error"]["code"], -32601)
+
+    def test_internal_error(self):
+        def fail(filenames):
+            raise RuntimeError("broken pool")
+        self.validator.validate = fail
+        response = self.request('{"jsonrpc": "2.0", "id": 3, "method": "validate", "params": {"files": []}}')
+        self.assertEqual(response["id"], 3)
+        self.assertEqual(response["error"]["code"], -32603)
+
+    def test_missing_trailing_newline(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.osc', dir='.', delete=False) as fd:
+            fd.write("scenario top:\n    do serial:\n        wait elapsed(1s)")
+        try:
+            response = self.request(json.dumps({"jsonrpc": "2.0", "id": 4, "method": "validate",
+                                                "params": {"files": [os.path.basename(fd.name)]}}))
+        finally:
+            os.remove(fd.name)
+        result = response["result"][0]
+        self.assertFalse(result["valid"])
+        self.assertEqual(
+            [(d["severity"], d["phase"], d["line"], d["column"]) for d in result["diagnostics"]],
+            [("error", "import", 3, 24)])
+
+
+if __name__ == "__main__":
+    unittest.main()